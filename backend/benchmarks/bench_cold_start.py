@@ -0,0 +1,82 @@
+"""
+measures a cold start per dynamodb interface, each in a fresh interpreter: importing the app, then the first request
+bootstrapping the container and creating the boto3 clients, then a warm request, against moto
+
+run from the backend directory with `python -m benchmarks.bench_cold_start`
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+os.environ.setdefault("DYNAMODB_TABLE", "flatini-benchmark")
+os.environ.setdefault("USER_POOL_ID", "flatini-benchmark")
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "test")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "test")
+
+INTERFACES = ["resource", "client"]
+REPEATS = 7
+EVENT = {
+    "routeKey": "GET /groups",
+    "requestContext": {"authorizer": {"jwt": {"claims": {"username": "benchmark_user"}}}},
+    "queryStringParameters": None,
+    "pathParameters": None,
+    "body": None
+}
+
+
+def create_table():
+    import boto3
+    boto3.client('dynamodb', region_name="eu-west-2").create_table(
+        TableName=os.environ["DYNAMODB_TABLE"],
+        KeySchema=[{'AttributeName': 'partition_key', 'KeyType': 'HASH'},
+                   {'AttributeName': 'id', 'KeyType': 'RANGE'}],
+        AttributeDefinitions=[{'AttributeName': 'partition_key', 'AttributeType': 'S'},
+                              {'AttributeName': 'id', 'AttributeType': 'S'}],
+        BillingMode='PAY_PER_REQUEST')
+
+
+def cold_start() -> dict:
+    """
+    runs in the child interpreter, moto is started before the app is imported so no client escapes the mock
+    """
+    from moto import mock_aws
+    with mock_aws():
+        create_table()
+        start = time.perf_counter()
+        from src import app
+        imported = time.perf_counter()
+        app.lambda_handler(event=EVENT, context={})
+        first_request = time.perf_counter()
+        app.lambda_handler(event=EVENT, context={})
+        warm_request = time.perf_counter()
+    return {"import_ms": (imported - start) * 1000,
+            "first_request_ms": (first_request - imported) * 1000,
+            "warm_request_ms": (warm_request - first_request) * 1000}
+
+
+def measure(interface: str) -> dict[str, float]:
+    runs = []
+    for _ in range(REPEATS):
+        output = subprocess.run([sys.executable, "-m", "benchmarks.bench_cold_start", "--child"],
+                                env={**os.environ, "DYNAMODB_INTERFACE": interface},
+                                capture_output=True, text=True, check=True).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    return {timing: statistics.median(run[timing] for run in runs) for timing in runs[0].keys()}
+
+
+def main():
+    print(f"{'interface':<10}{'import ms':>11}{'first request ms':>18}{'cold total ms':>15}{'warm request ms':>17}")
+    for interface in INTERFACES:
+        timings = measure(interface)
+        print(f"{interface:<10}{timings['import_ms']:>11.1f}{timings['first_request_ms']:>18.1f}"
+              f"{timings['import_ms'] + timings['first_request_ms']:>15.1f}{timings['warm_request_ms']:>17.2f}")
+
+
+if __name__ == "__main__":
+    if "--child" in sys.argv:
+        print(json.dumps(cold_start()))
+    else:
+        main()
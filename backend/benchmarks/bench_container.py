@@ -0,0 +1,55 @@
+"""
+compares bootstrapping a new container per request against reusing the warm container
+
+run from the backend directory with `python -m benchmarks.bench_container`
+"""
+import contextlib
+import io
+import os
+import statistics
+import timeit
+
+os.environ.setdefault("DYNAMODB_TABLE", "flatini-benchmark")
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "test")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "test")
+
+from formula_thoughts_web.ioc import Container
+
+from src import app
+
+ITERATIONS = 200
+REPEATS = 5
+EVENT = {
+    "routeKey": "GET /benchmark",
+    "requestContext": {"authorizer": {"jwt": {"claims": {"username": "benchmark_user"}}}}
+}
+
+
+def per_request_bootstrap():
+    container = Container()
+    app.bootstrap(container=container)
+    app.run(event=EVENT, context={}, container=container)
+
+
+def reused_container():
+    app.run(event=EVENT, context={}, container=app.get_container())
+
+
+def measure(name: str, func) -> float:
+    with contextlib.redirect_stdout(io.StringIO()):
+        func()
+        timings = timeit.repeat(func, number=ITERATIONS, repeat=REPEATS)
+    per_call_ms = [timing / ITERATIONS * 1000 for timing in timings]
+    median = statistics.median(per_call_ms)
+    print(f"{name:<24} median {median:8.3f} ms/request  best {min(per_call_ms):8.3f} ms/request")
+    return median
+
+
+def main():
+    per_request = measure("per-request bootstrap", per_request_bootstrap)
+    reused = measure("reused container", reused_container)
+    print(f"speedup {per_request / reused:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
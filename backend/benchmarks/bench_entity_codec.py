@@ -0,0 +1,110 @@
+"""
+compares reading the properties of a group through the dynamodb resource and the object mapper against reading the
+AttributeValues of the low-level client with AttributeValueCodec, decoding only and through DynamoDbGroupRepo.get
+against moto
+
+run from the backend directory with `python -m benchmarks.bench_entity_codec`
+"""
+import contextlib
+import io
+import os
+import timeit
+
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "test")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "test")
+
+import boto3
+from boto3.dynamodb.types import TypeSerializer, TypeDeserializer
+from formula_thoughts_web.crosscutting import ObjectMapper, JsonSnakeToCamelSerializer
+from moto import mock_aws
+
+from src.core import Group, Property
+from src.infra import DynamoDbWrapper, DynamoDbClientResource, ObjectHasher
+from src.infra.codecs import ObjectMapperCodec, AttributeValueCodec
+from src.infra.repositories import DynamoDbGroupRepo, DynamoDbPropertyRepo
+
+PROPERTY_COUNTS = [10, 100, 1000]
+ITERATIONS = 5
+TABLE_NAME = "flatini-benchmark"
+
+
+def create_table(dynamo):
+    dynamo.create_table(TableName=TABLE_NAME,
+                        KeySchema=[{'AttributeName': 'partition_key', 'KeyType': 'HASH'},
+                                   {'AttributeName': 'id', 'KeyType': 'RANGE'}],
+                        AttributeDefinitions=[{'AttributeName': 'partition_key', 'AttributeType': 'S'},
+                                              {'AttributeName': 'id', 'AttributeType': 'S'}],
+                        BillingMode='PAY_PER_REQUEST')
+
+
+def property_items(count: int) -> list[dict]:
+    serializer = TypeSerializer()
+    return [{name: serializer.serialize(value) for name, value in {
+        "partition_key": "group:benchmark",
+        "id": f"property:{i}",
+        "etag": "0123456789abcdef",
+        "url": f"https://openrent.co.uk/{i}",
+        "title": "2 bed flat with garden",
+        "price": "1250.00",
+        "added_by": "benchmark_user"
+    }.items()} for i in range(count)]
+
+
+def resource_decode(items: list[dict]) -> list[Property]:
+    deserializer = TypeDeserializer()
+    codec = ObjectMapperCodec(object_mapper=ObjectMapper())
+    return [codec.property({name: deserializer.deserialize(value) for name, value in item.items()})
+            for item in items]
+
+
+def attribute_value_decode(items: list[dict]) -> list[Property]:
+    codec = AttributeValueCodec()
+    return [codec.property(item) for item in items]
+
+
+def per_call_ms(func) -> float:
+    with contextlib.redirect_stdout(io.StringIO()):
+        return timeit.timeit(func, number=ITERATIONS) / ITERATIONS * 1000
+
+
+def group_repo(dynamo_wrapper: DynamoDbWrapper) -> DynamoDbGroupRepo:
+    object_mapper = ObjectMapper()
+    return DynamoDbGroupRepo(dynamo_wrapper=dynamo_wrapper,
+                             object_mapper=object_mapper,
+                             object_hasher=ObjectHasher(object_mapper=object_mapper,
+                                                        serializer=JsonSnakeToCamelSerializer()))
+
+
+@mock_aws
+def main():
+    dynamo = boto3.resource('dynamodb', region_name="eu-west-2")
+    create_table(dynamo)
+    resource_repo = group_repo(DynamoDbWrapper(tablename=TABLE_NAME, dynamo_client=dynamo))
+    attribute_value_repo = group_repo(DynamoDbWrapper(
+        tablename=TABLE_NAME,
+        dynamo_client=DynamoDbClientResource(client=boto3.client('dynamodb', region_name="eu-west-2"),
+                                             deserialize_output=False),
+        codec=AttributeValueCodec()))
+    object_mapper = ObjectMapper()
+    property_repo = DynamoDbPropertyRepo(dynamo_wrapper=DynamoDbWrapper(tablename=TABLE_NAME, dynamo_client=dynamo),
+                                         object_mapper=object_mapper,
+                                         object_hasher=ObjectHasher(object_mapper=object_mapper,
+                                                                    serializer=JsonSnakeToCamelSerializer()))
+    print(f"{'properties':>10}{'resource decode ms':>20}{'codec decode ms':>17}"
+          f"{'resource get ms':>17}{'codec get ms':>14}")
+    for count in PROPERTY_COUNTS:
+        items = property_items(count)
+        group = Group()
+        with contextlib.redirect_stdout(io.StringIO()):
+            resource_repo.create(group=group)
+            property_repo.create_many(group_id=group.id, properties=[Property(url=f"https://openrent.co.uk/{i}",
+                                                                              title="2 bed flat with garden")
+                                                                     for i in range(count)])
+        print(f"{count:>10}{per_call_ms(lambda: resource_decode(items)):>20.3f}"
+              f"{per_call_ms(lambda: attribute_value_decode(items)):>17.3f}"
+              f"{per_call_ms(lambda: resource_repo.get(_id=group.id)):>17.3f}"
+              f"{per_call_ms(lambda: attribute_value_repo.get(_id=group.id)):>14.3f}")
+
+
+if __name__ == "__main__":
+    main()
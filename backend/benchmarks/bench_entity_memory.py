@@ -0,0 +1,95 @@
+"""
+compares the memory and allocations of building a GroupProperties of 5k properties from the slotted entities
+against dataclasses with the same fields keeping an instance dict, along with the time ObjectMapper takes to map a
+single property to and from a dict
+
+run from the backend directory with `python -m benchmarks.bench_entity_memory`
+"""
+import contextlib
+import io
+import timeit
+import tracemalloc
+from dataclasses import dataclass, field
+from decimal import Decimal
+
+from formula_thoughts_web.crosscutting import ObjectMapper
+
+from src.core import GroupProperties, Property, uuid4_str
+
+PROPERTY_COUNT = 5000
+ITERATIONS = 20
+MAPPING_ITERATIONS = 2000
+
+
+@dataclass(unsafe_hash=True)
+class UnslottedProperty:
+    etag: str = None
+    partition_key: str = None
+    id: str = field(default_factory=uuid4_str)
+    url: str = None
+    title: str = None
+    price: Decimal = None
+    added_by: str = None
+
+
+@dataclass(unsafe_hash=True)
+class UnslottedGroupProperties:
+    etag: str = None
+    partition_key: str = None
+    id: str = field(default_factory=uuid4_str)
+    participants: list[str] = field(default_factory=lambda: [])
+    price_limit: Decimal = None
+    locations: list[str] = field(default_factory=lambda: [])
+    properties: list[UnslottedProperty] = field(default_factory=lambda: [])
+
+
+def build(group_properties_type: type, property_type: type):
+    return group_properties_type(id="1234", participants=["user_1", "user_2"], price_limit=Decimal("1200"),
+                                 locations=["SW4"],
+                                 properties=[property_type(etag="0123456789abcdef", partition_key="group:1234",
+                                                           id=str(i), url=f"https://openrent.co.uk/{i}",
+                                                           title="2 bed flat with garden", price=Decimal("1250"),
+                                                           added_by="user_1")
+                                             for i in range(PROPERTY_COUNT)])
+
+
+def allocations(group_properties_type: type, property_type: type) -> (int, int, int):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    group_properties = build(group_properties_type, property_type)
+    after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    stats = after.compare_to(before, "filename")
+    del group_properties
+    return sum(stat.count_diff for stat in stats), sum(stat.size_diff for stat in stats), peak
+
+
+def mapping_us(property_type: type) -> (float, float):
+    object_mapper = ObjectMapper()
+    prop = property_type(etag="0123456789abcdef", partition_key="group:1234", id="1", url="https://openrent.co.uk/1",
+                         title="2 bed flat with garden", price=Decimal("1250"), added_by="user_1")
+    # ObjectMapper prints every object it maps
+    with contextlib.redirect_stdout(io.StringIO()):
+        item = object_mapper.map_to_dict(_from=prop, to=property_type)
+        to_dict_us = min(timeit.repeat(lambda: object_mapper.map_to_dict(_from=prop, to=property_type),
+                                       number=MAPPING_ITERATIONS, repeat=5)) / MAPPING_ITERATIONS * 1000000
+        from_dict_us = min(timeit.repeat(lambda: object_mapper.map_from_dict(_from=item, to=property_type),
+                                         number=MAPPING_ITERATIONS, repeat=5)) / MAPPING_ITERATIONS * 1000000
+    return to_dict_us, from_dict_us
+
+
+def main():
+    print(f"{'entities':<10}{'blocks':>9}{'retained B':>12}{'peak B':>11}{'build ms':>10}"
+          f"{'to dict us':>12}{'from dict us':>14}")
+    for name, group_properties_type, property_type in [("dict", UnslottedGroupProperties, UnslottedProperty),
+                                                       ("slots", GroupProperties, Property)]:
+        blocks, retained, peak = allocations(group_properties_type, property_type)
+        build_ms = timeit.timeit(lambda: build(group_properties_type, property_type),
+                                 number=ITERATIONS) / ITERATIONS * 1000
+        to_dict_us, from_dict_us = mapping_us(property_type)
+        print(f"{name:<10}{blocks:>9}{retained:>12}{peak:>11}{build_ms:>10.3f}{to_dict_us:>12.1f}{from_dict_us:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
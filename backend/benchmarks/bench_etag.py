@@ -0,0 +1,40 @@
+"""
+compares hashing the whole red flag against chaining the previous etag with the change when a vote is added
+
+run from the backend directory with `python -m benchmarks.bench_etag`
+"""
+import contextlib
+import io
+import timeit
+import uuid
+
+from formula_thoughts_web.crosscutting import JsonSnakeToCamelSerializer, ObjectMapper
+
+from src.core import RedFlag
+from src.infra import ObjectHasher
+
+VOTER_COUNTS = [10, 1_000, 10_000]
+ITERATIONS = 50
+
+
+def main():
+    object_hasher = ObjectHasher(serializer=JsonSnakeToCamelSerializer(), object_mapper=ObjectMapper())
+    print(f"{'voters':>8}{'full hash ms':>15}{'hash change ms':>17}")
+    for voter_count in VOTER_COUNTS:
+        red_flag = RedFlag(property_url="https://example.com/properties/1",
+                           body="damp in the bathroom",
+                           votes=[str(uuid.uuid4()) for _ in range(voter_count)])
+        user_id = str(uuid.uuid4())
+        with contextlib.redirect_stdout(io.StringIO()):
+            red_flag.etag = object_hasher.hash(object=red_flag)
+            full_ms = timeit.timeit(lambda: object_hasher.hash(object=red_flag),
+                                    number=ITERATIONS) / ITERATIONS * 1000
+        change_ms = timeit.timeit(lambda: object_hasher.hash_change(etag=red_flag.etag,
+                                                                    change="add_voter",
+                                                                    value=user_id),
+                                  number=ITERATIONS) / ITERATIONS * 1000
+        print(f"{voter_count:>8}{full_ms:>15.3f}{change_ms:>17.4f}")
+
+
+if __name__ == "__main__":
+    main()
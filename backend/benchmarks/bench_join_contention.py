@@ -0,0 +1,111 @@
+"""
+compares many users joining one group at once with participants as an etag guarded list against a string set,
+against moto. the list joins re-read the group and retry on every conflict, the set joins never conflict
+
+run from the backend directory with `python -m benchmarks.bench_join_contention`
+"""
+import contextlib
+import io
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "test")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "test")
+
+import boto3
+from boto3.dynamodb.conditions import Attr
+from botocore.exceptions import ClientError
+from formula_thoughts_web.crosscutting import JsonSnakeToCamelSerializer, ObjectMapper
+from moto import mock_aws
+
+from src.core import Group
+from src.infra import DynamoDbWrapper, ObjectHasher, CONDITIONAL_CHECK_FAILED
+from src.infra.repositories import DynamoDbGroupRepo
+
+JOINER_COUNTS = [10, 50, 100]
+MAX_WORKERS = 16
+TABLE_NAME = "flatini-benchmark"
+
+
+class ListJoins:
+    """
+    the join as it was before participants became a set, read the group then append guarded by its etag
+    """
+
+    def __init__(self, dynamo_wrapper: DynamoDbWrapper, object_hasher: ObjectHasher):
+        self.__dynamo_wrapper = dynamo_wrapper
+        self.__object_hasher = object_hasher
+        self.__lock = threading.Lock()
+        self.conflicts = 0
+
+    def join(self, group_id: str, participant: str):
+        key = {"partition_key": f"group:{group_id}", "id": f"group:{group_id}"}
+        while True:
+            etag = self.__dynamo_wrapper.get_item(key=key)['etag']
+            try:
+                self.__dynamo_wrapper.update_item(
+                    key=key,
+                    update_expression="SET participants = list_append(participants, :i), etag = :j",
+                    condition_expression=Attr("etag").eq(etag),
+                    expression_attribute_values={
+                        ':i': [participant],
+                        ':j': self.__object_hasher.hash_change(etag=etag, change="add_participant", value=participant)
+                    })
+                return
+            except ClientError as e:
+                if e.response['Error']['Code'] != CONDITIONAL_CHECK_FAILED:
+                    raise
+                with self.__lock:
+                    self.conflicts += 1
+
+
+def create_table(dynamo):
+    dynamo.create_table(TableName=TABLE_NAME,
+                        KeySchema=[{'AttributeName': 'partition_key', 'KeyType': 'HASH'},
+                                   {'AttributeName': 'id', 'KeyType': 'RANGE'}],
+                        AttributeDefinitions=[{'AttributeName': 'partition_key', 'AttributeType': 'S'},
+                                              {'AttributeName': 'id', 'AttributeType': 'S'}],
+                        BillingMode='PAY_PER_REQUEST')
+
+
+def run_joins(join, group_id: str, joiner_count: int) -> float:
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        list(executor.map(lambda i: join(group_id, f"participant {i}"), range(joiner_count)))
+    return (time.perf_counter() - start) * 1000
+
+
+@mock_aws
+def main():
+    dynamo = boto3.resource('dynamodb', region_name="eu-west-2")
+    create_table(dynamo)
+    dynamo_wrapper = DynamoDbWrapper(tablename=TABLE_NAME, dynamo_client=dynamo)
+    object_mapper = ObjectMapper()
+    object_hasher = ObjectHasher(serializer=JsonSnakeToCamelSerializer(), object_mapper=object_mapper)
+    group_repo = DynamoDbGroupRepo(dynamo_wrapper=dynamo_wrapper, object_mapper=object_mapper,
+                                   object_hasher=object_hasher)
+    print(f"{'joiners':>8}{'list ms':>10}{'list conflicts':>16}{'set ms':>9}{'set joined':>12}")
+    for joiner_count in JOINER_COUNTS:
+        with contextlib.redirect_stdout(io.StringIO()):
+            list_group = Group()
+            group_repo.create(group=list_group)
+            dynamo_wrapper.update_item(key={"partition_key": f"group:{list_group.id}", "id": f"group:{list_group.id}"},
+                                       update_expression="SET participants = :empty",
+                                       condition_expression=Attr("etag").exists(),
+                                       expression_attribute_values={':empty': []})
+            set_group = Group()
+            group_repo.create(group=set_group)
+        list_joins = ListJoins(dynamo_wrapper=dynamo_wrapper, object_hasher=object_hasher)
+        list_ms = run_joins(list_joins.join, list_group.id, joiner_count)
+        set_ms = run_joins(lambda group_id, participant: group_repo.add_participant(participant=participant,
+                                                                                    group=Group(id=group_id)),
+                           set_group.id, joiner_count)
+        with contextlib.redirect_stdout(io.StringIO()):
+            joined = len(group_repo.get_metadata(_id=set_group.id).participants)
+        print(f"{joiner_count:>8}{list_ms:>10.1f}{list_joins.conflicts:>16}{set_ms:>9.1f}{joined:>12}")
+
+
+if __name__ == "__main__":
+    main()
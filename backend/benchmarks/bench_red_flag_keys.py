@@ -0,0 +1,97 @@
+"""
+compares the size of red flag keys and the latency of listing the red flags of a url, for the legacy base64 url id
+prefix, the hex sha256 partition key and the compact base64url digest partition key, against moto
+
+run from the backend directory with `python -m benchmarks.bench_red_flag_keys`
+"""
+import hashlib
+import os
+import timeit
+import uuid
+
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "test")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "test")
+
+import boto3
+from boto3.dynamodb.conditions import Attr
+from formula_thoughts_web.crosscutting import base64encode
+from moto import mock_aws
+
+from src.infra import DynamoDbWrapper, LEGACY_RED_FLAG_PARTITION_KEY, red_flag_partition_key
+
+PROPERTY_URLS = [
+    "https://openrent.co.uk/1234567",
+    "https://rightmove.co.uk/properties/123456789",
+    "https://example-lettings.co.uk/properties/to-rent/london/clapham/2-bedroom-flat-with-garden-and-parking/"
+    "listing-123456789-abcdef"
+]
+RED_FLAGS_PER_URL = 20
+ITERATIONS = 50
+TABLE_NAME = "flatini-benchmark"
+
+
+def legacy_keys(property_url: str, red_flag_id: str) -> (dict, dict):
+    return ({"partition_key": LEGACY_RED_FLAG_PARTITION_KEY, "id": f"{base64encode(property_url)}:{red_flag_id}"},
+            {"partition_key": LEGACY_RED_FLAG_PARTITION_KEY, "begins_with": base64encode(property_url)})
+
+
+def hex_keys(property_url: str, red_flag_id: str) -> (dict, dict):
+    partition_key = f"red_flag:{hashlib.sha256(property_url.encode()).hexdigest()}"
+    return {"partition_key": partition_key, "id": red_flag_id}, {"partition_key": partition_key}
+
+
+def compact_keys(property_url: str, red_flag_id: str) -> (dict, dict):
+    partition_key = red_flag_partition_key(property_url)
+    return {"partition_key": partition_key, "id": red_flag_id}, {"partition_key": partition_key}
+
+
+KEY_SCHEMES = {"legacy": legacy_keys, "hex": hex_keys, "compact": compact_keys}
+
+
+def create_table(dynamo):
+    dynamo.create_table(TableName=TABLE_NAME,
+                        KeySchema=[{'AttributeName': 'partition_key', 'KeyType': 'HASH'},
+                                   {'AttributeName': 'id', 'KeyType': 'RANGE'}],
+                        AttributeDefinitions=[{'AttributeName': 'partition_key', 'AttributeType': 'S'},
+                                              {'AttributeName': 'id', 'AttributeType': 'S'}],
+                        BillingMode='PAY_PER_REQUEST')
+
+
+def key_bytes(key: dict) -> int:
+    return len(key["partition_key"].encode()) + len(key["id"].encode())
+
+
+def query(dynamo_wrapper: DynamoDbWrapper, query_key: dict) -> list[dict]:
+    if "begins_with" in query_key:
+        return list(dynamo_wrapper.query_iter(
+            key_condition_expression="partition_key = :partition_key AND begins_with(id, :property_url)",
+            expression_attribute_values={
+                ':partition_key': query_key["partition_key"],
+                ':property_url': query_key["begins_with"]
+            }))
+    return list(dynamo_wrapper.query_iter(key_condition_expression="partition_key = :partition_key",
+                                          expression_attribute_values={
+                                              ':partition_key': query_key["partition_key"]
+                                          }))
+
+
+@mock_aws
+def main():
+    dynamo = boto3.resource('dynamodb', region_name="eu-west-2")
+    create_table(dynamo)
+    dynamo_wrapper = DynamoDbWrapper(tablename=TABLE_NAME, dynamo_client=dynamo)
+    print(f"{'url length':>11}{'scheme':>9}{'key B':>7}{'query key B':>13}{'query ms':>10}")
+    for property_url in PROPERTY_URLS:
+        for scheme, keys in KEY_SCHEMES.items():
+            query_key = None
+            for _ in range(RED_FLAGS_PER_URL):
+                key, query_key = keys(property_url, str(uuid.uuid4()))
+                dynamo_wrapper.put(item={**key, "property_url": property_url, "body": "damp in the bathroom"},
+                                   condition_expression=Attr('partition_key').not_exists())
+            query_ms = timeit.timeit(lambda: query(dynamo_wrapper, query_key), number=ITERATIONS) / ITERATIONS * 1000
+            print(f"{len(property_url):>11}{scheme:>9}{key_bytes(key):>7}"
+                  f"{sum(len(value.encode()) for value in query_key.values()):>13}{query_ms:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
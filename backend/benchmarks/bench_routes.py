@@ -0,0 +1,69 @@
+"""
+compares building every api request handler per request against lazily building only the handler matching the route
+
+run from the backend directory with `python -m benchmarks.bench_routes`
+"""
+import contextlib
+import io
+import os
+import timeit
+import tracemalloc
+
+os.environ.setdefault("DYNAMODB_TABLE", "flatini-benchmark")
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "test")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "test")
+
+from formula_thoughts_web.abstractions import ApiRequestHandler
+from formula_thoughts_web.ioc import Container
+
+from src.app import bootstrap
+from src.web.ioc import ROUTES
+
+ITERATIONS = 200
+
+
+def resolve_all_handlers(container: Container, route_key: str):
+    handlers = [container.resolve(service=handler) for handler in ROUTES.values()]
+    return handlers, list(filter(lambda x: x.route_key == route_key, handlers))[0]
+
+
+def resolve_matched_handler(container: Container, route_key: str):
+    handlers = container.resolve(service=list[ApiRequestHandler])
+    list(filter(lambda x: x.route_key == route_key, handlers))
+    return handlers, container.resolve(service=ROUTES[route_key])
+
+
+def allocations(func, container: Container, route_key: str) -> (int, int):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    result = func(container, route_key)
+    after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename"))
+    del result
+    return blocks, peak
+
+
+def per_request_ms(func, container: Container, route_key: str) -> float:
+    return timeit.timeit(lambda: func(container, route_key), number=ITERATIONS) / ITERATIONS * 1000
+
+
+def main():
+    container = Container()
+    with contextlib.redirect_stdout(io.StringIO()):
+        bootstrap(container=container)
+        resolve_all_handlers(container, "GET /groups")
+    print(f"{'route':<52}{'all blocks':>12}{'lazy blocks':>13}{'all peak B':>12}{'lazy peak B':>13}"
+          f"{'all ms':>9}{'lazy ms':>9}")
+    for route_key in ROUTES.keys():
+        all_blocks, all_peak = allocations(resolve_all_handlers, container, route_key)
+        lazy_blocks, lazy_peak = allocations(resolve_matched_handler, container, route_key)
+        all_ms = per_request_ms(resolve_all_handlers, container, route_key)
+        lazy_ms = per_request_ms(resolve_matched_handler, container, route_key)
+        print(f"{route_key:<52}{all_blocks:>12}{lazy_blocks:>13}{all_peak:>12}{lazy_peak:>13}"
+              f"{all_ms:>9.3f}{lazy_ms:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
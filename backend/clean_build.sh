@@ -1 +1 @@
-sam build && cd .aws-sam/build/FlatiniFunction && rm -fr clean_build.sh aws_cost_estimate.json samconfig.toml template.yaml requirements.txt requirements-test.txt tests && cd ../../..
\ No newline at end of file
+sam build && cd .aws-sam/build/FlatiniFunction && rm -fr clean_build.sh aws_cost_estimate.json samconfig.toml template.yaml requirements.txt requirements-test.txt tests benchmarks && cd ../../..
\ No newline at end of file
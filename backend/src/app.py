@@ -1,16 +1,32 @@
-import os
+from dataclasses import asdict
 
+from formula_thoughts_web.abstractions import Logger
 from formula_thoughts_web.ioc import register_web, Container, LambdaRunner
 
+from src.domain import ROUTE_KEY
+from src.domain.helpers import request_properties
+from src.infra import DynamoDbCallAccounting
 from src.infra.ioc import register_data_dependencies
 from src.domain.ioc import register_domain_dependencies
 from src.web.ioc import register_web_dependencies
 
+_container: Container = None
+
 
 def lambda_handler(event, context):
-    container = Container()
-    bootstrap(container=container)
-    return run(event=event, context=context, container=container)
+    return run(event=event, context=context, container=get_container())
+
+
+def get_container() -> Container:
+    """
+    lazily builds the container once per lambda process so warm invocations skip bootstrapping
+    """
+    global _container
+    if _container is None:
+        container = Container()
+        bootstrap(container=container)
+        _container = container
+    return _container
 
 
 def bootstrap(container):
@@ -20,5 +36,27 @@ def bootstrap(container):
     register_data_dependencies(container=container)
 
 
+def begin_request(container):
+    container.resolve(service=Logger).add_global_properties(properties={})
+
+
+def end_request(container, event: dict):
+    """
+    logs the dynamo calls of the request by repo method, nothing is recorded unless DYNAMODB_CALL_ACCOUNTING is on
+    """
+    totals = container.resolve(service=DynamoDbCallAccounting).flush()
+    if len(totals) > 0:
+        container.resolve(service=Logger).log_event(message="dynamodb calls", properties={
+            **request_properties(variables={**(event.get('pathParameters') or {}),
+                                            **(event.get('queryStringParameters') or {}),
+                                            ROUTE_KEY: event.get('routeKey')}),
+            "callers": {caller: asdict(caller_totals) for caller, caller_totals in totals.items()}
+        })
+
+
 def run(event, context, container):
-    return container.resolve(service=LambdaRunner).run(event=event, context=context)
\ No newline at end of file
+    begin_request(container=container)
+    try:
+        return container.resolve(service=LambdaRunner).run(event=event, context=context)
+    finally:
+        end_request(container=container, event=event)
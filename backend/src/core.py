@@ -1,11 +1,11 @@
 import typing
 import uuid
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields
 from datetime import datetime
 from decimal import Decimal
 from typing import Protocol
 
-from formula_thoughts_web.abstractions import SequenceBuilder, Command
+from formula_thoughts_web.abstractions import SequenceBuilder, Command, SequenceComponent
 
 TData = typing.TypeVar("TData")
 
@@ -20,15 +20,91 @@ UserId = str
 RedFlagId = str
 PropertyId = str
 PropertyUrl = str
+ContinuationToken = str
 
 
-@dataclass(unsafe_hash=True)
-class Entity:
+_ENTITY_FIELD_NAMES: dict[type, dict] = {}
+
+
+class FieldDict(dict):
+    """
+    a view of the fields of a slotted entity, values are read from the entity and items set on it are set on the entity.
+    the dict itself only holds the field names so that C code sizing or iterating it sees the fields
+    """
+    __slots__ = ('__entity',)
+
+    def __init__(self, entity: 'SlottedEntity', field_names: dict):
+        dict.__init__(self, field_names)
+        self.__entity = entity
+
+    def __iter__(self):
+        # overridden so that dict() and ** read the values through __getitem__ instead of the stored names
+        return dict.__iter__(self)
+
+    def __getitem__(self, key):
+        if not dict.__contains__(self, key):
+            raise KeyError(key)
+        return getattr(self.__entity, key)
+
+    def __setitem__(self, key, value):
+        setattr(self.__entity, key, value)
+
+    def __eq__(self, other):
+        return dict(self.items()) == other
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+    def get(self, key, default=None):
+        return self[key] if dict.__contains__(self, key) else default
+
+    def items(self):
+        return [(key, getattr(self.__entity, key)) for key in self.keys()]
+
+    def values(self):
+        return [getattr(self.__entity, key) for key in self.keys()]
+
+    def copy(self) -> dict:
+        return dict(self.items())
+
+    def __reduce__(self):
+        return dict, (self.copy(),)
+
+
+class SlottedEntity:
+    """
+    entities keep their fields in slots, a group read with thousands of properties allocates no dict per property.
+    ObjectMapper reads and writes objects through __dict__, so a view of the fields stands in for it
+    """
+    __slots__ = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # dataclass(slots=True) on python 3.10 copies the __weakref__ descriptor of the class it replaces
+        if '__slots__' in cls.__dict__ and '__weakref__' in cls.__dict__:
+            delattr(cls, '__weakref__')
+
+    @property
+    def __dict__(self) -> dict:
+        # ObjectMapper reads __dict__ once per field it sets, the field names are looked up once per class
+        try:
+            field_names = _ENTITY_FIELD_NAMES[type(self)]
+        except KeyError:
+            field_names = _ENTITY_FIELD_NAMES[type(self)] = dict.fromkeys(entity_field.name
+                                                                          for entity_field in fields(self))
+        return FieldDict(self, field_names)
+
+
+@dataclass(unsafe_hash=True, slots=True)
+class Entity(SlottedEntity):
     etag: str = None
     partition_key: str = None
 
 
-@dataclass(unsafe_hash=True)
+@dataclass(unsafe_hash=True, slots=True)
 class Property(Entity):
     id: str = field(default_factory=uuid4_str)
     url: str = None
@@ -37,14 +113,14 @@ class Property(Entity):
     added_by: str = None
 
 
-@dataclass(unsafe_hash=True)
+@dataclass(unsafe_hash=True, slots=True)
 class UserGroups(Entity):
     id: GroupParticipantName = None
     name: str = None
     groups: list[GroupId] = field(default_factory=lambda: [])
 
 
-@dataclass(unsafe_hash=True)
+@dataclass(unsafe_hash=True, slots=True)
 class Group(Entity):
     id: str = field(default_factory=uuid4_str)
     participants: list[GroupParticipantName] = field(default_factory=lambda: [])
@@ -52,7 +128,7 @@ class Group(Entity):
     locations: list[str] = field(default_factory=lambda: [])
 
 
-@dataclass(unsafe_hash=True)
+@dataclass(unsafe_hash=True, slots=True)
 class AnonymousRedFlag(Entity):
     """
     response model to anonymize the other voters
@@ -65,16 +141,17 @@ class AnonymousRedFlag(Entity):
     date: datetime = None
 
 
-@dataclass(unsafe_hash=True)
+@dataclass(unsafe_hash=True, slots=True)
 class RedFlag(Entity):
     id: str = field(default_factory=uuid4_str)
     body: str = None
     property_url: str = None
-    votes: list[UserId] = field(default_factory=lambda: [])
+    votes: set[UserId] = field(default_factory=set)
+    vote_count: int = None
     date: datetime = None
 
 
-@dataclass(unsafe_hash=True)
+@dataclass(unsafe_hash=True, slots=True)
 class GroupProperties(Group):
     properties: list[Property] = field(default_factory=lambda: [])
 
@@ -92,12 +169,43 @@ class CreatePropertyRequest:
     url: str = None
 
 
+@dataclass(unsafe_hash=True)
+class CreatePropertiesRequest:
+    properties: list[CreatePropertyRequest] = field(default_factory=lambda: [])
+
+
 @dataclass(unsafe_hash=True)
 class CreateRedFlagRequest:
     body: str = None
     property_url: str = None
 
 
+@dataclass(unsafe_hash=True)
+class RedFlagsLookupRequest:
+    property_urls: list[PropertyUrl] = field(default_factory=lambda: [])
+
+
+@dataclass(unsafe_hash=True)
+class PageRequest:
+    limit: int = None
+    continuation_token: ContinuationToken = None
+
+
+class IUnitOfWork(Protocol):
+    def commit(self) -> None:
+        ...
+
+
+class IConflictRetryPolicy(Protocol):
+    def retrying(self, name: str, sequence: list[SequenceComponent]) -> Command:
+        ...
+
+
+class IUnitOfWorkFactory(Protocol):
+    def begin_unit_of_work(self) -> IUnitOfWork:
+        ...
+
+
 class IGroupRepo(Protocol):
     def create(self, group: Group) -> None:
         ...
@@ -108,10 +216,23 @@ class IGroupRepo(Protocol):
     def get(self, _id: str) -> GroupProperties:
         ...
 
-    def add_participant(self, participant: GroupParticipantName, group: Group) -> None:
+    def get_metadata(self, _id: str) -> Group:
         ...
 
-    def remove_participant(self, participant: GroupParticipantName, group: Group) -> None:
+    def get_many(self, ids: list[GroupId]) -> list[GroupProperties]:
+        ...
+
+    def get_page(self, _id: str,
+                 limit: int = None,
+                 continuation_token: ContinuationToken = None) -> tuple[GroupProperties, ContinuationToken]:
+        ...
+
+    def add_participant(self, participant: GroupParticipantName, group: Group,
+                        unit_of_work: IUnitOfWork = None) -> None:
+        ...
+
+    def remove_participant(self, participant: GroupParticipantName, group: Group,
+                           unit_of_work: IUnitOfWork = None) -> None:
         ...
 
 
@@ -119,18 +240,21 @@ class IPropertyRepo(Protocol):
     def create(self, group_id: GroupId, property: Property) -> None:
         ...
 
+    def create_many(self, group_id: GroupId, properties: list[Property]) -> None:
+        ...
+
     def delete(self, group_id: GroupId, property_id: PropertyId) -> None:
         ...
 
 
 class IUserGroupsRepo(Protocol):
-    def create(self, user_groups: UserGroups) -> None:
+    def create(self, user_groups: UserGroups, unit_of_work: IUnitOfWork = None) -> None:
         ...
 
-    def add_group(self, user_groups: UserGroups, group: GroupId) -> None:
+    def add_group(self, user_groups: UserGroups, group: GroupId, unit_of_work: IUnitOfWork = None) -> None:
         ...
 
-    def remove_group(self, user_groups: UserGroups, group: GroupId) -> None:
+    def remove_group(self, user_groups: UserGroups, group: GroupId, unit_of_work: IUnitOfWork = None) -> None:
         ...
 
     def get(self, _id: str) -> UserGroups:
@@ -142,10 +266,28 @@ class IRedFlagRepo(Protocol):
     def create(self, red_flag: RedFlag) -> None:
         ...
 
-    def get_by_url(self, property_url: PropertyUrl) -> list[RedFlag]:
+    def get_by_url(self, property_url: PropertyUrl, requested_property_url: PropertyUrl = None) -> list[RedFlag]:
+        ...
+
+    def get_listed_by_urls(self, property_urls: list[PropertyUrl],
+                           requested_property_urls: dict[PropertyUrl, list[PropertyUrl]] = None
+                           ) -> dict[PropertyUrl, list[RedFlag]]:
         ...
 
-    def get(self, property_url: PropertyUrl, _id: RedFlagId) -> RedFlag:
+    def get_page_by_url(self, property_url: PropertyUrl,
+                        limit: int = None,
+                        continuation_token: ContinuationToken = None,
+                        requested_property_url: PropertyUrl = None) -> tuple[list[RedFlag], ContinuationToken]:
+        ...
+
+    def get(self, property_url: PropertyUrl, _id: RedFlagId, requested_property_url: PropertyUrl = None) -> RedFlag:
+        ...
+
+    def get_voted_ids(self, user_id: UserId, property_url: PropertyUrl) -> set[RedFlagId]:
+        ...
+
+    def get_voted_ids_by_urls(self, user_id: UserId,
+                              property_urls: list[PropertyUrl]) -> dict[PropertyUrl, set[RedFlagId]]:
         ...
 
     def add_voter(self, user_id: UserId, red_flag: RedFlag) -> None:
@@ -191,6 +333,18 @@ class IFetchGroupByIdCommand(Command, Protocol):
     pass
 
 
+class IFetchGroupMetadataByIdCommand(Command, Protocol):
+    pass
+
+
+class IFetchGroupPageByIdCommand(Command, Protocol):
+    pass
+
+
+class IValidatePageRequestCommand(Command, Protocol):
+    pass
+
+
 class ISetPropertyRequestCommand(Command, Protocol):
     pass
 
@@ -203,6 +357,18 @@ class ICreatePropertyCommand(Command, Protocol):
     pass
 
 
+class ISetPropertiesRequestCommand(Command, Protocol):
+    pass
+
+
+class IValidatePropertiesRequestCommand(Command, Protocol):
+    pass
+
+
+class ICreatePropertiesCommand(Command, Protocol):
+    pass
+
+
 class IDeletePropertyCommand(Command, Protocol):
     pass
 
@@ -255,6 +421,22 @@ class ISetAnonymousRedFlagsCommand(Command, Protocol):
     pass
 
 
+class ISetRedFlagsLookupRequestCommand(Command, Protocol):
+    pass
+
+
+class IValidateRedFlagsLookupRequestCommand(Command, Protocol):
+    pass
+
+
+class IGetRedFlagsByUrlsCommand(Command, Protocol):
+    pass
+
+
+class ISetAnonymousRedFlagsByUrlCommand(Command, Protocol):
+    pass
+
+
 class IGetRedFlagByIdCommand(Command, Protocol):
     pass
 
@@ -291,6 +473,14 @@ class IRemoveGroupFromUserGroupsCommand(Command, Protocol):
     pass
 
 
+class IBeginUnitOfWorkCommand(Command, Protocol):
+    pass
+
+
+class ICommitUnitOfWorkCommand(Command, Protocol):
+    pass
+
+
 class IGetCodeForGroupSequenceBuilder(SequenceBuilder, Protocol):
     pass
 
@@ -311,10 +501,22 @@ class IGetUserGroupByIdSequenceBuilder(SequenceBuilder, Protocol):
     pass
 
 
+class IGetUserGroupMetadataByIdSequenceBuilder(SequenceBuilder, Protocol):
+    pass
+
+
+class IGetUserGroupPageByIdSequenceBuilder(SequenceBuilder, Protocol):
+    pass
+
+
 class ICreatePropertySequenceBuilder(SequenceBuilder, Protocol):
     pass
 
 
+class ICreatePropertiesSequenceBuilder(SequenceBuilder, Protocol):
+    pass
+
+
 class IDeletePropertySequenceBuilder(SequenceBuilder, Protocol):
     pass
 
@@ -335,6 +537,10 @@ class IGetRedFlagsSequenceBuilder(SequenceBuilder, Protocol):
     pass
 
 
+class ILookupRedFlagsSequenceBuilder(SequenceBuilder, Protocol):
+    pass
+
+
 class ICreateVoteForRedFlagSequenceBuilder(SequenceBuilder, Protocol):
     pass
 
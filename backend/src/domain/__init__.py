@@ -1,14 +1,30 @@
 UPSERT_GROUP_REQUEST = "upsert_group_request"
 CREATE_PROPERTY_REQUEST = "create_property_request"
+CREATE_PROPERTIES_REQUEST = "create_properties_request"
+PROPERTY_REQUEST_ERRORS = "property_request_errors"
 CREATE_RED_FLAG_REQUEST = "create_red_flag_request"
 USER_GROUPS = "user_groups"
 GROUP = "group"
 RED_FLAG = "red_flag"
 RED_FLAGS = "red_flags"
+VOTED_RED_FLAG_IDS = "voted_red_flag_ids"
+RED_FLAGS_LOOKUP_REQUEST = "red_flags_lookup_request"
+RED_FLAGS_BY_URL = "red_flags_by_url"
+VOTED_RED_FLAG_IDS_BY_URL = "voted_red_flag_ids_by_url"
 CODE = "code"
 USER_BELONGS_TO_AT_LEAST_ONE_GROUP = "user_belongs_to_at_least_one_group"
 GROUP_ID = "group_id"
 PROPERTY_ID = "property_id"
 RED_FLAG_ID = "red_flag_id"
 FULLNAME_CLAIM = "fullname_claim"
-PROPERTY_URL = "property_url"
\ No newline at end of file
+NAME_JWT_CLAIM = "name"
+JWT_CLAIMS = "jwt_claims"
+ROUTE_KEY = "route_key"
+PROPERTY_URL = "property_url"
+REQUESTED_PROPERTY_URL = "requested_property_url"
+REQUESTED_PROPERTY_URLS = "requested_property_urls"
+LIMIT = "limit"
+CONTINUATION_TOKEN = "continuation_token"
+NEXT_CONTINUATION_TOKEN = "next_continuation_token"
+PAGE_REQUEST = "page_request"
+UNIT_OF_WORK = "unit_of_work"
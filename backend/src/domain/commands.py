@@ -1,27 +1,37 @@
 import os
 
 import formula_thoughts_web.crosscutting
-from formula_thoughts_web.abstractions import ApplicationContext, Logger
+from formula_thoughts_web.abstractions import ApplicationContext, Logger, Error
 from formula_thoughts_web.crosscutting import ObjectMapper, base64decode, base64encode
 
 from src.core import UpsertGroupRequest, Group, IGroupRepo, IUserGroupsRepo, UserGroups, CreatePropertyRequest, \
-    Property, GroupProperties, IPropertyRepo, IRedFlagRepo, RedFlag, CreateRedFlagRequest
+    Property, GroupProperties, IPropertyRepo, IRedFlagRepo, RedFlag, CreateRedFlagRequest, PageRequest, RedFlagId, \
+    CreatePropertiesRequest, RedFlagsLookupRequest, PropertyUrl, IUnitOfWorkFactory, IUnitOfWork
 from src.infra import CognitoClientWrapper, get_absolute_url
+from src.infra.cache import NameClaimCache
 from src.domain import UPSERT_GROUP_REQUEST, GROUP_ID, USER_GROUPS, USER_BELONGS_TO_AT_LEAST_ONE_GROUP, GROUP, \
-    CREATE_PROPERTY_REQUEST, PROPERTY_ID, CODE, FULLNAME_CLAIM, RED_FLAG, CREATE_RED_FLAG_REQUEST, PROPERTY_URL, \
-    RED_FLAGS, RED_FLAG_ID
+    CREATE_PROPERTY_REQUEST, PROPERTY_ID, CODE, FULLNAME_CLAIM, NAME_JWT_CLAIM, RED_FLAG, CREATE_RED_FLAG_REQUEST, PROPERTY_URL, \
+    RED_FLAGS, VOTED_RED_FLAG_IDS, RED_FLAG_ID, LIMIT, CONTINUATION_TOKEN, PAGE_REQUEST, NEXT_CONTINUATION_TOKEN, \
+    CREATE_PROPERTIES_REQUEST, PROPERTY_REQUEST_ERRORS, RED_FLAGS_LOOKUP_REQUEST, RED_FLAGS_BY_URL, \
+    VOTED_RED_FLAG_IDS_BY_URL, UNIT_OF_WORK, JWT_CLAIMS, REQUESTED_PROPERTY_URL, REQUESTED_PROPERTY_URLS
 from src.domain.errors import invalid_price_error, UserGroupsNotFoundError, GroupNotFoundError, \
     PropertyNotFoundError, \
     code_required_error, user_already_part_of_group_error, \
-    property_price_required_error, property_url_required_error, property_title_required_error, \
     red_flag_body_required_error, red_flag_property_url_required_error, red_flag_property_url_param_required_error, \
-    RedFlagNotFoundError, user_has_not_voted_error, user_has_already_voted_error, user_not_part_of_group_error
-from src.domain.helpers import RedFlagMappingHelper
+    RedFlagNotFoundError, user_has_not_voted_error, user_has_already_voted_error, user_not_part_of_group_error, \
+    page_limit_invalid_error, continuation_token_invalid_error, property_batch_size_error, \
+    red_flag_property_urls_invalid_error
+from src.domain.helpers import RedFlagMappingHelper, validate_property_request
 from src.domain.responses import CreatedGroupResponse, ListUserGroupsResponse, SingleGroupResponse, \
     GetGroupCodeResponse, SingleGroupPropertiesResponse, PropertyCreatedResponse, CreatedRedFlagResponse, \
-    ListRedFlagsResponse, SingleRedFlagResponse
+    ListRedFlagsResponse, SingleRedFlagResponse, RejectedPropertyResult, PropertiesBatchCreatedResponse, \
+    PropertyRedFlags, RedFlagsByUrlResponse
 from src.exceptions import UserGroupsNotFoundException, GroupNotFoundException, PropertyNotFoundException, \
-    RedFlagNotFoundException
+    RedFlagNotFoundException, InvalidContinuationTokenException
+
+MAX_PAGE_LIMIT = 100
+MAX_PROPERTY_BATCH_SIZE = 100
+MAX_RED_FLAGS_LOOKUP_URLS = 100
 
 
 class SetGroupRequestCommand:
@@ -64,9 +74,7 @@ class FetchUserGroupsCommand:
     def run(self, context: ApplicationContext) -> None:
         try:
             user_groups = self.__user_group_repo.get(_id=context.auth_user_id)
-            groups = []
-            for group_id in user_groups.groups:
-                groups.append(self.__group_repo.get(_id=group_id))
+            groups = self.__group_repo.get_many(ids=user_groups.groups)
             context.response = ListUserGroupsResponse(group_properties_list=groups)
             context.set_var(USER_GROUPS, groups)
         except UserGroupsNotFoundException:
@@ -116,6 +124,63 @@ class FetchGroupByIdCommand:
             context.error_capsules.append(GroupNotFoundError(message=f"group {group_id} not found"))
 
 
+class FetchGroupMetadataByIdCommand:
+    """
+    fetches the group without its properties, for sequences that do not respond with them
+    """
+
+    def __init__(self, group_repo: IGroupRepo):
+        self.__group_repo = group_repo
+
+    def run(self, context: ApplicationContext):
+        group_id = context.get_var(name=GROUP_ID, _type=str)
+        try:
+            context.set_var(GROUP, self.__group_repo.get_metadata(_id=group_id))
+        except GroupNotFoundException:
+            context.error_capsules.append(GroupNotFoundError(message=f"group {group_id} not found"))
+
+
+class FetchGroupPageByIdCommand:
+
+    def __init__(self, group_repo: IGroupRepo):
+        self.__group_repo = group_repo
+
+    def run(self, context: ApplicationContext):
+        group_id = context.get_var(name=GROUP_ID, _type=str)
+        page_request = context.get_var(name=PAGE_REQUEST, _type=PageRequest)
+        try:
+            group, continuation_token = self.__group_repo.get_page(_id=group_id,
+                                                                   limit=page_request.limit,
+                                                                   continuation_token=page_request.continuation_token)
+            context.set_var(GROUP, group)
+            context.response = SingleGroupPropertiesResponse(group_properties=group,
+                                                             continuation_token=continuation_token)
+        except GroupNotFoundException:
+            context.error_capsules.append(GroupNotFoundError(message=f"group {group_id} not found"))
+        except InvalidContinuationTokenException:
+            context.error_capsules.append(continuation_token_invalid_error)
+
+
+class ValidatePageRequestCommand:
+
+    def run(self, context: ApplicationContext):
+        limit = None
+        if LIMIT in context.variables:
+            try:
+                limit = int(context.get_var(name=LIMIT, _type=str))
+            except ValueError:
+                context.error_capsules.append(page_limit_invalid_error)
+                return
+            if limit < 1 or limit > MAX_PAGE_LIMIT:
+                context.error_capsules.append(page_limit_invalid_error)
+                return
+        continuation_token = None
+        if CONTINUATION_TOKEN in context.variables:
+            continuation_token = context.get_var(name=CONTINUATION_TOKEN, _type=str)
+        context.set_var(name=PAGE_REQUEST, value=PageRequest(limit=limit,
+                                                             continuation_token=continuation_token))
+
+
 class SetPropertyRequestCommand:
 
     def __init__(self, object_mapper: ObjectMapper,
@@ -154,17 +219,69 @@ class ValidatePropertyRequestCommand:
 
     def run(self, context: ApplicationContext):
         create_property_request = context.get_var(name=CREATE_PROPERTY_REQUEST, _type=CreatePropertyRequest)
+        context.error_capsules.extend(validate_property_request(create_property_request))
 
-        if create_property_request.price is None:
-            context.error_capsules.append(property_price_required_error)
-        elif create_property_request.price <= 0:
-            context.error_capsules.append(invalid_price_error)
 
-        if create_property_request.url is None:
-            context.error_capsules.append(property_url_required_error)
+class SetPropertiesRequestCommand:
+
+    def __init__(self, object_mapper: ObjectMapper,
+                 logger: Logger):
+        self.__logger = logger
+        self.__object_mapper = object_mapper
+
+    def run(self, context: ApplicationContext):
+        properties = context.body.get("properties", [])
+        # the object mapper fails on properties that are not a list of objects, they are left for validation
+        if isinstance(properties, list) and all(isinstance(property_request, dict) for property_request in properties):
+            request = self.__object_mapper.map_from_dict(_from=context.body, to=CreatePropertiesRequest)
+        else:
+            request = CreatePropertiesRequest(properties=properties)
+        context.set_var(CREATE_PROPERTIES_REQUEST, request)
+        self.__logger.add_global_properties(properties={
+            "property_count": len(request.properties) if isinstance(request.properties, list) else None
+        })
+
+
+class ValidatePropertiesRequestCommand:
+    """
+    rejects the whole batch only when its size is out of bounds, invalid listings are reported per item
+    """
+
+    def run(self, context: ApplicationContext):
+        request = context.get_var(name=CREATE_PROPERTIES_REQUEST, _type=CreatePropertiesRequest)
+        if not isinstance(request.properties, list) \
+                or len(request.properties) < 1 or len(request.properties) > MAX_PROPERTY_BATCH_SIZE \
+                or not all(isinstance(property_request, CreatePropertyRequest)
+                           for property_request in request.properties):
+            context.error_capsules.append(property_batch_size_error)
+            return
+        context.set_var(PROPERTY_REQUEST_ERRORS, [validate_property_request(property_request)
+                                                  for property_request in request.properties])
+
+
+class CreatePropertiesCommand:
+
+    def __init__(self, property_repo: IPropertyRepo):
+        self.__property_repo = property_repo
 
-        if create_property_request.title is None:
-            context.error_capsules.append(property_title_required_error)
+    def run(self, context: ApplicationContext):
+        group = context.get_var(name=GROUP, _type=Group)
+        user_groups = context.get_var(name=USER_GROUPS, _type=UserGroups)
+        request = context.get_var(name=CREATE_PROPERTIES_REQUEST, _type=CreatePropertiesRequest)
+        property_request_errors = context.get_var(name=PROPERTY_REQUEST_ERRORS, _type=list[list[Error]])
+        response = PropertiesBatchCreatedResponse()
+        for index, (property_request, errors) in enumerate(zip(request.properties, property_request_errors)):
+            if len(errors) > 0:
+                response.rejected.append(RejectedPropertyResult(index=index,
+                                                                errors=[error.message for error in errors]))
+                continue
+            response.properties.append(Property(url=property_request.url,
+                                                title=property_request.title,
+                                                price=property_request.price,
+                                                added_by=user_groups.name))
+        if len(response.properties) > 0:
+            self.__property_repo.create_many(group_id=group.id, properties=response.properties)
+        context.response = response
 
 
 class DeletePropertyCommand:
@@ -189,14 +306,15 @@ class AddCurrentUserToGroupCommand:
 
     def run(self, context: ApplicationContext):
         fullname = context.get_var(name=FULLNAME_CLAIM, _type=str)
-        group_properties = context.get_var(name=GROUP, _type=GroupProperties)
-        group = Group(etag=group_properties.etag,
-                      partition_key=group_properties.partition_key,
-                      id=group_properties.id,
-                      participants=group_properties.participants,
-                      price_limit=group_properties.price_limit,
-                      locations=group_properties.locations)
-        self.__group_repo.add_participant(participant=fullname, group=group)
+        group_from_store = context.get_var(name=GROUP, _type=Group)
+        group = Group(etag=group_from_store.etag,
+                      partition_key=group_from_store.partition_key,
+                      id=group_from_store.id,
+                      participants=group_from_store.participants,
+                      price_limit=group_from_store.price_limit,
+                      locations=group_from_store.locations)
+        self.__group_repo.add_participant(participant=fullname, group=group,
+                                          unit_of_work=context.variables.get(UNIT_OF_WORK))
         context.response = SingleGroupResponse(group=group)
 
 
@@ -243,9 +361,14 @@ class CreateGroupCommand:
 
 
 class FetchAuthUserClaimsIfUserDoesNotExistCommand:
+    """
+    with NAME_CLAIM_SOURCE=jwt the name is read from the token claims, cognito is only asked when the token has none
+    """
 
-    def __init__(self, cognito_wrapper: CognitoClientWrapper):
+    def __init__(self, cognito_wrapper: CognitoClientWrapper,
+                 name_claim_cache: NameClaimCache):
         self.__cognito_wrapper = cognito_wrapper
+        self.__name_claim_cache = name_claim_cache
 
     def run(self, context: ApplicationContext):
         is_user_part_of_at_least_one_group = context.get_var(name=USER_BELONGS_TO_AT_LEAST_ONE_GROUP, _type=str)
@@ -254,11 +377,19 @@ class FetchAuthUserClaimsIfUserDoesNotExistCommand:
                             value=context.get_var(name=USER_GROUPS, _type=UserGroups).name)
             return
 
-        user = self.__cognito_wrapper.admin_get_user(user_pool_id=os.environ["USER_POOL_ID"],
-                                                     username=context.auth_user_id)
+        name = context.variables.get(JWT_CLAIMS, {}).get(NAME_JWT_CLAIM)
+        if os.environ.get("NAME_CLAIM_SOURCE") == "jwt" and name is not None:
+            context.set_var(name=FULLNAME_CLAIM, value=name)
+            return
+
+        name = self.__name_claim_cache.get(context.auth_user_id)
+        if name is None:
+            user = self.__cognito_wrapper.admin_get_user(user_pool_id=os.environ["USER_POOL_ID"],
+                                                         username=context.auth_user_id)
+            name = list(filter(lambda x: x['Name'] == "name", user['UserAttributes']))[0]['Value']
+            self.__name_claim_cache.set(context.auth_user_id, name)
 
-        context.set_var(name=FULLNAME_CLAIM,
-                        value=list(filter(lambda x: x['Name'] == "name", user['UserAttributes']))[0]['Value'])
+        context.set_var(name=FULLNAME_CLAIM, value=name)
 
 
 class CreateUserGroupsCommand:
@@ -271,12 +402,14 @@ class CreateUserGroupsCommand:
         user_group_id = context.get_var(GROUP_ID, str)
         if user_group_exists:
             current_user_groups = context.get_var(name=USER_GROUPS, _type=UserGroups)
-            self.__user_groups_repo.add_group(user_groups=current_user_groups, group=user_group_id)
+            self.__user_groups_repo.add_group(user_groups=current_user_groups, group=user_group_id,
+                                              unit_of_work=context.variables.get(UNIT_OF_WORK))
         else:
             user_groups = UserGroups(id=context.auth_user_id,
                                      groups=[user_group_id])
             user_groups.name = context.get_var(name=FULLNAME_CLAIM, _type=str)
-            self.__user_groups_repo.create(user_groups=user_groups)
+            self.__user_groups_repo.create(user_groups=user_groups,
+                                           unit_of_work=context.variables.get(UNIT_OF_WORK))
             context.set_var(name=USER_GROUPS, value=user_groups)
 
 
@@ -287,7 +420,7 @@ class UpdateGroupCommand:
 
     def run(self, context: ApplicationContext) -> None:
         group_request = context.get_var(UPSERT_GROUP_REQUEST, UpsertGroupRequest)
-        group_from_store = context.get_var(GROUP, GroupProperties)
+        group_from_store = context.get_var(GROUP, Group)
         group_to_update = Group(id=group_from_store.id,
                                 etag=group_from_store.etag,
                                 partition_key=group_from_store.partition_key,
@@ -364,8 +497,20 @@ class GetRedFlagsCommand:
 
     def run(self, context: ApplicationContext) -> None:
         property_url = context.get_var(name=PROPERTY_URL, _type=str)
-        red_flags = self.__red_flag_repo.get_by_url(property_url=property_url)
-        context.set_var(name=RED_FLAGS, value=red_flags)
+        page_request = context.get_var(name=PAGE_REQUEST, _type=PageRequest)
+        try:
+            red_flags, continuation_token = self.__red_flag_repo.get_page_by_url(
+                property_url=property_url,
+                limit=page_request.limit,
+                continuation_token=page_request.continuation_token,
+                requested_property_url=context.variables.get(REQUESTED_PROPERTY_URL))
+            context.set_var(name=RED_FLAGS, value=red_flags)
+            context.set_var(name=NEXT_CONTINUATION_TOKEN, value=continuation_token)
+            context.set_var(name=VOTED_RED_FLAG_IDS,
+                            value=self.__red_flag_repo.get_voted_ids(user_id=context.auth_user_id,
+                                                                     property_url=property_url))
+        except InvalidContinuationTokenException:
+            context.error_capsules.append(continuation_token_invalid_error)
 
 
 class ValidatePropertyUrlCommand:
@@ -375,7 +520,9 @@ class ValidatePropertyUrlCommand:
             context.error_capsules.append(red_flag_property_url_param_required_error)
             return
 
-        context.set_var(name=PROPERTY_URL, value=get_absolute_url(context.get_var(name=PROPERTY_URL, _type=str)))
+        property_url = context.get_var(name=PROPERTY_URL, _type=str)
+        context.set_var(name=REQUESTED_PROPERTY_URL, value=property_url)
+        context.set_var(name=PROPERTY_URL, value=get_absolute_url(property_url))
 
 
 class SetAnonymousRedFlagsCommand:
@@ -385,11 +532,84 @@ class SetAnonymousRedFlagsCommand:
 
     def run(self, context: ApplicationContext) -> None:
         red_flags = context.get_var(name=RED_FLAGS, _type=list[RedFlag])
+        voted_red_flag_ids = context.get_var(name=VOTED_RED_FLAG_IDS, _type=set[RedFlagId])
         anonymous_red_flags = []
         for red_flag in red_flags:
-            anonymous_red_flags.append(self.__red_flag_mapping_helper.map_to_anonymous(current_user=context.auth_user_id,
-                                                                                       red_flag=red_flag))
-        context.response = ListRedFlagsResponse(red_flags=anonymous_red_flags)
+            anonymous_red_flags.append(self.__red_flag_mapping_helper.map_listed_to_anonymous(
+                red_flag=red_flag,
+                voted_by_me=red_flag.id in voted_red_flag_ids))
+        context.response = ListRedFlagsResponse(red_flags=anonymous_red_flags,
+                                                continuation_token=context.get_var(name=NEXT_CONTINUATION_TOKEN,
+                                                                                   _type=str))
+
+
+class SetRedFlagsLookupRequestCommand:
+
+    def __init__(self, object_mapper: ObjectMapper,
+                 logger: Logger):
+        self.__logger = logger
+        self.__object_mapper = object_mapper
+
+    def run(self, context: ApplicationContext) -> None:
+        request = self.__object_mapper.map_from_dict(_from=context.body, to=RedFlagsLookupRequest)
+        context.set_var(RED_FLAGS_LOOKUP_REQUEST, request)
+        self.__logger.add_global_properties(properties={
+            "property_url_count": len(request.property_urls) if isinstance(request.property_urls, list) else None
+        })
+
+
+class ValidateRedFlagsLookupRequestCommand:
+    """
+    normalizes the urls like ValidatePropertyUrlCommand does, urls normalizing to the same url are looked up once.
+    the urls as requested are kept by normalized url for legacy red flags keyed by them
+    """
+
+    def run(self, context: ApplicationContext) -> None:
+        request = context.get_var(name=RED_FLAGS_LOOKUP_REQUEST, _type=RedFlagsLookupRequest)
+        if not isinstance(request.property_urls, list) \
+                or len(request.property_urls) < 1 or len(request.property_urls) > MAX_RED_FLAGS_LOOKUP_URLS \
+                or not all(isinstance(property_url, str) and property_url for property_url in request.property_urls):
+            context.error_capsules.append(red_flag_property_urls_invalid_error)
+            return
+        requested_property_urls = {}
+        for property_url in request.property_urls:
+            requested_property_urls.setdefault(get_absolute_url(property_url), []).append(property_url)
+        request.property_urls = list(requested_property_urls)
+        context.set_var(name=REQUESTED_PROPERTY_URLS, value=requested_property_urls)
+
+
+class GetRedFlagsByUrlsCommand:
+
+    def __init__(self, red_flag_repo: IRedFlagRepo):
+        self.__red_flag_repo = red_flag_repo
+
+    def run(self, context: ApplicationContext) -> None:
+        property_urls = context.get_var(name=RED_FLAGS_LOOKUP_REQUEST, _type=RedFlagsLookupRequest).property_urls
+        context.set_var(name=RED_FLAGS_BY_URL,
+                        value=self.__red_flag_repo.get_listed_by_urls(
+                            property_urls=property_urls,
+                            requested_property_urls=context.variables.get(REQUESTED_PROPERTY_URLS)))
+        context.set_var(name=VOTED_RED_FLAG_IDS_BY_URL,
+                        value=self.__red_flag_repo.get_voted_ids_by_urls(user_id=context.auth_user_id,
+                                                                         property_urls=property_urls))
+
+
+class SetAnonymousRedFlagsByUrlCommand:
+
+    def __init__(self, red_flag_mapping_helper: RedFlagMappingHelper):
+        self.__red_flag_mapping_helper = red_flag_mapping_helper
+
+    def run(self, context: ApplicationContext) -> None:
+        red_flags_by_url = context.get_var(name=RED_FLAGS_BY_URL, _type=dict[PropertyUrl, list[RedFlag]])
+        voted_ids_by_url = context.get_var(name=VOTED_RED_FLAG_IDS_BY_URL, _type=dict[PropertyUrl, set[RedFlagId]])
+        response = RedFlagsByUrlResponse()
+        for property_url, red_flags in red_flags_by_url.items():
+            response.property_red_flags.append(PropertyRedFlags(property_url=property_url, red_flags=[
+                self.__red_flag_mapping_helper.map_listed_to_anonymous(
+                    red_flag=red_flag,
+                    voted_by_me=red_flag.id in voted_ids_by_url[property_url])
+                for red_flag in red_flags]))
+        context.response = response
 
 
 class GetRedFlagByIdCommand:
@@ -401,7 +621,8 @@ class GetRedFlagByIdCommand:
         _id = context.get_var(name=RED_FLAG_ID, _type=str)
         property_url = context.get_var(name=PROPERTY_URL, _type=str)
         try:
-            red_flag = self.__red_flag_repo.get(property_url=property_url, _id=_id)
+            red_flag = self.__red_flag_repo.get(property_url=property_url, _id=_id,
+                                                requested_property_url=context.variables.get(REQUESTED_PROPERTY_URL))
             context.set_var(name=RED_FLAG, value=red_flag)
         except RedFlagNotFoundException:
             context.error_capsules.append(RedFlagNotFoundError(message=f"red flag {property_url}:{_id} not found"))
@@ -475,7 +696,8 @@ class RemoveParticipantFromGroupCommand:
     def run(self, context: ApplicationContext):
         fullname = context.get_var(name=FULLNAME_CLAIM, _type=str)
         group_properties = context.get_var(name=GROUP, _type=GroupProperties)
-        self.__group_repo.remove_participant(participant=fullname, group=group_properties)
+        self.__group_repo.remove_participant(participant=fullname, group=group_properties,
+                                             unit_of_work=context.variables.get(UNIT_OF_WORK))
         context.response = SingleGroupPropertiesResponse(group_properties=group_properties)
 
 
@@ -487,4 +709,23 @@ class RemoveGroupFromUserGroupsCommand:
     def run(self, context: ApplicationContext):
         user_groups = context.get_var(name=USER_GROUPS, _type=UserGroups)
         group_id = context.get_var(name=GROUP_ID, _type=str)
-        self.__user_groups_repo.remove_group(user_groups=user_groups, group=group_id)
\ No newline at end of file
+        self.__user_groups_repo.remove_group(user_groups=user_groups, group=group_id,
+                                             unit_of_work=context.variables.get(UNIT_OF_WORK))
+
+
+class BeginUnitOfWorkCommand:
+    """
+    writes of the following commands are staged on the unit of work until CommitUnitOfWorkCommand runs
+    """
+
+    def __init__(self, unit_of_work_factory: IUnitOfWorkFactory):
+        self.__unit_of_work_factory = unit_of_work_factory
+
+    def run(self, context: ApplicationContext):
+        context.set_var(name=UNIT_OF_WORK, value=self.__unit_of_work_factory.begin_unit_of_work())
+
+
+class CommitUnitOfWorkCommand:
+
+    def run(self, context: ApplicationContext):
+        context.get_var(name=UNIT_OF_WORK, _type=IUnitOfWork).commit()
@@ -33,6 +33,14 @@ class InvalidVotingStatusError(Error):
     ...
 
 
+class InvalidPageRequestError(Error):
+    ...
+
+
+class ConcurrentUpdateError(Error):
+    ...
+
+
 current_user_already_added_to_group = InvalidGroupDataError(message="current user already added to group")
 
 invalid_price_error = InvalidGroupDataError(message="price has to be greater than 0")
@@ -43,6 +51,8 @@ property_url_required_error = InvalidPropertyDataError(message="url field is a r
 
 property_title_required_error = InvalidPropertyDataError(message="title field is a required attribute")
 
+property_batch_size_error = InvalidPropertyDataError(message="properties field has to contain between 1 and 100 items")
+
 code_required_error = InvalidGroupDataError(message="code parameter is required from group invite")
 
 user_already_part_of_group_error = InvalidGroupDataError(message="user is already added to group")
@@ -55,6 +65,15 @@ red_flag_property_url_param_required_error = InvalidRedFlagDataError(message="pr
 
 red_flag_body_required_error = InvalidRedFlagDataError(message="body field is a required attribute")
 
+red_flag_property_urls_invalid_error = InvalidRedFlagDataError(
+    message="property urls field has to contain between 1 and 100 urls")
+
 user_has_already_voted_error = InvalidVotingStatusError(message="current user has already voted")
 
 user_has_not_voted_error = InvalidVotingStatusError(message="current user has not voted")
+
+page_limit_invalid_error = InvalidPageRequestError(message="limit parameter has to be a number between 1 and 100")
+
+continuation_token_invalid_error = InvalidPageRequestError(message="continuation token is invalid")
+
+concurrent_update_error = ConcurrentUpdateError(message="changed by another request too many times, try again")
@@ -1,4 +1,31 @@
-from src.core import RedFlag, AnonymousRedFlag, UserId
+from formula_thoughts_web.abstractions import Error
+
+from src.core import RedFlag, AnonymousRedFlag, UserId, CreatePropertyRequest
+from src.domain import ROUTE_KEY, GROUP_ID, RED_FLAG_ID
+from src.domain.errors import property_price_required_error, invalid_price_error, property_url_required_error, \
+    property_title_required_error
+
+
+def validate_property_request(request: CreatePropertyRequest) -> list[Error]:
+    errors = []
+    if request.price is None:
+        errors.append(property_price_required_error)
+    elif request.price <= 0:
+        errors.append(invalid_price_error)
+
+    if request.url is None:
+        errors.append(property_url_required_error)
+
+    if request.title is None:
+        errors.append(property_title_required_error)
+    return errors
+
+
+def request_properties(variables: dict) -> dict:
+    """
+    the route key and the group or red flag a request is for, to slice the events logged per request
+    """
+    return {name: variables[name] for name in [ROUTE_KEY, GROUP_ID, RED_FLAG_ID] if variables.get(name) is not None}
 
 
 class RedFlagMappingHelper:
@@ -14,3 +41,18 @@ class RedFlagMappingHelper:
             voted_by_me=current_user in red_flag.votes,
             date=red_flag.date
         )
+
+    def map_listed_to_anonymous(self, red_flag: RedFlag, voted_by_me: bool) -> AnonymousRedFlag:
+        """
+        listed red flags come without their voters, red flags whose votes were not migrated yet count as 0 votes
+        """
+        return AnonymousRedFlag(
+            etag=red_flag.etag,
+            partition_key=red_flag.partition_key,
+            id=red_flag.id,
+            body=red_flag.body,
+            property_url=red_flag.property_url,
+            votes=red_flag.vote_count or 0,
+            voted_by_me=voted_by_me,
+            date=red_flag.date
+        )
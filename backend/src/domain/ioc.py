@@ -1,3 +1,8 @@
+import os
+
+import punq
+from formula_thoughts_web.abstractions import Logger
+from formula_thoughts_web.application import TopLevelSequenceRunner, ErrorHandlingStrategyFactory
 from formula_thoughts_web.ioc import Container
 
 from src.core import ISetGroupRequestCommand, IValidateGroupCommand, IUpdateGroupSequenceBuilder, \
@@ -15,7 +20,12 @@ from src.core import ISetGroupRequestCommand, IValidateGroupCommand, IUpdateGrou
     IGetRedFlagByIdCommand, ISetAnonymousRedFlagCommand, ICreateVoteForRedFlagSequenceBuilder, \
     IDeleteVoteForRedFlagSequenceBuilder, IValidateAlreadyVotedCommand, IValidateNotVotedCommand, ICreateVoteCommand, \
     IDeleteVoteCommand, IValidateUserIsAlreadyParticipantCommand, IRemoveParticipantFromGroupCommand, \
-    IRemoveGroupFromUserGroupsCommand, IRemoveUserFromGroupSequenceBuilder
+    IRemoveGroupFromUserGroupsCommand, IRemoveUserFromGroupSequenceBuilder, IValidatePageRequestCommand, \
+    IFetchGroupPageByIdCommand, IGetUserGroupPageByIdSequenceBuilder, IFetchGroupMetadataByIdCommand, \
+    IGetUserGroupMetadataByIdSequenceBuilder, ISetPropertiesRequestCommand, IValidatePropertiesRequestCommand, \
+    ICreatePropertiesCommand, ICreatePropertiesSequenceBuilder, ISetRedFlagsLookupRequestCommand, \
+    IValidateRedFlagsLookupRequestCommand, IGetRedFlagsByUrlsCommand, ISetAnonymousRedFlagsByUrlCommand, \
+    ILookupRedFlagsSequenceBuilder, IBeginUnitOfWorkCommand, ICommitUnitOfWorkCommand, IConflictRetryPolicy
 from src.domain.commands import SetGroupRequestCommand, ValidateGroupCommand, \
     FetchUserGroupsCommand, ValidateIfUserBelongsToAtLeastOneGroupCommand, ValidateIfGroupBelongsToUserCommand, \
     FetchGroupByIdCommand, SetPropertyRequestCommand, CreatePropertyCommand, ValidatePropertyRequestCommand, \
@@ -26,15 +36,24 @@ from src.domain.commands import SetGroupRequestCommand, ValidateGroupCommand, \
     ValidateRedFlagRequestCommand, SetCreatedAnonymousRedFlagCommand, GetRedFlagsCommand, \
     ValidatePropertyUrlCommand, SetAnonymousRedFlagsCommand, GetRedFlagByIdCommand, SetAnonymousRedFlagCommand, \
     ValidateAlreadyVotedCommand, ValidateNotVotedCommand, CreateVoteCommand, DeleteVoteCommand, \
-    ValidateUserIsAlreadyParticipantCommand, RemoveParticipantFromGroupCommand, RemoveGroupFromUserGroupsCommand
+    ValidateUserIsAlreadyParticipantCommand, RemoveParticipantFromGroupCommand, RemoveGroupFromUserGroupsCommand, \
+    ValidatePageRequestCommand, FetchGroupPageByIdCommand, FetchGroupMetadataByIdCommand, SetPropertiesRequestCommand, \
+    ValidatePropertiesRequestCommand, CreatePropertiesCommand, SetRedFlagsLookupRequestCommand, \
+    ValidateRedFlagsLookupRequestCommand, GetRedFlagsByUrlsCommand, SetAnonymousRedFlagsByUrlCommand, \
+    BeginUnitOfWorkCommand, CommitUnitOfWorkCommand
 from src.domain.helpers import RedFlagMappingHelper
+from src.domain.retry import ConflictRetryPolicy, DEFAULT_CONFLICT_RETRY_MAX_ATTEMPTS, \
+    DEFAULT_CONFLICT_RETRY_BASE_DELAY_SECONDS
 from src.domain.sequence_builders import UpdateGroupSequenceBuilder, FetchUserGroupsSequenceBuilder, \
     GetUserGroupByIdSequenceBuilder, \
     CreatePropertySequenceBuilder, DeletePropertySequenceBuilder, AddUserToGroupSequenceBuilder, \
     GetCodeForGroupSequenceBuilder, \
     CreateGroupSequenceBuilder, FetchUserGroupIfExistsSequenceBuilder, CreateRedFlagSequenceBuilder, \
     GetRedFlagsSequenceBuilder, CreateVoteForRedFlagSequenceBuilder, DeleteVoteForRedFlagSequenceBuilder, \
-    RemoveUserFromGroupSequenceBuilder
+    RemoveUserFromGroupSequenceBuilder, GetUserGroupPageByIdSequenceBuilder, GetUserGroupMetadataByIdSequenceBuilder, \
+    CreatePropertiesSequenceBuilder, LookupRedFlagsSequenceBuilder
+from src.domain.tracing import TimedSequenceRunner
+from src.infra import DynamoDbCallStats
 
 
 def register_domain_dependencies(container: Container):
@@ -44,11 +63,19 @@ def register_domain_dependencies(container: Container):
      .register(service=ICreateGroupCommand, implementation=CreateGroupCommand)
      .register(service=IUpdateGroupCommand, implementation=UpdateGroupCommand)
      .register(service=IFetchUserGroupsCommand, implementation=FetchUserGroupsCommand)
-     .register(service=IUpdateGroupSequenceBuilder, implementation=UpdateGroupSequenceBuilder)
-     .register(service=IFetchUserGroupsSequenceBuilder, implementation=FetchUserGroupsSequenceBuilder)
+     .register(service=IUpdateGroupSequenceBuilder, implementation=UpdateGroupSequenceBuilder,
+               scope=punq.Scope.transient)
+     .register(service=IFetchUserGroupsSequenceBuilder, implementation=FetchUserGroupsSequenceBuilder,
+               scope=punq.Scope.transient)
      .register(service=IFetchGroupByIdCommand, implementation=FetchGroupByIdCommand)
+     .register(service=IFetchGroupMetadataByIdCommand, implementation=FetchGroupMetadataByIdCommand)
+     .register(service=IFetchGroupPageByIdCommand, implementation=FetchGroupPageByIdCommand)
+     .register(service=IValidatePageRequestCommand, implementation=ValidatePageRequestCommand)
      .register(service=ISetPropertyRequestCommand, implementation=SetPropertyRequestCommand)
      .register(service=ICreatePropertyCommand, implementation=CreatePropertyCommand)
+     .register(service=ISetPropertiesRequestCommand, implementation=SetPropertiesRequestCommand)
+     .register(service=IValidatePropertiesRequestCommand, implementation=ValidatePropertiesRequestCommand)
+     .register(service=ICreatePropertiesCommand, implementation=CreatePropertiesCommand)
      .register(service=IDeletePropertyCommand, implementation=DeletePropertyCommand)
      .register(service=ISetGroupIdFromCodeCommand, implementation=SetGroupIdFromCodeCommand)
      .register(service=IGetCodeFromGroupIdCommand, implementation=GetCodeFromGroupIdCommand)
@@ -60,6 +87,8 @@ def register_domain_dependencies(container: Container):
                implementation=RemoveGroupFromUserGroupsCommand)
      .register(service=IRemoveParticipantFromGroupCommand,
                implementation=RemoveParticipantFromGroupCommand)
+     .register(service=IBeginUnitOfWorkCommand, implementation=BeginUnitOfWorkCommand)
+     .register(service=ICommitUnitOfWorkCommand, implementation=CommitUnitOfWorkCommand)
      .register(service=IFetchAuthUserClaimsIfUserDoesNotExistCommand,
                implementation=FetchAuthUserClaimsIfUserDoesNotExistCommand)
      .register(service=IValidateUserIsNotParticipantCommand,
@@ -78,6 +107,14 @@ def register_domain_dependencies(container: Container):
                implementation=SetCreatedAnonymousRedFlagCommand)
      .register(service=IGetRedFlagsCommand,
                implementation=GetRedFlagsCommand)
+     .register(service=ISetRedFlagsLookupRequestCommand,
+               implementation=SetRedFlagsLookupRequestCommand)
+     .register(service=IValidateRedFlagsLookupRequestCommand,
+               implementation=ValidateRedFlagsLookupRequestCommand)
+     .register(service=IGetRedFlagsByUrlsCommand,
+               implementation=GetRedFlagsByUrlsCommand)
+     .register(service=ISetAnonymousRedFlagsByUrlCommand,
+               implementation=SetAnonymousRedFlagsByUrlCommand)
      .register(service=IValidatePropertyUrlCommand,
                implementation=ValidatePropertyUrlCommand)
      .register(service=ISetAnonymousRedFlagsCommand,
@@ -101,29 +138,76 @@ def register_domain_dependencies(container: Container):
      .register(service=IRemoveGroupFromUserGroupsCommand,
                implementation=RemoveGroupFromUserGroupsCommand)
      .register(service=IGetUserGroupByIdSequenceBuilder,
-               implementation=GetUserGroupByIdSequenceBuilder)
+               implementation=GetUserGroupByIdSequenceBuilder,
+               scope=punq.Scope.transient)
+     .register(service=IGetUserGroupMetadataByIdSequenceBuilder,
+               implementation=GetUserGroupMetadataByIdSequenceBuilder,
+               scope=punq.Scope.transient)
+     .register(service=IGetUserGroupPageByIdSequenceBuilder,
+               implementation=GetUserGroupPageByIdSequenceBuilder,
+               scope=punq.Scope.transient)
      .register(service=ICreatePropertySequenceBuilder,
-               implementation=CreatePropertySequenceBuilder)
+               implementation=CreatePropertySequenceBuilder,
+               scope=punq.Scope.transient)
+     .register(service=ICreatePropertiesSequenceBuilder,
+               implementation=CreatePropertiesSequenceBuilder,
+               scope=punq.Scope.transient)
      .register(service=IDeletePropertySequenceBuilder,
-               implementation=DeletePropertySequenceBuilder)
+               implementation=DeletePropertySequenceBuilder,
+               scope=punq.Scope.transient)
      .register(service=IAddUserToGroupSequenceBuilder,
-               implementation=AddUserToGroupSequenceBuilder)
+               implementation=AddUserToGroupSequenceBuilder,
+               scope=punq.Scope.transient)
      .register(service=IGetCodeForGroupSequenceBuilder,
-               implementation=GetCodeForGroupSequenceBuilder)
+               implementation=GetCodeForGroupSequenceBuilder,
+               scope=punq.Scope.transient)
      .register(service=ICreateGroupSequenceBuilder,
-               implementation=CreateGroupSequenceBuilder)
+               implementation=CreateGroupSequenceBuilder,
+               scope=punq.Scope.transient)
      .register(service=IFetchUserGroupIfExistsSequenceBuilder,
-               implementation=FetchUserGroupIfExistsSequenceBuilder)
+               implementation=FetchUserGroupIfExistsSequenceBuilder,
+               scope=punq.Scope.transient)
      .register(service=ICreateRedFlagSequenceBuilder,
-               implementation=CreateRedFlagSequenceBuilder)
+               implementation=CreateRedFlagSequenceBuilder,
+               scope=punq.Scope.transient)
      .register(service=IGetRedFlagsSequenceBuilder,
-               implementation=GetRedFlagsSequenceBuilder)
+               implementation=GetRedFlagsSequenceBuilder,
+               scope=punq.Scope.transient)
+     .register(service=ILookupRedFlagsSequenceBuilder,
+               implementation=LookupRedFlagsSequenceBuilder,
+               scope=punq.Scope.transient)
      .register(service=ICreateVoteForRedFlagSequenceBuilder,
-               implementation=CreateVoteForRedFlagSequenceBuilder)
+               implementation=CreateVoteForRedFlagSequenceBuilder,
+               scope=punq.Scope.transient)
      .register(service=IDeleteVoteForRedFlagSequenceBuilder,
-               implementation=DeleteVoteForRedFlagSequenceBuilder)
+               implementation=DeleteVoteForRedFlagSequenceBuilder,
+               scope=punq.Scope.transient)
      .register(service=IRemoveUserFromGroupSequenceBuilder,
-               implementation=RemoveUserFromGroupSequenceBuilder)
+               implementation=RemoveUserFromGroupSequenceBuilder,
+               scope=punq.Scope.transient)
      .register(service=IRemoveUserFromGroupSequenceBuilder,
-               implementation=RemoveUserFromGroupSequenceBuilder)
-     .register(service=RedFlagMappingHelper))
+               implementation=RemoveUserFromGroupSequenceBuilder,
+               scope=punq.Scope.transient)
+     .register(service=RedFlagMappingHelper)
+     .register_factory(service=IConflictRetryPolicy,
+                       factory=lambda: ConflictRetryPolicy(
+                           logger=container.resolve(service=Logger),
+                           max_attempts=int(os.environ.get('CONFLICT_RETRY_MAX_ATTEMPTS',
+                                                           DEFAULT_CONFLICT_RETRY_MAX_ATTEMPTS)),
+                           base_delay_seconds=float(os.environ.get('CONFLICT_RETRY_BASE_DELAY_SECONDS',
+                                                                   DEFAULT_CONFLICT_RETRY_BASE_DELAY_SECONDS)))))
+    register_command_timing(container=container)
+
+
+def register_command_timing(container: Container):
+    """
+    opt in by setting COMMAND_TIMING to true, every request then logs the time and dynamo calls of each command
+    """
+    if os.environ.get('COMMAND_TIMING') != 'true':
+        return
+    container.register_factory(service=TopLevelSequenceRunner,
+                               factory=lambda: TimedSequenceRunner(
+                                   error_handling_strategy_factory=container.resolve(
+                                       service=ErrorHandlingStrategyFactory),
+                                   logger=container.resolve(service=Logger),
+                                   call_stats=container.resolve(service=DynamoDbCallStats)))
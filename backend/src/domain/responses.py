@@ -1,6 +1,6 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
-from src.core import Group, GroupProperties, Property, AnonymousRedFlag
+from src.core import Group, GroupProperties, Property, AnonymousRedFlag, ContinuationToken
 
 
 @dataclass(unsafe_hash=True)
@@ -23,9 +23,25 @@ class PropertyCreatedResponse:
     property: Property = None
 
 
+@dataclass(unsafe_hash=True)
+class RejectedPropertyResult:
+    """
+    index of the rejected property in the request
+    """
+    index: int = None
+    errors: list[str] = field(default_factory=lambda: [])
+
+
+@dataclass(unsafe_hash=True)
+class PropertiesBatchCreatedResponse:
+    properties: list[Property] = field(default_factory=lambda: [])
+    rejected: list[RejectedPropertyResult] = field(default_factory=lambda: [])
+
+
 @dataclass(unsafe_hash=True)
 class SingleGroupPropertiesResponse:
     group_properties: GroupProperties = None
+    continuation_token: ContinuationToken = None
 
 
 @dataclass(unsafe_hash=True)
@@ -43,6 +59,18 @@ class CreatedRedFlagResponse:
     red_flag: AnonymousRedFlag = None
 
 
+@dataclass(unsafe_hash=True)
+class PropertyRedFlags:
+    property_url: str = None
+    red_flags: list[AnonymousRedFlag] = field(default_factory=lambda: [])
+
+
+@dataclass(unsafe_hash=True)
+class RedFlagsByUrlResponse:
+    property_red_flags: list[PropertyRedFlags] = field(default_factory=lambda: [])
+
+
 @dataclass(unsafe_hash=True)
 class ListRedFlagsResponse:
     red_flags: list[AnonymousRedFlag] = None
+    continuation_token: ContinuationToken = None
@@ -0,0 +1,81 @@
+import random
+import time
+from typing import Callable
+
+from formula_thoughts_web.abstractions import ApplicationContext, Logger, Command, SequenceComponent
+
+from src.domain.errors import concurrent_update_error
+from src.domain.helpers import request_properties
+from src.exceptions import ConflictException
+
+DEFAULT_CONFLICT_RETRY_MAX_ATTEMPTS = 3
+DEFAULT_CONFLICT_RETRY_BASE_DELAY_SECONDS = 0.025
+
+
+class ConflictRetryPolicy:
+    """
+    wraps the commands reading an entity and writing it back, so a write failing on a changed etag re-reads the
+    entity and re-applies the change instead of failing the request
+    """
+
+    def __init__(self, logger: Logger,
+                 max_attempts: int = DEFAULT_CONFLICT_RETRY_MAX_ATTEMPTS,
+                 base_delay_seconds: float = DEFAULT_CONFLICT_RETRY_BASE_DELAY_SECONDS,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.__logger = logger
+        self.__max_attempts = max_attempts
+        self.__base_delay_seconds = base_delay_seconds
+        self.__sleep = sleep
+
+    def retrying(self, name: str, sequence: list[SequenceComponent]) -> Command:
+        commands = []
+        for component in sequence:
+            if hasattr(component, 'generate_sequence'):
+                commands.extend(component.generate_sequence())
+            else:
+                commands.append(component)
+        return RetryOnConflictCommand(name=name, commands=commands, policy=self)
+
+    def run(self, name: str, commands: list[Command], context: ApplicationContext) -> None:
+        variables = dict(context.variables)
+        for attempt in range(1, self.__max_attempts + 1):
+            try:
+                for command in commands:
+                    command.run(context)
+                    if any(context.error_capsules):
+                        break
+                self.__log_attempts(name=name, attempts=attempt, exhausted=False, context=context)
+                return
+            except ConflictException:
+                self.__logger.log_info(f"conflict on attempt {attempt} of {name}")
+            context.variables = dict(variables)
+            context.response = None
+            if attempt < self.__max_attempts:
+                self.__sleep(random.uniform(0, self.__base_delay_seconds * 2 ** (attempt - 1)))
+        self.__log_attempts(name=name, attempts=self.__max_attempts, exhausted=True, context=context)
+        context.error_capsules.append(concurrent_update_error)
+
+    def __log_attempts(self, name: str, attempts: int, exhausted: bool, context: ApplicationContext) -> None:
+        """
+        logged once per request, the route key gives the conflict rate per route
+        """
+        self.__logger.log_event(message="optimistic concurrency attempts", properties={
+            **request_properties(variables=context.variables),
+            "action": name,
+            "attempts": attempts,
+            "conflicts": attempts if exhausted else attempts - 1,
+            "exhausted": exhausted
+        })
+
+
+class RetryOnConflictCommand:
+
+    def __init__(self, name: str,
+                 commands: list[Command],
+                 policy: ConflictRetryPolicy):
+        self.__name = name
+        self.__commands = commands
+        self.__policy = policy
+
+    def run(self, context: ApplicationContext) -> None:
+        self.__policy.run(name=self.__name, commands=self.__commands, context=context)
@@ -2,7 +2,7 @@ from formula_thoughts_web.application import FluentSequenceBuilder
 
 from src.core import ISetGroupRequestCommand, IValidateGroupCommand, \
     IFetchUserGroupsCommand, IValidateIfUserBelongsToAtLeastOneGroupCommand, IValidateIfGroupBelongsToUserCommand, \
-    IFetchGroupByIdCommand, IGetUserGroupByIdSequenceBuilder, ISetPropertyRequestCommand, ICreatePropertyCommand, \
+    IFetchGroupByIdCommand, ISetPropertyRequestCommand, ICreatePropertyCommand, \
     IValidatePropertyRequestCommand, IDeletePropertyCommand, IAddCurrentUserToGroupCommand, \
     ISetGroupIdFromCodeCommand, IGetCodeFromGroupIdCommand, IValidateUserIsNotParticipantCommand, \
     IFetchAuthUserClaimsIfUserDoesNotExistCommand, IFetchUserGroupIfExistsSequenceBuilder, \
@@ -11,7 +11,11 @@ from src.core import ISetGroupRequestCommand, IValidateGroupCommand, \
     IValidatePropertyUrlCommand, IGetRedFlagsCommand, ISetAnonymousRedFlagsCommand, IGetRedFlagByIdCommand, \
     ISetAnonymousRedFlagCommand, IValidateAlreadyVotedCommand, IValidateNotVotedCommand, ICreateVoteCommand, \
     IDeleteVoteCommand, IValidateUserIsAlreadyParticipantCommand, IRemoveGroupFromUserGroupsCommand, \
-    IRemoveParticipantFromGroupCommand
+    IRemoveParticipantFromGroupCommand, IValidatePageRequestCommand, IFetchGroupPageByIdCommand, \
+    IFetchGroupMetadataByIdCommand, IGetUserGroupMetadataByIdSequenceBuilder, ISetPropertiesRequestCommand, \
+    IValidatePropertiesRequestCommand, ICreatePropertiesCommand, ISetRedFlagsLookupRequestCommand, \
+    IValidateRedFlagsLookupRequestCommand, IGetRedFlagsByUrlsCommand, ISetAnonymousRedFlagsByUrlCommand, \
+    IBeginUnitOfWorkCommand, ICommitUnitOfWorkCommand, IConflictRetryPolicy
 
 
 class UpdateGroupSequenceBuilder(FluentSequenceBuilder):
@@ -20,9 +24,11 @@ class UpdateGroupSequenceBuilder(FluentSequenceBuilder):
                  validate_group: IValidateGroupCommand,
                  validate_if_user_belongs_to_at_least_one_group_command: IValidateIfUserBelongsToAtLeastOneGroupCommand,
                  validate_if_group_belongs_to_user: IValidateIfGroupBelongsToUserCommand,
-                 fetch_group_by_id: IFetchGroupByIdCommand,
-                 update_group: IUpdateGroupCommand):
-        self.__fetch_group_by_id = fetch_group_by_id
+                 fetch_group_metadata_by_id: IFetchGroupMetadataByIdCommand,
+                 update_group: IUpdateGroupCommand,
+                 conflict_retry_policy: IConflictRetryPolicy):
+        self.__conflict_retry_policy = conflict_retry_policy
+        self.__fetch_group_metadata_by_id = fetch_group_metadata_by_id
         self.__validate_if_group_belongs_to_user = validate_if_group_belongs_to_user
         self.__validate_if_user_belongs_to_at_least_one_group_command = validate_if_user_belongs_to_at_least_one_group_command
         self.__update_group = update_group
@@ -35,8 +41,10 @@ class UpdateGroupSequenceBuilder(FluentSequenceBuilder):
             ._add_command(command=self.__validate_group) \
             ._add_command(command=self.__validate_if_user_belongs_to_at_least_one_group_command) \
             ._add_command(command=self.__validate_if_group_belongs_to_user) \
-            ._add_command(command=self.__fetch_group_by_id) \
-            ._add_command(command=self.__update_group)
+            ._add_command(command=self.__conflict_retry_policy.retrying(name="update_group", sequence=[
+                self.__fetch_group_metadata_by_id,
+                self.__update_group
+            ]))
 
 
 class FetchUserGroupsSequenceBuilder(FluentSequenceBuilder):
@@ -66,10 +74,47 @@ class GetUserGroupByIdSequenceBuilder(FluentSequenceBuilder):
             ._add_command(command=self.__fetch_group_by_id_command)
 
 
+class GetUserGroupMetadataByIdSequenceBuilder(FluentSequenceBuilder):
+
+    def __init__(self,
+                 validate_if_user_belongs_to_at_least_one_group_command: IValidateIfUserBelongsToAtLeastOneGroupCommand,
+                 validate_if_group_belongs_to_user: IValidateIfGroupBelongsToUserCommand,
+                 fetch_group_metadata_by_id_command: IFetchGroupMetadataByIdCommand):
+        super().__init__()
+        self.__fetch_group_metadata_by_id_command = fetch_group_metadata_by_id_command
+        self.__validate_if_group_belongs_to_user = validate_if_group_belongs_to_user
+        self.__validate_if_user_belongs_to_at_least_one_group_command = validate_if_user_belongs_to_at_least_one_group_command
+
+    def build(self):
+        self._add_command(command=self.__validate_if_user_belongs_to_at_least_one_group_command) \
+            ._add_command(command=self.__validate_if_group_belongs_to_user) \
+            ._add_command(command=self.__fetch_group_metadata_by_id_command)
+
+
+class GetUserGroupPageByIdSequenceBuilder(FluentSequenceBuilder):
+
+    def __init__(self,
+                 validate_page_request: IValidatePageRequestCommand,
+                 validate_if_user_belongs_to_at_least_one_group_command: IValidateIfUserBelongsToAtLeastOneGroupCommand,
+                 validate_if_group_belongs_to_user: IValidateIfGroupBelongsToUserCommand,
+                 fetch_group_page_by_id_command: IFetchGroupPageByIdCommand):
+        super().__init__()
+        self.__validate_page_request = validate_page_request
+        self.__fetch_group_page_by_id_command = fetch_group_page_by_id_command
+        self.__validate_if_group_belongs_to_user = validate_if_group_belongs_to_user
+        self.__validate_if_user_belongs_to_at_least_one_group_command = validate_if_user_belongs_to_at_least_one_group_command
+
+    def build(self):
+        self._add_command(command=self.__validate_page_request) \
+            ._add_command(command=self.__validate_if_user_belongs_to_at_least_one_group_command) \
+            ._add_command(command=self.__validate_if_group_belongs_to_user) \
+            ._add_command(command=self.__fetch_group_page_by_id_command)
+
+
 class CreatePropertySequenceBuilder(FluentSequenceBuilder):
 
     def __init__(self,
-                 get_user_group_by_id: IGetUserGroupByIdSequenceBuilder,
+                 get_user_group_by_id: IGetUserGroupMetadataByIdSequenceBuilder,
                  set_create_property_request: ISetPropertyRequestCommand,
                  create_property: ICreatePropertyCommand,
                  validate_property: IValidatePropertyRequestCommand):
@@ -86,10 +131,30 @@ class CreatePropertySequenceBuilder(FluentSequenceBuilder):
             ._add_command(self.__create_property)
 
 
+class CreatePropertiesSequenceBuilder(FluentSequenceBuilder):
+
+    def __init__(self,
+                 get_user_group_by_id: IGetUserGroupMetadataByIdSequenceBuilder,
+                 set_create_properties_request: ISetPropertiesRequestCommand,
+                 create_properties: ICreatePropertiesCommand,
+                 validate_properties: IValidatePropertiesRequestCommand):
+        self.__validate_properties = validate_properties
+        self.__create_properties = create_properties
+        self.__set_create_properties_request = set_create_properties_request
+        self.__get_user_group_by_id = get_user_group_by_id
+        super().__init__()
+
+    def build(self):
+        self._add_command(self.__set_create_properties_request) \
+            ._add_sequence_builder(self.__get_user_group_by_id) \
+            ._add_command(self.__validate_properties) \
+            ._add_command(self.__create_properties)
+
+
 class DeletePropertySequenceBuilder(FluentSequenceBuilder):
 
     def __init__(self,
-                 get_user_group_by_id: IGetUserGroupByIdSequenceBuilder,
+                 get_user_group_by_id: IGetUserGroupMetadataByIdSequenceBuilder,
                  delete_property: IDeletePropertyCommand):
         self.__delete_property = delete_property
         self.__get_user_group_by_id = get_user_group_by_id
@@ -105,10 +170,16 @@ class AddUserToGroupSequenceBuilder(FluentSequenceBuilder):
     def __init__(self,
                  fetch_user_group_if_exists: IFetchUserGroupIfExistsSequenceBuilder,
                  set_group_id_from_code: ISetGroupIdFromCodeCommand,
-                 get_group_by_id: IFetchGroupByIdCommand,
+                 get_group_by_id: IFetchGroupMetadataByIdCommand,
                  validate_user_is_not_participant: IValidateUserIsNotParticipantCommand,
+                 begin_unit_of_work: IBeginUnitOfWorkCommand,
                  add_current_user_to_group_command: IAddCurrentUserToGroupCommand,
-                 create_user_groups: ICreateUserGroupsCommand):
+                 create_user_groups: ICreateUserGroupsCommand,
+                 commit_unit_of_work: ICommitUnitOfWorkCommand,
+                 conflict_retry_policy: IConflictRetryPolicy):
+        self.__conflict_retry_policy = conflict_retry_policy
+        self.__begin_unit_of_work = begin_unit_of_work
+        self.__commit_unit_of_work = commit_unit_of_work
         self.__fetch_user_group_if_exists = fetch_user_group_if_exists
         self.__create_user_groups = create_user_groups
         self.__validate_user_is_not_participant = validate_user_is_not_participant
@@ -118,17 +189,21 @@ class AddUserToGroupSequenceBuilder(FluentSequenceBuilder):
         super().__init__()
 
     def build(self):
-        self._add_sequence_builder(sequence_builder=self.__fetch_user_group_if_exists) \
-            ._add_command(command=self.__set_group_id_from_code) \
-            ._add_command(command=self.__get_group_by_id) \
-            ._add_command(command=self.__validate_user_is_not_participant) \
-            ._add_command(command=self.__add_current_user_to_group_command) \
-            ._add_command(command=self.__create_user_groups)
+        self._add_command(command=self.__conflict_retry_policy.retrying(name="add_user_to_group", sequence=[
+            self.__fetch_user_group_if_exists,
+            self.__set_group_id_from_code,
+            self.__get_group_by_id,
+            self.__validate_user_is_not_participant,
+            self.__begin_unit_of_work,
+            self.__add_current_user_to_group_command,
+            self.__create_user_groups,
+            self.__commit_unit_of_work
+        ]))
 
 
 class GetCodeForGroupSequenceBuilder(FluentSequenceBuilder):
 
-    def __init__(self, get_group_by_id_sequence: IGetUserGroupByIdSequenceBuilder,
+    def __init__(self, get_group_by_id_sequence: IGetUserGroupMetadataByIdSequenceBuilder,
                  get_code_from_group_id: IGetCodeFromGroupIdCommand):
         super().__init__()
         self.__get_group_by_id_sequence = get_group_by_id_sequence
@@ -190,27 +265,51 @@ class CreateRedFlagSequenceBuilder(FluentSequenceBuilder):
 class GetRedFlagsSequenceBuilder(FluentSequenceBuilder):
 
     def __init__(self, validate_get_red_flags_request: IValidatePropertyUrlCommand,
+                 validate_page_request: IValidatePageRequestCommand,
                  get_red_flags: IGetRedFlagsCommand,
                  set_red_flags_response: ISetAnonymousRedFlagsCommand):
         super().__init__()
         self.__set_red_flags_response = set_red_flags_response
         self.__get_red_flags = get_red_flags
+        self.__validate_page_request = validate_page_request
         self.__validate_get_red_flags_request = validate_get_red_flags_request
 
     def build(self):
         self._add_command(command=self.__validate_get_red_flags_request) \
+            ._add_command(command=self.__validate_page_request) \
             ._add_command(command=self.__get_red_flags) \
             ._add_command(command=self.__set_red_flags_response)
 
 
+class LookupRedFlagsSequenceBuilder(FluentSequenceBuilder):
+
+    def __init__(self, set_red_flags_lookup_request: ISetRedFlagsLookupRequestCommand,
+                 validate_red_flags_lookup_request: IValidateRedFlagsLookupRequestCommand,
+                 get_red_flags_by_urls: IGetRedFlagsByUrlsCommand,
+                 set_red_flags_by_url_response: ISetAnonymousRedFlagsByUrlCommand):
+        super().__init__()
+        self.__set_red_flags_by_url_response = set_red_flags_by_url_response
+        self.__get_red_flags_by_urls = get_red_flags_by_urls
+        self.__validate_red_flags_lookup_request = validate_red_flags_lookup_request
+        self.__set_red_flags_lookup_request = set_red_flags_lookup_request
+
+    def build(self):
+        self._add_command(command=self.__set_red_flags_lookup_request) \
+            ._add_command(command=self.__validate_red_flags_lookup_request) \
+            ._add_command(command=self.__get_red_flags_by_urls) \
+            ._add_command(command=self.__set_red_flags_by_url_response)
+
+
 class CreateVoteForRedFlagSequenceBuilder(FluentSequenceBuilder):
 
     def __init__(self, validate_get_red_flags_request: IValidatePropertyUrlCommand,
                  get_red_flag_by_id: IGetRedFlagByIdCommand,
                  validate_not_voted: IValidateNotVotedCommand,
                  upvote: ICreateVoteCommand,
-                 set_anonymous_red_flag_response: ISetAnonymousRedFlagCommand):
+                 set_anonymous_red_flag_response: ISetAnonymousRedFlagCommand,
+                 conflict_retry_policy: IConflictRetryPolicy):
         super().__init__()
+        self.__conflict_retry_policy = conflict_retry_policy
         self.__upvote = upvote
         self.__validate_not_voted = validate_not_voted
         self.__set_anonymous_red_flag_response = set_anonymous_red_flag_response
@@ -219,9 +318,11 @@ class CreateVoteForRedFlagSequenceBuilder(FluentSequenceBuilder):
 
     def build(self):
         self._add_command(command=self.__validate_get_red_flags_request) \
-            ._add_command(command=self.__get_red_flag_by_id) \
-            ._add_command(command=self.__validate_not_voted) \
-            ._add_command(command=self.__upvote) \
+            ._add_command(command=self.__conflict_retry_policy.retrying(name="add_voter", sequence=[
+                self.__get_red_flag_by_id,
+                self.__validate_not_voted,
+                self.__upvote
+            ])) \
             ._add_command(command=self.__set_anonymous_red_flag_response)
 
 
@@ -231,8 +332,10 @@ class DeleteVoteForRedFlagSequenceBuilder(FluentSequenceBuilder):
                  get_red_flag_by_id: IGetRedFlagByIdCommand,
                  validate_user_already_voted: IValidateAlreadyVotedCommand,
                  down_vote_command: IDeleteVoteCommand,
-                 set_anonymous_red_flag_response: ISetAnonymousRedFlagCommand):
+                 set_anonymous_red_flag_response: ISetAnonymousRedFlagCommand,
+                 conflict_retry_policy: IConflictRetryPolicy):
         super().__init__()
+        self.__conflict_retry_policy = conflict_retry_policy
         self.__down_vote_command = down_vote_command
         self.__validate_user_already_voted = validate_user_already_voted
         self.__set_anonymous_red_flag_response = set_anonymous_red_flag_response
@@ -241,9 +344,11 @@ class DeleteVoteForRedFlagSequenceBuilder(FluentSequenceBuilder):
 
     def build(self):
         self._add_command(command=self.__validate_get_red_flags_request) \
-            ._add_command(command=self.__get_red_flag_by_id) \
-            ._add_command(command=self.__validate_user_already_voted) \
-            ._add_command(command=self.__down_vote_command) \
+            ._add_command(command=self.__conflict_retry_policy.retrying(name="remove_voter", sequence=[
+                self.__get_red_flag_by_id,
+                self.__validate_user_already_voted,
+                self.__down_vote_command
+            ])) \
             ._add_command(command=self.__set_anonymous_red_flag_response)
 
 
@@ -252,9 +357,13 @@ class RemoveUserFromGroupSequenceBuilder(FluentSequenceBuilder):
     def __init__(self, fetch_user_group_if_exists: IFetchUserGroupIfExistsSequenceBuilder,
                  get_group_by_id: IFetchGroupByIdCommand,
                  validate_user_is_already_participant: IValidateUserIsAlreadyParticipantCommand,
+                 begin_unit_of_work: IBeginUnitOfWorkCommand,
                  remove_group_from_user_groups_command: IRemoveGroupFromUserGroupsCommand,
-                 remove_participant_from_group_command: IRemoveParticipantFromGroupCommand):
+                 remove_participant_from_group_command: IRemoveParticipantFromGroupCommand,
+                 commit_unit_of_work: ICommitUnitOfWorkCommand):
         super().__init__()
+        self.__begin_unit_of_work = begin_unit_of_work
+        self.__commit_unit_of_work = commit_unit_of_work
         self.__remove_participant_from_group_command = remove_participant_from_group_command
         self.__remove_group_from_user_groups_command = remove_group_from_user_groups_command
         self.__validate_user_is_already_participant = validate_user_is_already_participant
@@ -265,5 +374,7 @@ class RemoveUserFromGroupSequenceBuilder(FluentSequenceBuilder):
         self._add_sequence_builder(sequence_builder=self.__fetch_user_group_if_exists) \
             ._add_command(command=self.__get_group_by_id) \
             ._add_command(command=self.__validate_user_is_already_participant) \
+            ._add_command(command=self.__begin_unit_of_work) \
             ._add_command(command=self.__remove_participant_from_group_command) \
-            ._add_command(command=self.__remove_group_from_user_groups_command)
+            ._add_command(command=self.__remove_group_from_user_groups_command) \
+            ._add_command(command=self.__commit_unit_of_work)
@@ -0,0 +1,129 @@
+import functools
+import time
+from dataclasses import dataclass, field, asdict
+from typing import Callable
+
+from formula_thoughts_web.abstractions import ApplicationContext, Logger, SequenceBuilder, Command
+from formula_thoughts_web.application import TopLevelSequenceRunner, ErrorHandlingStrategyFactory, \
+    FluentSequenceBuilder
+
+from src.domain.helpers import request_properties
+from src.infra import DynamoDbCallStats
+
+
+@dataclass
+class CommandSpan:
+    name: str
+    duration_ms: float = 0
+    dynamo_calls: int = 0
+    bytes_read: int = 0
+    children: list['CommandSpan'] = field(default_factory=list)
+
+
+class TimedCommand:
+
+    def __init__(self, command: Command,
+                 spans: list[CommandSpan],
+                 call_stats: DynamoDbCallStats,
+                 clock: Callable[[], float]):
+        self.__command = command
+        self.__spans = spans
+        self.__call_stats = call_stats
+        self.__clock = clock
+
+    def run(self, context: ApplicationContext) -> None:
+        # the span of a sequence builder is only added once one of its commands runs
+        for parent, span in zip(self.__spans, self.__spans[1:]):
+            if len(parent.children) == 0 or parent.children[-1] is not span:
+                parent.children.append(span)
+        calls, bytes_read = self.__call_stats.snapshot()
+        start = self.__clock()
+        try:
+            self.__command.run(context)
+        finally:
+            end_calls, end_bytes_read = self.__call_stats.snapshot()
+            self.__spans[-1].children.append(CommandSpan(name=type(self.__command).__name__,
+                                                         duration_ms=round((self.__clock() - start) * 1000, 3),
+                                                         dynamo_calls=end_calls - calls,
+                                                         bytes_read=end_bytes_read - bytes_read))
+
+
+@functools.cache
+def timed_command_type(command_type: type) -> type:
+    """
+    named after the command so the framework runner logs the proxy under its name
+    """
+    return type(command_type.__name__, (TimedCommand,), {"__module__": command_type.__module__})
+
+
+class TimedSequence:
+
+    def __init__(self, sequence_builder: SequenceBuilder,
+                 root: CommandSpan,
+                 call_stats: DynamoDbCallStats,
+                 clock: Callable[[], float]):
+        self.__sequence_builder = sequence_builder
+        self.__root = root
+        self.__call_stats = call_stats
+        self.__clock = clock
+
+    def generate_sequence(self) -> list[Command]:
+        return self.__timed_commands(sequence_builder=self.__sequence_builder, spans=[self.__root])
+
+    def __timed_commands(self, sequence_builder: SequenceBuilder, spans: list[CommandSpan]) -> list[Command]:
+        # builds the fluent sequence builders like generate_sequence does, keeping the builder each command came from
+        if not isinstance(sequence_builder, FluentSequenceBuilder):
+            return [self.__timed_command(command=command, spans=spans)
+                    for command in sequence_builder.generate_sequence()]
+        sequence_builder.build()
+        commands = []
+        for component in sequence_builder.components:
+            if hasattr(component, "generate_sequence"):
+                commands += self.__timed_commands(sequence_builder=component,
+                                                  spans=spans + [CommandSpan(name=type(component).__name__)])
+            else:
+                commands.append(self.__timed_command(command=component, spans=spans))
+        return commands
+
+    def __timed_command(self, command: Command, spans: list[CommandSpan]) -> Command:
+        return timed_command_type(type(command))(command=command,
+                                                 spans=spans,
+                                                 call_stats=self.__call_stats,
+                                                 clock=self.__clock)
+
+
+def _total(span: CommandSpan) -> CommandSpan:
+    if len(span.children) > 0:
+        span.duration_ms = round(sum(_total(child).duration_ms for child in span.children), 3)
+        span.dynamo_calls = sum(child.dynamo_calls for child in span.children)
+        span.bytes_read = sum(child.bytes_read for child in span.children)
+    return span
+
+
+class TimedSequenceRunner(TopLevelSequenceRunner):
+    """
+    only registered while COMMAND_TIMING is on
+    """
+
+    def __init__(self, error_handling_strategy_factory: ErrorHandlingStrategyFactory,
+                 logger: Logger,
+                 call_stats: DynamoDbCallStats,
+                 clock: Callable[[], float] = time.perf_counter):
+        super().__init__(error_handling_strategy_factory=error_handling_strategy_factory, logger=logger)
+        self.__logger = logger
+        self.__call_stats = call_stats
+        self.__clock = clock
+
+    def run(self, context: ApplicationContext,
+            top_level_sequence: SequenceBuilder):
+        root = CommandSpan(name=type(top_level_sequence).__name__)
+        try:
+            super().run(context=context, top_level_sequence=TimedSequence(sequence_builder=top_level_sequence,
+                                                                          root=root,
+                                                                          call_stats=self.__call_stats,
+                                                                          clock=self.__clock))
+        finally:
+            self.__logger.log_event(message="command timings", properties={
+                **request_properties(variables=context.variables),
+                "spans": asdict(_total(root))
+            })
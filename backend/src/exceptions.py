@@ -32,3 +32,7 @@ class RedFlagAlreadyExistsException(Exception):
 
 class RedFlagNotFoundException(Exception):
     pass
+
+
+class InvalidContinuationTokenException(Exception):
+    pass
@@ -1,20 +1,98 @@
+import base64
+import binascii
+import contextlib
+import contextvars
+import functools
 import hashlib
+import inspect
+import json
+import random
+import re
+import threading
+import time
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import Iterator, Callable, TypeVar, Any
 
 import boto3
 from boto3 import dynamodb
-from boto3.dynamodb.conditions import Key, Attr
+from boto3.dynamodb.conditions import Key
+from boto3.dynamodb.transform import TransformationInjector, copy_dynamodb_params
 from botocore.client import BaseClient
-from formula_thoughts_web.abstractions import Serializer
+from botocore.exceptions import ClientError
+from formula_thoughts_web.abstractions import Serializer, Logger
 from formula_thoughts_web.crosscutting import ObjectMapper
 from urllib3.util import parse_url
 
+from src.exceptions import InvalidContinuationTokenException, DataException, ConflictException
+from src.infra.codecs import EntityCodec, ObjectMapperCodec
+
 CognitoUserPoolId = str
 
 Username = str
 
+TItem = TypeVar("TItem")
+
 CONDITIONAL_CHECK_FAILED = 'ConditionalCheckFailedException'
+TRANSACTION_CANCELED = 'TransactionCanceledException'
 RESOURCE_NOT_FOUND = 'ResourceNotFoundException'
 
+BATCH_WRITE_MAX_ITEMS = 25
+BATCH_WRITE_MAX_ATTEMPTS = 5
+BATCH_WRITE_BASE_DELAY_SECONDS = 0.05
+
+LEGACY_RED_FLAG_PARTITION_KEY = "red_flag"
+
+DYNAMODB_READ_OPERATIONS = {"get_item", "query"}
+
+_DYNAMODB_CALLER: contextvars.ContextVar[str | None] = contextvars.ContextVar("dynamodb_caller", default=None)
+
+RED_FLAG_KEY_DIGEST_BYTES = 16
+
+PROPERTY_URL_CACHE_MAX_SIZE = 4096
+
+
+@dataclass(frozen=True)
+class PortalListingPattern:
+    """
+    the id group of pattern is the listing id, canonical_url is expanded from the match
+    """
+    portal: str
+    host: str
+    pattern: re.Pattern
+    canonical_url: str
+
+
+PORTAL_LISTING_PATTERNS = [
+    PortalListingPattern(portal="rightmove",
+                         host="rightmove.co.uk",
+                         pattern=re.compile(r"^/(?:properties/|property-(?:to-rent|for-sale)/property-)(?P<id>\d+)"),
+                         canonical_url=r"https://rightmove.co.uk/properties/\g<id>"),
+    PortalListingPattern(portal="zoopla",
+                         host="zoopla.co.uk",
+                         pattern=re.compile(r"^/(?P<section>to-rent|for-sale|new-homes)/details/(?P<id>\d+)"),
+                         canonical_url=r"https://zoopla.co.uk/\g<section>/details/\g<id>"),
+    PortalListingPattern(portal="openrent",
+                         host="openrent.co.uk",
+                         pattern=re.compile(r"^/(?:property-to-rent/[^?]*/)?(?P<id>\d+)(?:[/?]|$)"),
+                         canonical_url=r"https://openrent.co.uk/\g<id>"),
+    PortalListingPattern(portal="spareroom",
+                         host="spareroom.co.uk",
+                         pattern=re.compile(
+                             r"^/flatshare/(?:flatshare_detail\.pl\?(?:[^#]*&)?flatshare_id=|[^?]*/)(?P<id>\d+)"),
+                         canonical_url=r"https://spareroom.co.uk/flatshare/flatshare_detail.pl?flatshare_id=\g<id>")
+]
+
+
+@dataclass(frozen=True)
+class CanonicalPropertyUrl:
+    """
+    listing_id is e.g. rightmove:123456, none for urls of other sites
+    """
+    url: str
+    listing_id: str = None
+
 
 class ObjectHasher:
 
@@ -31,6 +109,15 @@ class ObjectHasher:
         dhash.update(encoded)
         return dhash.hexdigest()
 
+    @staticmethod
+    def hash_change(etag: str, change: str, value: str) -> str:
+        """
+        unlike hash the cost does not grow with the size of the entity
+        """
+        dhash = hashlib.md5()
+        dhash.update(json.dumps([etag, change, value]).encode())
+        return dhash.hexdigest()
+
 
 class CognitoClientWrapper:
 
@@ -44,43 +131,491 @@ class CognitoClientWrapper:
                                                     Username=username)
 
 
+class DynamoDbClientTable:
+    """
+    unlike resources, clients can be shared across threads
+    """
+
+    def __init__(self, client: BaseClient, name: str):
+        self.__client = client
+        self.__name = name
+
+    def put_item(self, **kwargs) -> dict:
+        return self.__client.put_item(TableName=self.__name, **kwargs)
+
+    def update_item(self, **kwargs) -> dict:
+        return self.__client.update_item(TableName=self.__name, **kwargs)
+
+    def get_item(self, **kwargs) -> dict:
+        return self.__client.get_item(TableName=self.__name, **kwargs)
+
+    def query(self, **kwargs) -> dict:
+        return self.__client.query(TableName=self.__name, **kwargs)
+
+    def scan(self, **kwargs) -> dict:
+        return self.__client.scan(TableName=self.__name, **kwargs)
+
+    def delete_item(self, **kwargs) -> dict:
+        return self.__client.delete_item(TableName=self.__name, **kwargs)
+
+
+class DynamoDbClientResource:
+    """
+    stands in for boto3.resource('dynamodb'), without deserialize_output items stay AttributeValues
+    """
+
+    def __init__(self, client: BaseClient, deserialize_output: bool = True):
+        self.meta = SimpleNamespace(client=client)
+        injector = TransformationInjector()
+        events = client.meta.events
+        events.register('provide-client-params.dynamodb', copy_dynamodb_params,
+                        unique_id='dynamodb-create-params-copy')
+        events.register('before-parameter-build.dynamodb', injector.inject_condition_expressions,
+                        unique_id='dynamodb-condition-expression')
+        events.register('before-parameter-build.dynamodb', injector.inject_attribute_value_input,
+                        unique_id='dynamodb-attr-value-input')
+        if deserialize_output:
+            events.register('after-call.dynamodb', injector.inject_attribute_value_output,
+                            unique_id='dynamodb-attr-value-output')
+
+
+class DynamoDbCallStats:
+    """
+    totals only grow, readers take the difference of two snapshots
+    """
+
+    def __init__(self, dynamo_client: BaseClient):
+        self.__lock = threading.Lock()
+        self.__calls = 0
+        self.__bytes_read = 0
+        dynamo_client.meta.client.meta.events.register('after-call.dynamodb', self.__record)
+
+    def __record(self, http_response, **kwargs) -> None:
+        with self.__lock:
+            self.__calls += 1
+            self.__bytes_read += len(http_response.content or b"")
+
+    def snapshot(self) -> tuple[int, int]:
+        with self.__lock:
+            return self.__calls, self.__bytes_read
+
+
+@dataclass
+class DynamoDbCallTotals:
+    calls: int = 0
+    read_capacity_units: float = 0
+    write_capacity_units: float = 0
+    items: int = 0
+    latency_ms: float = 0
+
+
+class DynamoDbCallAccounting:
+    """
+    totals dynamo calls by the repo method making them until flushed
+    """
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__totals: dict[str, DynamoDbCallTotals] = {}
+
+    def record(self, caller: str, operation: str, response: dict, items: int, latency_ms: float) -> None:
+        capacity_units = 0
+        consumed_capacity = (response or {}).get('ConsumedCapacity') or []
+        for table_capacity in consumed_capacity if isinstance(consumed_capacity, list) else [consumed_capacity]:
+            capacity_units += table_capacity.get('CapacityUnits', 0)
+        with self.__lock:
+            totals = self.__totals.setdefault(caller, DynamoDbCallTotals())
+            totals.calls += 1
+            if operation in DYNAMODB_READ_OPERATIONS:
+                totals.read_capacity_units += capacity_units
+            else:
+                totals.write_capacity_units += capacity_units
+            totals.items += items
+            totals.latency_ms += latency_ms
+
+    def flush(self) -> dict[str, DynamoDbCallTotals]:
+        with self.__lock:
+            totals, self.__totals = self.__totals, {}
+        return totals
+
+
+@contextlib.contextmanager
+def dynamodb_caller(caller: str) -> Iterator[None]:
+    """
+    tags the dynamo calls made inside it for DynamoDbCallAccounting, calls keep the outermost tag
+    """
+    token = _DYNAMODB_CALLER.set(_DYNAMODB_CALLER.get() or caller)
+    try:
+        yield
+    finally:
+        _DYNAMODB_CALLER.reset(token)
+
+
+def dynamodb_callers(repo_type: type) -> type:
+    """
+    tags the dynamo calls of every public method of a repo with the repo and method name
+    """
+    for name, method in list(vars(repo_type).items()):
+        if inspect.isfunction(method) and not name.startswith("_"):
+            setattr(repo_type, name, _tagged(method=method, caller=f"{repo_type.__name__}.{name}"))
+    return repo_type
+
+
+def _tagged(method: Callable, caller: str) -> Callable:
+    @functools.wraps(method)
+    def tagged(*args, **kwargs):
+        with dynamodb_caller(caller=caller):
+            return method(*args, **kwargs)
+    return tagged
+
+
+def map_concurrently(executor: Executor, func: Callable[[TItem], Any], items: list[TItem]) -> Iterator[Any]:
+    """
+    executor.map keeping the dynamodb caller of the submitting thread, context variables are not copied to workers
+    """
+    return executor.map(lambda item, context: context.run(func, item),
+                        items, [contextvars.copy_context() for _ in items])
+
+
 class DynamoDbWrapper:
+    """
+    reads return items as the codec reads them unless decode is given
+    """
 
     def __init__(self, tablename: str,
-                 dynamo_client: BaseClient):
-        self.__table = dynamo_client.Table(tablename)
+                 dynamo_client: BaseClient,
+                 logger: Logger = None,
+                 query_diagnostics: bool = False,
+                 call_accounting: DynamoDbCallAccounting = None,
+                 codec: EntityCodec = None):
+        self.__tablename = tablename
+        self.__client = dynamo_client.meta.client
+        self.__table = DynamoDbClientTable(client=self.__client, name=tablename)
+        self.__logger = logger
+        self.__query_diagnostics = query_diagnostics
+        self.__call_accounting = call_accounting
+        self.__codec = codec or ObjectMapperCodec(object_mapper=ObjectMapper())
+
+    @property
+    def codec(self) -> EntityCodec:
+        return self.__codec
+
+    def __call(self, operation: str,
+               request: Callable[..., dict],
+               count_items: Callable[[dict], int] = lambda response: 1,
+               **kwargs) -> dict:
+        if self.__call_accounting is None:
+            return request(**kwargs)
+        response = None
+        start = time.perf_counter()
+        try:
+            response = request(ReturnConsumedCapacity='TOTAL', **kwargs)
+            return response
+        finally:
+            self.__call_accounting.record(caller=_DYNAMODB_CALLER.get() or "unknown",
+                                          operation=operation,
+                                          response=response,
+                                          items=0 if response is None else count_items(response),
+                                          latency_ms=(time.perf_counter() - start) * 1000)
 
     def put(self,
             item: dict,
             condition_expression: boto3.dynamodb.conditions.ConditionBase):
-        self.__table.put_item(Item=item,
-                              ConditionExpression=condition_expression)
+        self.__call("put_item", self.__table.put_item,
+                    Item=item,
+                    ConditionExpression=condition_expression)
 
     def update_item(self,
                     key: dict,
                     update_expression: str,
-                    condition_expression: boto3.dynamodb.conditions.ConditionBase,
-                    expression_attribute_values: dict):
-        self.__table.update_item(Key=key,
-                                 UpdateExpression=update_expression,
-                                 ConditionExpression=condition_expression,
-                                 ExpressionAttributeValues=expression_attribute_values)
+                    condition_expression: boto3.dynamodb.conditions.ConditionBase | str,
+                    expression_attribute_values: dict = None):
+        kwargs = {}
+        # dynamo rejects an empty ExpressionAttributeValues, e.g. for a bare REMOVE
+        if expression_attribute_values:
+            kwargs['ExpressionAttributeValues'] = expression_attribute_values
+        self.__call("update_item", self.__table.update_item,
+                    Key=key,
+                    UpdateExpression=update_expression,
+                    ConditionExpression=condition_expression,
+                    **kwargs)
+
+    def batch_put(self, items: list[dict],
+                  max_attempts: int = BATCH_WRITE_MAX_ATTEMPTS,
+                  sleep: Callable[[float], None] = time.sleep):
+        """
+        batch writes take no condition expressions, only use it for items with fresh keys
+        """
+        for start in range(0, len(items), BATCH_WRITE_MAX_ITEMS):
+            request_items = {self.__tablename: [{"PutRequest": {"Item": item}}
+                                                for item in items[start:start + BATCH_WRITE_MAX_ITEMS]]}
+            for attempt in range(max_attempts):
+                response = self.__call("batch_write_item", self.__client.batch_write_item,
+                                       count_items=lambda _: len(request_items[self.__tablename]),
+                                       RequestItems=request_items)
+                request_items = response.get('UnprocessedItems') or {}
+                if len(request_items) == 0:
+                    break
+                sleep(random.uniform(0, BATCH_WRITE_BASE_DELAY_SECONDS * 2 ** attempt))
+            if len(request_items) > 0:
+                raise DataException(f"dynamo error: {len(request_items[self.__tablename])} items left unprocessed "
+                                    f"after {max_attempts} attempts")
+
+    def get_item(self, key: dict, decode: Callable[[dict], TItem] = None) -> TItem:
+        item = self.__call("get_item", self.__table.get_item,
+                           count_items=lambda response: int('Item' in response),
+                           Key=key).get('Item')
+        return None if item is None else (decode or self.__codec.item)(item)
 
     def query(self,
               key_condition_expression: boto3.dynamodb.conditions.ConditionBase,
               expression_attribute_values: dict,
-              filter_expression: boto3.dynamodb.conditions.ConditionBase = Attr('etag').exists()) -> dict:
-        return self.__table.query(KeyConditionExpression=key_condition_expression,
-                                  FilterExpression=filter_expression,
-                                  ExpressionAttributeValues=expression_attribute_values)
+              filter_expression: boto3.dynamodb.conditions.ConditionBase = None,
+              limit: int = None,
+              exclusive_start_key: dict = None,
+              projection_expression: str = None,
+              expression_attribute_names: dict = None,
+              decode: Callable[[dict], TItem] = None) -> dict:
+        """
+        items dropped by filter_expression are still read and charged
+        """
+        kwargs = {}
+        if filter_expression is not None:
+            kwargs['FilterExpression'] = filter_expression
+        if limit is not None:
+            kwargs['Limit'] = limit
+        if exclusive_start_key is not None:
+            kwargs['ExclusiveStartKey'] = exclusive_start_key
+        if projection_expression is not None:
+            kwargs['ProjectionExpression'] = projection_expression
+        if expression_attribute_names is not None:
+            kwargs['ExpressionAttributeNames'] = expression_attribute_names
+        response = self.__call("query", self.__table.query,
+                               count_items=lambda response: response['Count'],
+                               KeyConditionExpression=key_condition_expression,
+                               ExpressionAttributeValues=expression_attribute_values,
+                               **kwargs)
+        if self.__query_diagnostics and self.__logger is not None:
+            self.__logger.log_info("dynamodb query", properties={
+                "key_condition_expression": str(key_condition_expression),
+                "filter_expression": None if filter_expression is None else str(filter_expression),
+                "scanned_count": response['ScannedCount'],
+                "count": response['Count']
+            })
+        return self.__decode_page(response=response, decode=decode)
+
+    def query_iter(self,
+                   key_condition_expression: boto3.dynamodb.conditions.ConditionBase,
+                   expression_attribute_values: dict,
+                   filter_expression: boto3.dynamodb.conditions.ConditionBase = None,
+                   limit: int = None,
+                   page_size: int = None,
+                   projection_expression: str = None,
+                   expression_attribute_names: dict = None,
+                   decode: Callable[[dict], TItem] = None) -> Iterator[TItem]:
+        returned = 0
+        exclusive_start_key = None
+        while True:
+            response = self.query(key_condition_expression=key_condition_expression,
+                                  expression_attribute_values=expression_attribute_values,
+                                  filter_expression=filter_expression,
+                                  limit=page_size,
+                                  exclusive_start_key=exclusive_start_key,
+                                  projection_expression=projection_expression,
+                                  expression_attribute_names=expression_attribute_names,
+                                  decode=decode)
+            for item in response['Items']:
+                if limit is not None and returned >= limit:
+                    return
+                returned += 1
+                yield item
+            exclusive_start_key = response.get('LastEvaluatedKey')
+            if exclusive_start_key is None or (limit is not None and returned >= limit):
+                return
+
+    def scan_iter(self, filter_expression: boto3.dynamodb.conditions.ConditionBase) -> Iterator[dict]:
+        """
+        only meant for one-off migrations
+        """
+        kwargs = {}
+        while True:
+            response = self.__decode_page(response=self.__table.scan(FilterExpression=filter_expression, **kwargs))
+            yield from response['Items']
+            if 'LastEvaluatedKey' not in response:
+                return
+            kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    def __decode_page(self, response: dict, decode: Callable[[dict], TItem] = None) -> dict:
+        page = {**response, 'Items': list(map(decode or self.__codec.item, response['Items']))}
+        if 'LastEvaluatedKey' in response:
+            page['LastEvaluatedKey'] = self.__codec.key(response['LastEvaluatedKey'])
+        return page
 
     def delete_item(self, key: dict,
                     condition_expression: boto3.dynamodb.conditions):
-        self.__table.delete_item(Key=key,
-                                 ConditionExpression=condition_expression)
+        self.__call("delete_item", self.__table.delete_item,
+                    Key=key,
+                    ConditionExpression=condition_expression)
+
+    def transact_write(self, transact_items: list[dict]):
+        """
+        condition expressions have to be strings, the condition builder is not applied to transactions
+        """
+        self.__call("transact_write_items", self.__client.transact_write_items,
+                    count_items=lambda _: len(transact_items),
+                    TransactItems=[{operation: {**request, "TableName": self.__tablename}}
+                                   for transact_item in transact_items
+                                   for operation, request in transact_item.items()])
+
+    def begin_unit_of_work(self) -> 'DynamoDbUnitOfWork':
+        return DynamoDbUnitOfWork(dynamo_wrapper=self)
+
+
+class DynamoDbUnitOfWork:
+    """
+    commits the writes of several repos in one transaction, a failed condition raises ConflictException
+    """
+
+    def __init__(self, dynamo_wrapper: DynamoDbWrapper):
+        self.__dynamo_wrapper = dynamo_wrapper
+        self.__transact_items: list[dict] = []
+        self.__after_commit: list[Callable[[], None]] = []
+
+    def put(self, item: dict,
+            condition_expression: str,
+            expression_attribute_values: dict = None):
+        request = {"Item": item, "ConditionExpression": condition_expression}
+        if expression_attribute_values is not None:
+            request["ExpressionAttributeValues"] = expression_attribute_values
+        self.__transact_items.append({"Put": request})
+
+    def update_item(self, key: dict,
+                    update_expression: str,
+                    condition_expression: str,
+                    expression_attribute_values: dict = None):
+        update = {
+            "Key": key,
+            "UpdateExpression": update_expression,
+            "ConditionExpression": condition_expression
+        }
+        if expression_attribute_values:
+            update["ExpressionAttributeValues"] = expression_attribute_values
+        self.__transact_items.append({"Update": update})
+
+    def after_commit(self, callback: Callable[[], None]):
+        """
+        runs once the transaction is sent, whether it succeeded or not
+        """
+        self.__after_commit.append(callback)
+
+    def commit(self) -> None:
+        transact_items, self.__transact_items = self.__transact_items, []
+        after_commit, self.__after_commit = self.__after_commit, []
+        try:
+            if len(transact_items) > 0:
+                with dynamodb_caller(caller="DynamoDbUnitOfWork.commit"):
+                    self.__dynamo_wrapper.transact_write(transact_items=transact_items)
+        except ClientError as e:
+            if is_conflict(e):
+                raise ConflictException()
+            raise DataException(f"dynamo error: {e.response['Error']['Code']} {e.response['Error']['Message']}")
+        finally:
+            for callback in after_commit:
+                callback()
 
 
 def get_absolute_url(property_url: str) -> str:
+    return canonicalize_property_url(property_url).url
+
+
+def legacy_absolute_url(property_url: str) -> str:
+    """
+    the url as get_absolute_url gave it before urls were canonicalized
+    """
     url = parse_url(property_url)
-    string_url = f"{'' if url.scheme is None else url.scheme}://{'' if url.host is None else url.host}{'' if url.path is None else url.path}"
-    return string_url
+    return f"{'' if url.scheme is None else url.scheme}://{'' if url.host is None else url.host}{'' if url.path is None else url.path}"
+
+
+@functools.lru_cache(maxsize=PROPERTY_URL_CACHE_MAX_SIZE)
+def canonicalize_property_url(property_url: str) -> CanonicalPropertyUrl:
+    """
+    memoized, the extension sends the same urls over and over
+    """
+    if property_url is None:
+        return CanonicalPropertyUrl(url=None)
+    url = parse_url(property_url.strip())
+    host = (url.host or "").lower().removeprefix("www.")
+    path = url.path or ""
+    for listing_pattern in PORTAL_LISTING_PATTERNS:
+        if host != listing_pattern.host:
+            continue
+        match = listing_pattern.pattern.match(path if url.query is None else f"{path}?{url.query}")
+        if match is not None:
+            return CanonicalPropertyUrl(url=match.expand(listing_pattern.canonical_url),
+                                        listing_id=f"{listing_pattern.portal}:{match['id']}")
+    scheme = (url.scheme or "https").lower()
+    port = "" if url.port is None or url.port == {"http": 80, "https": 443}.get(scheme) else f":{url.port}"
+    return CanonicalPropertyUrl(url=f"{scheme}://{host}{port}{path.rstrip('/')}")
+
+
+def is_conflict(e: ClientError) -> bool:
+    code = e.response['Error']['Code']
+    if code == TRANSACTION_CANCELED:
+        return any(reason.get('Code') == 'ConditionalCheckFailed'
+                   for reason in e.response.get('CancellationReasons', []))
+    return code == CONDITIONAL_CHECK_FAILED
+
+
+def to_string_set(item: dict, attribute: str) -> dict:
+    """
+    dynamo does not allow empty sets, an empty list means no attribute
+    """
+    values = set(item.pop(attribute, None) or [])
+    if len(values) > 0:
+        item[attribute] = values
+    return item
+
+
+def red_flag_partition_key(property_url: str) -> str:
+    """
+    a digest of the url, the url is kept in full in property_url
+    """
+    digest = hashlib.sha256(property_url.encode()).digest()[:RED_FLAG_KEY_DIGEST_BYTES]
+    return f"red_flag:{base64.urlsafe_b64encode(digest).rstrip(b'=').decode()}"
+
+
+def hex_red_flag_partition_key(property_url: str) -> str:
+    return f"red_flag:{hashlib.sha256(property_url.encode()).hexdigest()}"
+
+
+def red_flag_vote_partition_key(user_id: str) -> str:
+    return f"red_flag_vote:{user_id}"
+
+
+def red_flag_vote_id_prefix(property_url: str) -> str:
+    """
+    votes are keyed by the canonical url, red flags may still be stored under the url they were created with
+    """
+    return f"{red_flag_partition_key(get_absolute_url(property_url))}:"
+
+
+def encode_continuation_token(last_evaluated_key: dict) -> str:
+    if last_evaluated_key is None:
+        return None
+    return base64.urlsafe_b64encode(json.dumps(last_evaluated_key).encode()).decode()
+
+
+def decode_continuation_token(continuation_token: str, partition_key: str, id_prefix: str) -> dict:
+    """
+    the key has to belong to the queried partition
+    """
+    try:
+        exclusive_start_key = json.loads(base64.urlsafe_b64decode(continuation_token.encode()))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidContinuationTokenException()
+    if (not isinstance(exclusive_start_key, dict) or
+            exclusive_start_key.keys() != {"partition_key", "id"} or
+            exclusive_start_key["partition_key"] != partition_key or
+            not str(exclusive_start_key["id"]).startswith(id_prefix)):
+        raise InvalidContinuationTokenException()
+    return exclusive_start_key
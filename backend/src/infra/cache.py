@@ -0,0 +1,202 @@
+import threading
+import time
+from collections import OrderedDict
+from copy import deepcopy
+from dataclasses import dataclass
+from typing import Callable, Hashable, Generic
+
+from src.core import Group, GroupId, GroupParticipantName, GroupProperties, ContinuationToken, Property, \
+    PropertyId, TData
+from src.infra import DynamoDbUnitOfWork
+from src.infra.repositories import DynamoDbGroupRepo, DynamoDbPropertyRepo
+
+DEFAULT_GROUP_CACHE_MAX_SIZE = 256
+DEFAULT_NAME_CLAIM_CACHE_MAX_SIZE = 1024
+DEFAULT_NAME_CLAIM_CACHE_TTL_SECONDS = 300
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    size: int = 0
+
+
+class TtlLruCache(Generic[TData]):
+    """
+    bounded cache evicting the least recently used entry once full, entries expire ttl_seconds after being set
+    """
+
+    def __init__(self, max_size: int,
+                 ttl_seconds: float,
+                 clock: Callable[[], float] = time.monotonic):
+        self.__max_size = max_size
+        self.__ttl_seconds = ttl_seconds
+        self.__clock = clock
+        self.__entries: OrderedDict[Hashable, tuple[float, TData]] = OrderedDict()
+        self.__lock = threading.Lock()
+        self.__hits = 0
+        self.__misses = 0
+        self.__evictions = 0
+
+    def get(self, key: Hashable) -> TData:
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is None or entry[0] <= self.__clock():
+                if entry is not None:
+                    del self.__entries[key]
+                self.__misses += 1
+                return None
+            self.__entries.move_to_end(key)
+            self.__hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: TData) -> None:
+        with self.__lock:
+            self.__entries[key] = (self.__clock() + self.__ttl_seconds, value)
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.__max_size:
+                self.__entries.popitem(last=False)
+                self.__evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        with self.__lock:
+            self.__entries.pop(key, None)
+
+    @property
+    def stats(self) -> CacheStats:
+        with self.__lock:
+            return CacheStats(hits=self.__hits,
+                              misses=self.__misses,
+                              evictions=self.__evictions,
+                              size=len(self.__entries))
+
+
+class GroupCache(TtlLruCache[Group]):
+    """
+    groups read by this lambda process, shared by the caching group and property repos so writes can invalidate it.
+    a group is kept with its properties under its id and without them under metadata_key, both are invalidated together
+    """
+
+    @staticmethod
+    def metadata_key(_id: GroupId) -> Hashable:
+        return "metadata", _id
+
+    def invalidate(self, key: Hashable) -> None:
+        super().invalidate(key)
+        super().invalidate(self.metadata_key(key))
+
+
+class NameClaimCache(TtlLruCache[str]):
+    """
+    cognito name attributes by auth user id, saves an AdminGetUser call for users without user groups yet
+    """
+
+
+class CachingGroupRepo:
+    """
+    read-through cache in front of the group repo, writes made through this process evict the group.
+    writes from other processes are only picked up once the entry expires, stale etags still fail with a conflict.
+    pages are always read from the table, they depend on the limit and continuation token of the request
+    """
+
+    def __init__(self, group_repo: DynamoDbGroupRepo,
+                 group_cache: GroupCache):
+        self.__group_repo = group_repo
+        self.__group_cache = group_cache
+
+    def create(self, group: Group) -> None:
+        self.__group_repo.create(group=group)
+
+    def update(self, group: Group) -> None:
+        try:
+            self.__group_repo.update(group=group)
+        finally:
+            self.__group_cache.invalidate(group.id)
+
+    def get(self, _id: str) -> GroupProperties:
+        group = self.__group_cache.get(_id)
+        if group is None:
+            group = self.__group_repo.get(_id=_id)
+            self.__group_cache.set(_id, deepcopy(group))
+            return group
+        return deepcopy(group)
+
+    def get_metadata(self, _id: str) -> Group:
+        group = self.__group_cache.get(_id) or self.__group_cache.get(GroupCache.metadata_key(_id))
+        if group is None:
+            group = self.__group_repo.get_metadata(_id=_id)
+            self.__group_cache.set(GroupCache.metadata_key(_id), deepcopy(group))
+            return group
+        return Group(etag=group.etag,
+                     partition_key=group.partition_key,
+                     id=group.id,
+                     participants=deepcopy(group.participants),
+                     price_limit=group.price_limit,
+                     locations=deepcopy(group.locations))
+
+    def get_many(self, ids: list[GroupId]) -> list[GroupProperties]:
+        groups = {_id: self.__group_cache.get(_id) for _id in ids}
+        missing_ids = [_id for _id, group in groups.items() if group is None]
+        for group in self.__group_repo.get_many(ids=missing_ids):
+            self.__group_cache.set(group.id, group)
+            groups[group.id] = group
+        return [deepcopy(groups[_id]) for _id in ids]
+
+    def get_page(self, _id: str,
+                 limit: int = None,
+                 continuation_token: ContinuationToken = None) -> tuple[GroupProperties, ContinuationToken]:
+        return self.__group_repo.get_page(_id=_id, limit=limit, continuation_token=continuation_token)
+
+    def add_participant(self, participant: GroupParticipantName, group: Group,
+                        unit_of_work: DynamoDbUnitOfWork = None) -> None:
+        try:
+            self.__group_repo.add_participant(participant=participant, group=group, unit_of_work=unit_of_work)
+        finally:
+            self.__invalidate(_id=group.id, unit_of_work=unit_of_work)
+
+    def remove_participant(self, participant: GroupParticipantName, group: Group,
+                           unit_of_work: DynamoDbUnitOfWork = None) -> None:
+        try:
+            self.__group_repo.remove_participant(participant=participant, group=group, unit_of_work=unit_of_work)
+        finally:
+            self.__invalidate(_id=group.id, unit_of_work=unit_of_work)
+
+    def __invalidate(self, _id: GroupId, unit_of_work: DynamoDbUnitOfWork = None) -> None:
+        """
+        a staged write is evicted again once committed, a read in between would otherwise cache the old group
+        """
+        self.__group_cache.invalidate(_id)
+        if unit_of_work is not None:
+            unit_of_work.after_commit(lambda: self.__group_cache.invalidate(_id))
+
+
+class CachingPropertyRepo:
+    """
+    evicts the group of a created or deleted property from the group cache
+    """
+
+    def __init__(self, property_repo: DynamoDbPropertyRepo,
+                 group_cache: GroupCache):
+        self.__property_repo = property_repo
+        self.__group_cache = group_cache
+
+    def create(self, group_id: GroupId, property: Property) -> None:
+        try:
+            self.__property_repo.create(group_id=group_id, property=property)
+        finally:
+            self.__group_cache.invalidate(group_id)
+
+    def create_many(self, group_id: GroupId, properties: list[Property]) -> None:
+        try:
+            self.__property_repo.create_many(group_id=group_id, properties=properties)
+        finally:
+            self.__group_cache.invalidate(group_id)
+
+    def delete(self, group_id: GroupId, property_id: PropertyId) -> None:
+        try:
+            self.__property_repo.delete(group_id=group_id, property_id=property_id)
+        finally:
+            self.__group_cache.invalidate(group_id)
+
@@ -0,0 +1,176 @@
+from datetime import datetime
+from decimal import Decimal
+from typing import Protocol, Any
+
+from boto3.dynamodb.types import TypeDeserializer
+from formula_thoughts_web.crosscutting import ObjectMapper
+
+from src.core import Group, Property, UserGroups, RedFlag
+
+
+class EntityCodec(Protocol):
+    """
+    has to match the values the dynamo client returns
+    """
+
+    def item(self, item: dict) -> dict:
+        ...
+
+    def key(self, key: dict) -> dict:
+        ...
+
+    def item_id(self, item: dict) -> str:
+        ...
+
+    def group(self, item: dict) -> Group:
+        ...
+
+    def property(self, item: dict) -> Property:
+        ...
+
+    def user_groups(self, item: dict) -> UserGroups:
+        ...
+
+    def red_flag(self, item: dict) -> RedFlag:
+        ...
+
+
+class ObjectMapperCodec:
+
+    def __init__(self, object_mapper: ObjectMapper):
+        self.__object_mapper = object_mapper
+
+    def item(self, item: dict) -> dict:
+        return item
+
+    def key(self, key: dict) -> dict:
+        return key
+
+    def item_id(self, item: dict) -> str:
+        return item['id']
+
+    def group(self, item: dict) -> Group:
+        return self.__object_mapper.map_from_dict(_from=from_string_set(item=item, attribute="participants"),
+                                                  to=Group)
+
+    def property(self, item: dict) -> Property:
+        return self.__object_mapper.map_from_dict(_from=item, to=Property)
+
+    def user_groups(self, item: dict) -> UserGroups:
+        return self.__object_mapper.map_from_dict(_from=from_string_set(item=item, attribute="groups"),
+                                                  to=UserGroups)
+
+    def red_flag(self, item: dict) -> RedFlag:
+        red_flag = self.__object_mapper.map_from_dict(_from=item, to=RedFlag)
+        red_flag.votes = set(red_flag.votes)
+        if red_flag.vote_count is not None:
+            red_flag.vote_count = int(red_flag.vote_count)
+        return red_flag
+
+
+class AttributeValueCodec:
+    """
+    reads entities straight from the AttributeValues of a low-level client
+    """
+
+    def __init__(self):
+        self.__deserializer = TypeDeserializer()
+
+    def item(self, item: dict) -> dict:
+        return {name: self.__deserializer.deserialize(value) for name, value in item.items()}
+
+    def key(self, key: dict) -> dict:
+        return {name: _string(value) for name, value in key.items()}
+
+    def item_id(self, item: dict) -> str:
+        return item['id']['S']
+
+    def group(self, item: dict) -> Group:
+        group = Group(etag=_string(item.get('etag')),
+                      partition_key=_string(item.get('partition_key')),
+                      participants=_sorted_strings(item.get('participants')),
+                      price_limit=_decimal(item.get('price_limit')),
+                      locations=_strings(item.get('locations')))
+        if 'id' in item:
+            group.id = _string(item['id'])
+        return group
+
+    def property(self, item: dict) -> Property:
+        prop = Property(etag=_string(item.get('etag')),
+                        partition_key=_string(item.get('partition_key')),
+                        url=_string(item.get('url')),
+                        title=_string(item.get('title')),
+                        price=_decimal(item.get('price')),
+                        added_by=_string(item.get('added_by')))
+        if 'id' in item:
+            prop.id = _string(item['id'])
+        return prop
+
+    def user_groups(self, item: dict) -> UserGroups:
+        return UserGroups(etag=_string(item.get('etag')),
+                          partition_key=_string(item.get('partition_key')),
+                          id=_string(item.get('id')),
+                          name=_string(item.get('name')),
+                          groups=_sorted_strings(item.get('groups')))
+
+    def red_flag(self, item: dict) -> RedFlag:
+        red_flag = RedFlag(etag=_string(item.get('etag')),
+                           partition_key=_string(item.get('partition_key')),
+                           body=_string(item.get('body')),
+                           property_url=_string(item.get('property_url')),
+                           votes=set(_strings(item.get('votes')) or []),
+                           vote_count=_int(item.get('vote_count')),
+                           date=_datetime(item.get('date')))
+        if 'id' in item:
+            red_flag.id = _string(item['id'])
+        return red_flag
+
+
+def from_string_set(item: dict, attribute: str) -> dict:
+    """
+    items not migrated to sets yet still hold a list
+    """
+    return {**item, attribute: sorted(item.get(attribute, []))}
+
+
+def _string(value: dict) -> Any:
+    """
+    numbers stored under a string field are kept as they were written
+    """
+    if value is None or 'NULL' in value:
+        return None
+    if 'S' in value:
+        return value['S']
+    return Decimal(value['N'])
+
+
+def _decimal(value: dict) -> Decimal:
+    if value is None or 'NULL' in value:
+        return None
+    return Decimal(value['S'] if 'S' in value else value['N'])
+
+
+def _int(value: dict) -> int:
+    if value is None or 'NULL' in value:
+        return None
+    return int(value['N'] if 'N' in value else value['S'])
+
+
+def _datetime(value: dict) -> datetime:
+    if value is None or 'NULL' in value:
+        return None
+    return datetime.fromisoformat(value['S'])
+
+
+def _strings(value: dict) -> list[str]:
+    if value is None:
+        return []
+    if 'NULL' in value:
+        return None
+    if 'SS' in value:
+        return list(value['SS'])
+    return [element['S'] for element in value['L']]
+
+
+def _sorted_strings(value: dict) -> list[str]:
+    return sorted(_strings(value) or [])
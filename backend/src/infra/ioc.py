@@ -1,22 +1,87 @@
+import functools
 import os
 
 import boto3
+from formula_thoughts_web.abstractions import Logger
 from formula_thoughts_web.ioc import Container
 
-from src.core import IGroupRepo, IUserGroupsRepo, IPropertyRepo, IRedFlagRepo
-from src.infra import CognitoClientWrapper, DynamoDbWrapper, ObjectHasher
+from src.core import IGroupRepo, IUserGroupsRepo, IPropertyRepo, IRedFlagRepo, IUnitOfWorkFactory
+from src.infra import CognitoClientWrapper, DynamoDbWrapper, ObjectHasher, DynamoDbCallStats, \
+    DynamoDbCallAccounting, DynamoDbClientResource
+from src.infra.codecs import EntityCodec, AttributeValueCodec
+from src.infra.cache import GroupCache, CachingGroupRepo, CachingPropertyRepo, DEFAULT_GROUP_CACHE_MAX_SIZE, \
+    NameClaimCache, DEFAULT_NAME_CLAIM_CACHE_MAX_SIZE, DEFAULT_NAME_CLAIM_CACHE_TTL_SECONDS
 from src.infra.repositories import DynamoDbUserGroupsRepo, DynamoDbGroupRepo, DynamoDbPropertyRepo, DynamoDbRedFlagRepo
 
-cognito = boto3.client('cognito-idp', region_name='eu-west-2')
-dynamo = boto3.resource('dynamodb', region_name='eu-west-2')
+
+@functools.cache
+def cognito():
+    """
+    created on first use rather than on import, only the routes reading users pay for the cognito client
+    """
+    return boto3.client('cognito-idp', region_name='eu-west-2')
+
+
+@functools.cache
+def dynamo():
+    """
+    created on first use, and shared by every request the lambda serves. DYNAMODB_INTERFACE=client skips loading the
+    resource model and puts the low-level client behind the same interface, returning items as AttributeValues
+    """
+    if os.environ.get('DYNAMODB_INTERFACE') == 'client':
+        return DynamoDbClientResource(client=boto3.client('dynamodb', region_name='eu-west-2'),
+                                      deserialize_output=False)
+    return boto3.resource('dynamodb', region_name='eu-west-2')
+
+
+def dynamo_codec() -> EntityCodec:
+    """
+    the codec reading the items dynamo() returns, None leaves the wrapper on the object mapper
+    """
+    if os.environ.get('DYNAMODB_INTERFACE') == 'client':
+        return AttributeValueCodec()
+    return None
 
 
 def register_data_dependencies(container: Container):
-    (container.register_factory(service=CognitoClientWrapper, factory=lambda: CognitoClientWrapper(client=cognito))
+    (container.register_factory(service=CognitoClientWrapper, factory=lambda: CognitoClientWrapper(client=cognito()))
      .register_factory(service=DynamoDbWrapper,
-                       factory=lambda: DynamoDbWrapper(tablename=os.environ['DYNAMODB_TABLE'], dynamo_client=dynamo))
+                       factory=lambda: DynamoDbWrapper(
+                           tablename=os.environ['DYNAMODB_TABLE'],
+                           dynamo_client=dynamo(),
+                           logger=container.resolve(service=Logger),
+                           query_diagnostics=os.environ.get('DYNAMODB_QUERY_DIAGNOSTICS') == 'true',
+                           call_accounting=(container.resolve(service=DynamoDbCallAccounting)
+                                            if os.environ.get('DYNAMODB_CALL_ACCOUNTING') == 'true' else None),
+                           codec=dynamo_codec()))
+     .register_factory(service=IUnitOfWorkFactory, factory=lambda: container.resolve(service=DynamoDbWrapper))
+     .register(service=DynamoDbCallAccounting)
+     .register_factory(service=DynamoDbCallStats, factory=lambda: DynamoDbCallStats(dynamo_client=dynamo()))
      .register(service=ObjectHasher)
      .register(service=IUserGroupsRepo, implementation=DynamoDbUserGroupsRepo)
      .register(service=IGroupRepo, implementation=DynamoDbGroupRepo)
      .register(service=IPropertyRepo, implementation=DynamoDbPropertyRepo)
-     .register(service=IRedFlagRepo, implementation=DynamoDbRedFlagRepo))
+     .register(service=IRedFlagRepo, implementation=DynamoDbRedFlagRepo)
+     .register_factory(service=NameClaimCache,
+                       factory=lambda: NameClaimCache(
+                           max_size=int(os.environ.get('NAME_CLAIM_CACHE_MAX_SIZE',
+                                                       DEFAULT_NAME_CLAIM_CACHE_MAX_SIZE)),
+                           ttl_seconds=float(os.environ.get('NAME_CLAIM_CACHE_TTL_SECONDS',
+                                                            DEFAULT_NAME_CLAIM_CACHE_TTL_SECONDS)))))
+    register_group_cache(container=container)
+
+
+def register_group_cache(container: Container):
+    """
+    opt in by setting GROUP_CACHE_TTL_SECONDS, GROUP_CACHE_MAX_SIZE bounds the number of cached groups
+    """
+    ttl_seconds = float(os.environ.get('GROUP_CACHE_TTL_SECONDS', 0))
+    if ttl_seconds <= 0:
+        return
+    max_size = int(os.environ.get('GROUP_CACHE_MAX_SIZE', DEFAULT_GROUP_CACHE_MAX_SIZE))
+    (container.register_factory(service=GroupCache,
+                                factory=lambda: GroupCache(max_size=max_size, ttl_seconds=ttl_seconds))
+     .register(service=DynamoDbGroupRepo)
+     .register(service=DynamoDbPropertyRepo)
+     .register(service=IGroupRepo, implementation=CachingGroupRepo)
+     .register(service=IPropertyRepo, implementation=CachingPropertyRepo))
@@ -0,0 +1,316 @@
+import os
+from dataclasses import dataclass
+
+from boto3.dynamodb.conditions import Attr
+from botocore.exceptions import ClientError
+
+from src.exceptions import DataException
+from src.infra import DynamoDbWrapper, CONDITIONAL_CHECK_FAILED, LEGACY_RED_FLAG_PARTITION_KEY, \
+    red_flag_partition_key, red_flag_vote_partition_key, red_flag_vote_id_prefix, get_absolute_url, is_conflict
+
+
+@dataclass
+class RedFlagMigrationResult:
+    migrated: int = 0
+    conflicted: int = 0
+
+
+@dataclass
+class MembershipSetMigrationResult:
+    groups: int = 0
+    user_groups: int = 0
+    conflicted: int = 0
+
+
+class RedFlagMigration:
+    """
+    one-off backfill moving red flags from the shared legacy partition to a partition per property url
+
+    every item is copied before the legacy item is deleted, so readers with legacy reads on never miss a red flag.
+    items whose copy was already changed by a voter are counted as conflicted and left in place
+    """
+
+    def __init__(self, dynamo_wrapper: DynamoDbWrapper):
+        self.__dynamo_wrapper = dynamo_wrapper
+
+    def run(self) -> RedFlagMigrationResult:
+        result = RedFlagMigrationResult()
+        legacy_items = self.__dynamo_wrapper.query_iter(key_condition_expression="partition_key = :partition_key",
+                                                        expression_attribute_values={
+                                                            ':partition_key': LEGACY_RED_FLAG_PARTITION_KEY
+                                                        })
+        for legacy_item in legacy_items:
+            if self.__migrate(legacy_item=legacy_item):
+                result.migrated += 1
+            else:
+                result.conflicted += 1
+        return result
+
+    def __migrate(self, legacy_item: dict) -> bool:
+        copied_etag = legacy_item['etag']
+        while legacy_item is not None:
+            try:
+                self.__dynamo_wrapper.put(item=self.__to_sharded_item(legacy_item=legacy_item),
+                                          condition_expression=Attr('etag').not_exists() | Attr('etag').eq(copied_etag))
+            except ClientError as e:
+                self.__raise_unless_conflict(e)
+                return False
+            copied_etag = legacy_item['etag']
+            try:
+                self.__dynamo_wrapper.delete_item(key={
+                    "partition_key": legacy_item['partition_key'],
+                    "id": legacy_item['id']
+                },
+                    condition_expression=Attr('etag').eq(copied_etag))
+                return True
+            except ClientError as e:
+                self.__raise_unless_conflict(e)
+            legacy_item = next(self.__dynamo_wrapper.query_iter(
+                key_condition_expression="partition_key = :partition_key AND id = :id",
+                expression_attribute_values={
+                    ':partition_key': legacy_item['partition_key'],
+                    ':id': legacy_item['id']
+                },
+                limit=1), None)
+        return True
+
+    @staticmethod
+    def __to_sharded_item(legacy_item: dict) -> dict:
+        return {
+            **legacy_item,
+            "partition_key": red_flag_partition_key(legacy_item['property_url']),
+            "id": legacy_item['id'].rpartition(":")[2]
+        }
+
+    @staticmethod
+    def __raise_unless_conflict(e: ClientError):
+        if e.response['Error']['Code'] != CONDITIONAL_CHECK_FAILED:
+            raise DataException(f"dynamo error: {e.response['Error']['Code']} {e.response['Error']['Message']}")
+
+
+class RedFlagVoteBackfill:
+    """
+    one-off backfill of the vote items and vote_count red flag listings read instead of the voters
+
+    votes stored as a list are rewritten as a set with a vote_count unless the red flag changed meanwhile,
+    which is counted as conflicted. run it when nobody is voting, a vote removed during the backfill may get its vote
+    item back
+    """
+
+    def __init__(self, dynamo_wrapper: DynamoDbWrapper):
+        self.__dynamo_wrapper = dynamo_wrapper
+
+    def run(self) -> RedFlagMigrationResult:
+        result = RedFlagMigrationResult()
+        red_flag_items = self.__dynamo_wrapper.scan_iter(
+            filter_expression=Attr('property_url').exists() & Attr('votes').exists())
+        for red_flag_item in red_flag_items:
+            if self.__backfill(red_flag_item=red_flag_item):
+                result.migrated += 1
+            else:
+                result.conflicted += 1
+        return result
+
+    def __backfill(self, red_flag_item: dict) -> bool:
+        red_flag_id = red_flag_item['id'].split(":")[-1]
+        for user_id in red_flag_item['votes']:
+            try:
+                self.__dynamo_wrapper.put(item={
+                    "partition_key": red_flag_vote_partition_key(user_id),
+                    "id": f"{red_flag_vote_id_prefix(red_flag_item['property_url'])}{red_flag_id}",
+                    "etag": red_flag_item['etag']
+                }, condition_expression=Attr('partition_key').not_exists())
+            except ClientError as e:
+                self.__raise_unless_conflict(e)
+        if red_flag_item.get('vote_count') is not None:
+            return True
+        votes = set(red_flag_item['votes'])
+        if len(votes) == 0:
+            update_expression = "SET vote_count = :vote_count REMOVE votes"
+            expression_attribute_values = {':vote_count': 0}
+        else:
+            update_expression = "SET votes = :votes, vote_count = :vote_count"
+            expression_attribute_values = {':votes': votes, ':vote_count': len(votes)}
+        try:
+            self.__dynamo_wrapper.update_item(key={
+                "partition_key": red_flag_item['partition_key'],
+                "id": red_flag_item['id']
+            },
+                update_expression=update_expression,
+                condition_expression=Attr('etag').eq(red_flag_item['etag']),
+                expression_attribute_values=expression_attribute_values)
+            return True
+        except ClientError as e:
+            self.__raise_unless_conflict(e)
+            return False
+
+    @staticmethod
+    def __raise_unless_conflict(e: ClientError):
+        if e.response['Error']['Code'] != CONDITIONAL_CHECK_FAILED:
+            raise DataException(f"dynamo error: {e.response['Error']['Code']} {e.response['Error']['Message']}")
+
+
+class RedFlagPartitionKeyMigration:
+    """
+    one-off move of red flags to the partition red_flag_partition_key gives their canonical property url, picks up
+    red flags stored under a url that is not canonical, e.g. with a www or a trailing slash, and red flags keyed by a
+    hex digest of the url before keys became a shorter base64url digest
+
+    the red flag is moved in a transaction guarded by its etag, red flags voted on meanwhile are counted as conflicted
+    and picked up by running it again. the vote items are moved afterwards, run it after the vote backfill and when
+    nobody is voting
+    """
+
+    def __init__(self, dynamo_wrapper: DynamoDbWrapper):
+        self.__dynamo_wrapper = dynamo_wrapper
+
+    def run(self) -> RedFlagMigrationResult:
+        result = RedFlagMigrationResult()
+        red_flag_items = self.__dynamo_wrapper.scan_iter(
+            filter_expression=Attr('property_url').exists() & Attr('partition_key').begins_with("red_flag:"))
+        for red_flag_item in red_flag_items:
+            property_url = get_absolute_url(red_flag_item['property_url'])
+            if red_flag_item['partition_key'] == red_flag_partition_key(property_url):
+                continue
+            if self.__migrate(red_flag_item=red_flag_item, property_url=property_url):
+                result.migrated += 1
+            else:
+                result.conflicted += 1
+        return result
+
+    def __migrate(self, red_flag_item: dict, property_url: str) -> bool:
+        partition_key = red_flag_partition_key(property_url)
+        try:
+            self.__dynamo_wrapper.transact_write(transact_items=[
+                {
+                    "Put": {
+                        "Item": {**red_flag_item, "partition_key": partition_key, "property_url": property_url},
+                        "ConditionExpression": "attribute_not_exists(partition_key)"
+                    }
+                },
+                {
+                    "Delete": {
+                        "Key": {
+                            "partition_key": red_flag_item['partition_key'],
+                            "id": red_flag_item['id']
+                        },
+                        "ConditionExpression": "etag = :etag",
+                        "ExpressionAttributeValues": {':etag': red_flag_item['etag']}
+                    }
+                }
+            ])
+        except ClientError as e:
+            if not is_conflict(e):
+                raise DataException(f"dynamo error: {e.response['Error']['Code']} {e.response['Error']['Message']}")
+            return False
+        # votes on red flags under a hex partition key were already keyed by the compact digest of their url
+        previous_vote_id = f"{red_flag_partition_key(red_flag_item['property_url'])}:{red_flag_item['id']}"
+        vote_id = f"{partition_key}:{red_flag_item['id']}"
+        if previous_vote_id == vote_id:
+            return True
+        for user_id in red_flag_item.get('votes', []):
+            vote_partition_key = red_flag_vote_partition_key(user_id)
+            self.__dynamo_wrapper.transact_write(transact_items=[
+                {
+                    "Put": {
+                        "Item": {
+                            "partition_key": vote_partition_key,
+                            "id": vote_id,
+                            "etag": red_flag_item['etag']
+                        }
+                    }
+                },
+                {
+                    "Delete": {
+                        "Key": {
+                            "partition_key": vote_partition_key,
+                            "id": previous_vote_id
+                        }
+                    }
+                }
+            ])
+        return True
+
+
+class MembershipSetMigration:
+    """
+    one-off rewrite of group participants and user groups stored as lists into the string sets they are changed with.
+    run it before deploying the set writes, ADD and DELETE fail on a list. items changed meanwhile are counted as
+    conflicted and picked up by running it again
+    """
+
+    def __init__(self, dynamo_wrapper: DynamoDbWrapper):
+        self.__dynamo_wrapper = dynamo_wrapper
+
+    def run(self) -> MembershipSetMigrationResult:
+        result = MembershipSetMigrationResult()
+        items = self.__dynamo_wrapper.scan_iter(
+            filter_expression=Attr('participants').attribute_type('L') | Attr('groups').attribute_type('L'))
+        for item in items:
+            attribute = "participants" if 'participants' in item else "groups"
+            if not self.__migrate(item=item, attribute=attribute):
+                result.conflicted += 1
+            elif attribute == "participants":
+                result.groups += 1
+            else:
+                result.user_groups += 1
+        return result
+
+    def __migrate(self, item: dict, attribute: str) -> bool:
+        values = set(item[attribute])
+        if len(values) == 0:
+            update_expression = f"REMOVE {attribute}"
+            expression_attribute_values = None
+        else:
+            update_expression = f"SET {attribute} = :values"
+            expression_attribute_values = {':values': values}
+        try:
+            self.__dynamo_wrapper.update_item(key={
+                "partition_key": item['partition_key'],
+                "id": item['id']
+            },
+                update_expression=update_expression,
+                condition_expression=Attr('etag').eq(item['etag']),
+                expression_attribute_values=expression_attribute_values)
+            return True
+        except ClientError as e:
+            self.__raise_unless_conflict(e)
+            return False
+
+    @staticmethod
+    def __raise_unless_conflict(e: ClientError):
+        if e.response['Error']['Code'] != CONDITIONAL_CHECK_FAILED:
+            raise DataException(f"dynamo error: {e.response['Error']['Code']} {e.response['Error']['Message']}")
+
+
+def pre_deploy(dynamo_wrapper: DynamoDbWrapper) -> None:
+    membership_result = MembershipSetMigration(dynamo_wrapper=dynamo_wrapper).run()
+    print(f"rewrote the participants of {membership_result.groups} groups and the groups of "
+          f"{membership_result.user_groups} users as sets, {membership_result.conflicted} conflicted")
+
+
+def post_deploy(dynamo_wrapper: DynamoDbWrapper) -> None:
+    migration_result = RedFlagMigration(dynamo_wrapper=dynamo_wrapper).run()
+    print(f"migrated {migration_result.migrated} red flags, {migration_result.conflicted} conflicted")
+    backfill_result = RedFlagVoteBackfill(dynamo_wrapper=dynamo_wrapper).run()
+    print(f"backfilled votes of {backfill_result.migrated} red flags, {backfill_result.conflicted} conflicted")
+    partition_key_result = RedFlagPartitionKeyMigration(dynamo_wrapper=dynamo_wrapper).run()
+    print(f"moved {partition_key_result.migrated} red flags to the partition of their canonical url, "
+          f"{partition_key_result.conflicted} conflicted")
+
+
+MIGRATION_STEPS = {
+    "pre-deploy": pre_deploy,
+    "post-deploy": post_deploy
+}
+
+
+if __name__ == "__main__":
+    import sys
+
+    from src.infra.ioc import dynamo, dynamo_codec
+
+    if len(sys.argv) != 2 or sys.argv[1] not in MIGRATION_STEPS:
+        sys.exit(f"usage: python -m src.infra.migrations {{{'|'.join(MIGRATION_STEPS)}}}")
+    wrapper = DynamoDbWrapper(tablename=os.environ['DYNAMODB_TABLE'], dynamo_client=dynamo(), codec=dynamo_codec())
+    MIGRATION_STEPS[sys.argv[1]](dynamo_wrapper=wrapper)
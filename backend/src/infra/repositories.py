@@ -1,15 +1,27 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+
 from boto3.dynamodb.conditions import Attr
 from botocore.exceptions import ClientError
 from formula_thoughts_web.crosscutting import ObjectMapper, base64encode
 
 from src.core import Group, UserGroups, Property, GroupParticipantName, GroupId, GroupProperties, PropertyId, UserId, \
-    PropertyUrl, RedFlag, RedFlagId
-from src.infra import DynamoDbWrapper, ObjectHasher, CONDITIONAL_CHECK_FAILED
+    PropertyUrl, RedFlag, RedFlagId, ContinuationToken
+from src.infra import DynamoDbWrapper, ObjectHasher, CONDITIONAL_CHECK_FAILED, encode_continuation_token, \
+    decode_continuation_token, red_flag_partition_key, LEGACY_RED_FLAG_PARTITION_KEY, red_flag_vote_partition_key, \
+    red_flag_vote_id_prefix, is_conflict, DynamoDbUnitOfWork, to_string_set, legacy_absolute_url, \
+    hex_red_flag_partition_key, dynamodb_callers, map_concurrently
 from src.exceptions import UserGroupsNotFoundException, GroupNotFoundException, ConflictException, \
     GroupAlreadyExistsException, UserGroupAlreadyExistsException, PropertyNotFoundException, DataException, \
-    RedFlagAlreadyExistsException, RedFlagNotFoundException
+    RedFlagAlreadyExistsException, RedFlagNotFoundException, InvalidContinuationTokenException
+
+MAX_CONCURRENT_GROUP_QUERIES = 8
+MAX_CONCURRENT_RED_FLAG_QUERIES = 8
+RED_FLAG_LISTING_PROJECTION = "partition_key, id, body, property_url, #date, etag, vote_count"
+RED_FLAG_LISTING_ATTRIBUTE_NAMES = {"#date": "date"}
 
 
+@dynamodb_callers
 class DynamoDbPropertyRepo:
 
     def __init__(self, dynamo_wrapper: DynamoDbWrapper,
@@ -28,6 +40,19 @@ class DynamoDbPropertyRepo:
                                   condition_expression=Attr('etag').not_exists())
         property.id = property.id.split(":")[1]
 
+    def create_many(self, group_id: GroupId, properties: list[Property]) -> None:
+        """
+        writes the properties with batch writes, fresh uuids stand in for the etag not exists condition of create
+        """
+        items = []
+        for property in properties:
+            self.__partition_key_gen(property, group_id)
+            self.__id_setter(property)
+            property.etag = self.__object_hasher.hash(object=property)
+            items.append(self.__object_mapper.map_to_dict(_from=property, to=Property, preserve_decimal=True))
+            property.id = property.id.split(":")[1]
+        self.__dynamo_wrapper.batch_put(items=items)
+
     def delete(self, group_id: GroupId, property_id: PropertyId) -> None:
         try:
             self.__dynamo_wrapper.delete_item(key={
@@ -50,7 +75,12 @@ class DynamoDbPropertyRepo:
         property.id = f"property:{property.id}"
 
 
+@dynamodb_callers
 class DynamoDbGroupRepo:
+    """
+    participants are stored as a string set changed with ADD and DELETE, joins and leaves commute so they are
+    not guarded by the etag. the etag guards the price limit and locations only
+    """
 
     def __init__(self, dynamo_wrapper: DynamoDbWrapper,
                  object_mapper: ObjectMapper,
@@ -64,9 +94,10 @@ class DynamoDbGroupRepo:
             group_id = group.id
             self.__partition_key_gen(group, group_id)
             self.__id_setter(group, group_id)
+            group.participants = sorted(set(group.participants))
             group.etag = self.__object_hasher.hash(object=group)
             group_dict = self.__object_mapper.map_to_dict(_from=group, to=Group, preserve_decimal=True)
-            self.__dynamo_wrapper.put(item=group_dict,
+            self.__dynamo_wrapper.put(item=to_string_set(item=group_dict, attribute="participants"),
                                       condition_expression=Attr('etag').not_exists())
             group.id = group_id
         except ClientError as e:
@@ -82,10 +113,20 @@ class DynamoDbGroupRepo:
             prev_etag = group.etag
             self.__id_setter(group=group, group_id=group_id)
             group.etag = self.__object_hasher.hash(object=group)
-            self.__dynamo_wrapper.put(
-                item=self.__object_mapper.map_to_dict(_from=group, to=Group, preserve_decimal=True),
-                condition_expression=Attr('etag').eq(prev_etag))
+            group_dict = self.__object_mapper.map_to_dict(_from=group, to=Group, preserve_decimal=True)
             group.id = group_id
+            # participants are left out, a join or leave since the group was read must not be overwritten
+            self.__dynamo_wrapper.update_item(key={
+                "id": group_dict['id'],
+                "partition_key": group_dict['partition_key']
+            },
+                update_expression="SET price_limit = :price_limit, locations = :locations, etag = :etag",
+                condition_expression=Attr('etag').eq(prev_etag),
+                expression_attribute_values={
+                    ':price_limit': group_dict['price_limit'],
+                    ':locations': group_dict['locations'],
+                    ':etag': group.etag
+                })
         except ClientError as e:
             code = e.response['Error']['Code']
             if code == CONDITIONAL_CHECK_FAILED:
@@ -94,50 +135,81 @@ class DynamoDbGroupRepo:
                 raise DataException(f"dynamo error: {e.response['Error']['Code']} {e.response['Error']['Message']}")
 
     def get(self, _id: str) -> GroupProperties:
-        items = self.__dynamo_wrapper.query(key_condition_expression="partition_key = :partition_key",
-                                            expression_attribute_values={
-                                                ":partition_key": f"group:{_id}",
-                                            })["Items"]
-        if len(items) == 0:
-            raise GroupNotFoundException(f"Group with id {_id} not found")
-        property_dicts = []
+        codec = self.__dynamo_wrapper.codec
+        items = self.__dynamo_wrapper.query_iter(key_condition_expression="partition_key = :partition_key",
+                                                 expression_attribute_values={
+                                                     ":partition_key": f"group:{_id}",
+                                                 },
+                                                 decode=lambda item: (self.__map_back_property(property_dict=item)
+                                                                      if 'property' in codec.item_id(item)
+                                                                      else codec.group(item)))
         properties = []
         group = None
         for item in items:
-            if 'property' in item['id']:
-                property_dicts.append(item)
+            if isinstance(item, Property):
+                properties.append(item)
             else:
                 group = item
-        group = self.__object_mapper.map_from_dict(_from=group, to=Group)
-        for property_dict in property_dicts:
-            prop = self.__object_mapper.map_from_dict(_from=property_dict, to=Property)
-            prop.id = prop.id.split(":")[1]
-            properties.append(prop)
-
-        return GroupProperties(etag=group.etag,
-                               partition_key=group.partition_key,
-                               id=_id,
-                               participants=group.participants,
-                               price_limit=group.price_limit,
-                               locations=group.locations,
-                               properties=properties)
+        if group is None:
+            raise GroupNotFoundException(f"Group with id {_id} not found")
 
-    def add_participant(self, participant: GroupParticipantName, group: Group) -> None:
+        return self.__to_group_properties(_id=_id, group=group, properties=properties)
+
+    def get_metadata(self, _id: str) -> Group:
+        """
+        reads the group item only, use get when the properties of the group are needed too
+        """
+        group = self.__dynamo_wrapper.get_item(key={
+            "partition_key": f"group:{_id}",
+            "id": f"group:{_id}"
+        }, decode=self.__dynamo_wrapper.codec.group)
+        if group is None:
+            raise GroupNotFoundException(f"Group with id {_id} not found")
+        group.id = _id
+        return group
+
+    def get_page(self, _id: str,
+                 limit: int = None,
+                 continuation_token: ContinuationToken = None) -> tuple[GroupProperties, ContinuationToken]:
+        exclusive_start_key = None
+        if continuation_token is not None:
+            exclusive_start_key = decode_continuation_token(continuation_token=continuation_token,
+                                                            partition_key=f"group:{_id}",
+                                                            id_prefix="property:")
+        group = self.get_metadata(_id=_id)
+        response = self.__dynamo_wrapper.query(
+            key_condition_expression="partition_key = :partition_key AND begins_with(id, :property)",
+            expression_attribute_values={
+                ":partition_key": f"group:{_id}",
+                ":property": "property:"
+            },
+            limit=limit,
+            exclusive_start_key=exclusive_start_key,
+            decode=lambda item: self.__map_back_property(property_dict=item))
+        group_properties = self.__to_group_properties(_id=_id,
+                                                      group=group,
+                                                      properties=response["Items"])
+        return group_properties, encode_continuation_token(response.get("LastEvaluatedKey"))
+
+    def get_many(self, ids: list[GroupId]) -> list[GroupProperties]:
+        if len(ids) == 0:
+            return []
+        with ThreadPoolExecutor(max_workers=min(len(ids), MAX_CONCURRENT_GROUP_QUERIES)) as executor:
+            return list(map_concurrently(executor, lambda _id: self.get(_id=_id), ids))
+
+    def add_participant(self, participant: GroupParticipantName, group: Group,
+                        unit_of_work: DynamoDbUnitOfWork = None) -> None:
         try:
-            group.participants.append(participant)
-            old_etag = group.etag
-            new_hash = self.__object_hasher.hash(object=group)
-            group.etag = new_hash
-            self.__dynamo_wrapper.update_item(key={
+            (unit_of_work or self.__dynamo_wrapper).update_item(key={
                 "id": f"group:{group.id}",
                 "partition_key": f"group:{group.id}"
             },
-                update_expression="SET participants = list_append(participants, :i), etag = :j",
-                condition_expression=Attr("etag").eq(old_etag),
+                update_expression="ADD participants :participant",
+                condition_expression="attribute_exists(etag)",
                 expression_attribute_values={
-                    ':i': [participant],
-                    ':j': new_hash
+                    ':participant': {participant}
                 })
+            group.participants = sorted(set(group.participants) | {participant})
         except ClientError as e:
             code = e.response['Error']['Code']
             if code == CONDITIONAL_CHECK_FAILED:
@@ -145,22 +217,19 @@ class DynamoDbGroupRepo:
             else:
                 raise DataException(f"dynamo error: {e.response['Error']['Code']} {e.response['Error']['Message']}")
 
-    def remove_participant(self, participant: GroupParticipantName, group: Group) -> None:
+    def remove_participant(self, participant: GroupParticipantName, group: Group,
+                           unit_of_work: DynamoDbUnitOfWork = None) -> None:
         try:
-            index_of_participant = group.participants.index(participant)
-            group.participants.remove(participant)
-            old_etag = group.etag
-            new_hash = self.__object_hasher.hash(object=group)
-            group.etag = new_hash
-            self.__dynamo_wrapper.update_item(key={
+            (unit_of_work or self.__dynamo_wrapper).update_item(key={
                 "id": f"group:{group.id}",
                 "partition_key": f"group:{group.id}"
             },
-                update_expression=f"REMOVE participants[{index_of_participant}] SET etag = :j",
-                condition_expression=Attr("etag").eq(old_etag),
+                update_expression="DELETE participants :participant",
+                condition_expression="attribute_exists(etag)",
                 expression_attribute_values={
-                    ':j': new_hash
+                    ':participant': {participant}
                 })
+            group.participants = sorted(set(group.participants) - {participant})
         except ClientError as e:
             code = e.response['Error']['Code']
             if code == CONDITIONAL_CHECK_FAILED:
@@ -168,6 +237,21 @@ class DynamoDbGroupRepo:
             else:
                 raise DataException(f"dynamo error: {e.response['Error']['Code']} {e.response['Error']['Message']}")
 
+    def __map_back_property(self, property_dict: dict) -> Property:
+        prop = self.__dynamo_wrapper.codec.property(property_dict)
+        prop.id = prop.id.split(":")[1]
+        return prop
+
+    @staticmethod
+    def __to_group_properties(_id: GroupId, group: Group, properties: list[Property]) -> GroupProperties:
+        return GroupProperties(etag=group.etag,
+                               partition_key=group.partition_key,
+                               id=_id,
+                               participants=group.participants,
+                               price_limit=group.price_limit,
+                               locations=group.locations,
+                               properties=properties)
+
     @staticmethod
     def __partition_key_gen(group: Group, group_id):
         group.partition_key = f"group:{group_id}"
@@ -177,7 +261,11 @@ class DynamoDbGroupRepo:
         group.id = f"group:{group_id}"
 
 
+@dynamodb_callers
 class DynamoDbUserGroupsRepo:
+    """
+    groups are stored as a string set changed with ADD and DELETE, like the participants of a group
+    """
 
     def __init__(self, dynamo_wrapper: DynamoDbWrapper,
                  object_mapper: ObjectMapper,
@@ -187,23 +275,31 @@ class DynamoDbUserGroupsRepo:
         self.__dynamo_wrapper = dynamo_wrapper
 
     def get(self, _id: str) -> UserGroups:
-        items = self.__dynamo_wrapper.query(key_condition_expression="id = :id and partition_key = :partition_key",
-                                            expression_attribute_values={
-                                                ':id': _id,
-                                                ':partition_key': f"user_group:{_id}"
-                                            })["Items"]
-        if len(items) == 0:
+        user_groups = next(self.__dynamo_wrapper.query_iter(
+            key_condition_expression="id = :id and partition_key = :partition_key",
+            expression_attribute_values={
+                ':id': _id,
+                ':partition_key': f"user_group:{_id}"
+            },
+            limit=1,
+            decode=self.__dynamo_wrapper.codec.user_groups), None)
+        if user_groups is None:
             raise UserGroupsNotFoundException()
-        user_groups = items[0]
-        return self.__object_mapper.map_from_dict(_from=user_groups, to=UserGroups)
+        return user_groups
 
-    def create(self, user_groups: UserGroups) -> None:
+    def create(self, user_groups: UserGroups, unit_of_work: DynamoDbUnitOfWork = None) -> None:
         try:
             self.__partition_key_gen(user_groups=user_groups)
+            user_groups.groups = sorted(set(user_groups.groups))
             user_groups.etag = self.__object_hasher.hash(object=user_groups)
-            item = self.__object_mapper.map_to_dict(_from=user_groups, to=UserGroups)
-            self.__dynamo_wrapper.put(item=item,
-                                      condition_expression=Attr('etag').not_exists())
+            item = to_string_set(item=self.__object_mapper.map_to_dict(_from=user_groups, to=UserGroups),
+                                 attribute="groups")
+            if unit_of_work is None:
+                self.__dynamo_wrapper.put(item=item,
+                                          condition_expression=Attr('etag').not_exists())
+            else:
+                unit_of_work.put(item=item,
+                                 condition_expression="attribute_not_exists(etag)")
         except ClientError as e:
             code = e.response['Error']['Code']
             if code == CONDITIONAL_CHECK_FAILED:
@@ -211,22 +307,18 @@ class DynamoDbUserGroupsRepo:
             else:
                 raise DataException(f"dynamo error: {e.response['Error']['Code']} {e.response['Error']['Message']}")
 
-    def add_group(self, user_groups: UserGroups, group: GroupId) -> None:
+    def add_group(self, user_groups: UserGroups, group: GroupId, unit_of_work: DynamoDbUnitOfWork = None) -> None:
         try:
-            prev_etag = user_groups.etag
-            user_groups.groups.append(group)
-            new_hash = self.__object_hasher.hash(object=user_groups)
-            user_groups.etag = new_hash
-            self.__dynamo_wrapper.update_item(key={
+            (unit_of_work or self.__dynamo_wrapper).update_item(key={
                 "id": user_groups.id,
                 "partition_key": f"user_group:{user_groups.id}"
             },
-                update_expression="SET groups = list_append(groups, :i), etag = :j",
-                condition_expression=Attr("etag").eq(prev_etag),
+                update_expression="ADD groups :group",
+                condition_expression="attribute_exists(etag)",
                 expression_attribute_values={
-                    ':i': [group],
-                    ':j': new_hash
+                    ':group': {group}
                 })
+            user_groups.groups = sorted(set(user_groups.groups) | {group})
         except ClientError as e:
             code = e.response['Error']['Code']
             if code == CONDITIONAL_CHECK_FAILED:
@@ -234,22 +326,18 @@ class DynamoDbUserGroupsRepo:
             else:
                 raise DataException(f"dynamo error: {e.response['Error']['Code']} {e.response['Error']['Message']}")
 
-    def remove_group(self, user_groups: UserGroups, group: GroupId) -> None:
+    def remove_group(self, user_groups: UserGroups, group: GroupId, unit_of_work: DynamoDbUnitOfWork = None) -> None:
         try:
-            prev_etag = user_groups.etag
-            index_of_group = user_groups.groups.index(group)
-            user_groups.groups.remove(group)
-            new_hash = self.__object_hasher.hash(object=user_groups)
-            user_groups.etag = new_hash
-            self.__dynamo_wrapper.update_item(key={
+            (unit_of_work or self.__dynamo_wrapper).update_item(key={
                 "id": user_groups.id,
                 "partition_key": f"user_group:{user_groups.id}"
             },
-                update_expression=f"REMOVE groups[{index_of_group}] SET etag = :j",
-                condition_expression=Attr("etag").eq(prev_etag),
+                update_expression="DELETE groups :group",
+                condition_expression="attribute_exists(etag)",
                 expression_attribute_values={
-                    ':j': new_hash
+                    ':group': {group}
                 })
+            user_groups.groups = sorted(set(user_groups.groups) - {group})
         except ClientError as e:
             code = e.response['Error']['Code']
             if code == CONDITIONAL_CHECK_FAILED:
@@ -262,24 +350,30 @@ class DynamoDbUserGroupsRepo:
         user_groups.partition_key = f"user_group:{user_groups.id}"
 
 
+@dynamodb_callers
 class DynamoDbRedFlagRepo:
+    """
+    red flags are written to a partition per property url, while legacy_reads is on items still under a hex partition
+    key or in the shared legacy partition are read as well until they are moved by the red flag migrations
+    """
 
     def __init__(self, dynamo_wrapper: DynamoDbWrapper,
                  object_mapper: ObjectMapper,
-                 object_hasher: ObjectHasher):
+                 object_hasher: ObjectHasher,
+                 legacy_reads: bool = True):
         self.__object_hasher = object_hasher
         self.__object_mapper = object_mapper
         self.__dynamo_wrapper = dynamo_wrapper
+        self.__legacy_reads = legacy_reads
 
     def create(self, red_flag: RedFlag) -> None:
         try:
             self.__partition_key_gen(red_flag=red_flag)
-            self.__id_setter(red_flag=red_flag)
-            red_flag.etag = self.__object_hasher.hash(object=red_flag)
-            item = self.__object_mapper.map_to_dict(_from=red_flag, to=RedFlag)
+            red_flag.vote_count = len(red_flag.votes)
+            red_flag.etag = self.__object_hasher.hash(object=replace(red_flag, votes=sorted(red_flag.votes)))
+            item = self.__to_item(red_flag=red_flag)
             self.__dynamo_wrapper.put(item=item,
                                       condition_expression=Attr('etag').not_exists())
-            self.__id_re_setter(red_flag=red_flag)
         except ClientError as e:
             code = e.response['Error']['Code']
             if code == CONDITIONAL_CHECK_FAILED:
@@ -287,40 +381,190 @@ class DynamoDbRedFlagRepo:
             else:
                 raise DataException(f"dynamo error: {e.response['Error']['Code']} {e.response['Error']['Message']}")
 
-    def get_by_url(self, property_url: PropertyUrl) -> list[RedFlag]:
-        items = self.__dynamo_wrapper.query(key_condition_expression="partition_key = :partition_key AND begins_with(id, :property_url)",
-                                            expression_attribute_values={
-                                                ':partition_key': "red_flag",
-                                                ':property_url': base64encode(property_url)
-                                            })["Items"]
-        return list(map(self.__map_back_item, items))
+    def get_by_url(self, property_url: PropertyUrl, requested_property_url: PropertyUrl = None) -> list[RedFlag]:
+        return self.__query_by_url(property_url=property_url,
+                                   requested_property_urls=[] if requested_property_url is None
+                                   else [requested_property_url])
+
+    def get_listed_by_urls(self, property_urls: list[PropertyUrl],
+                           requested_property_urls: dict[PropertyUrl, list[PropertyUrl]] = None
+                           ) -> dict[PropertyUrl, list[RedFlag]]:
+        """
+        queries the urls concurrently, red flags are listed like get_page_by_url lists them, without their voters
+        """
+        if len(property_urls) == 0:
+            return {}
+        requested_property_urls = requested_property_urls or {}
+        with ThreadPoolExecutor(max_workers=min(len(property_urls), MAX_CONCURRENT_RED_FLAG_QUERIES)) as executor:
+            red_flags = map_concurrently(executor, lambda property_url: self.__query_by_url(
+                property_url=property_url,
+                requested_property_urls=requested_property_urls.get(property_url, []),
+                projection_expression=RED_FLAG_LISTING_PROJECTION,
+                expression_attribute_names=RED_FLAG_LISTING_ATTRIBUTE_NAMES), property_urls)
+            return dict(zip(property_urls, red_flags))
+
+    def __query_by_url(self, property_url: PropertyUrl,
+                       requested_property_urls: list[PropertyUrl],
+                       projection_expression: str = None,
+                       expression_attribute_names: dict = None) -> list[RedFlag]:
+        red_flags = {}
+        for partition_key, id_prefix in self.__sources(property_url=property_url,
+                                                       requested_property_urls=requested_property_urls):
+            items = self.__dynamo_wrapper.query_iter(**self.__key_condition(partition_key=partition_key,
+                                                                            id_prefix=id_prefix),
+                                                     projection_expression=projection_expression,
+                                                     expression_attribute_names=expression_attribute_names,
+                                                     decode=self.__map_back_item)
+            for red_flag in items:
+                red_flags.setdefault(red_flag.id, red_flag)
+        return list(red_flags.values())
+
+    def get_page_by_url(self, property_url: PropertyUrl,
+                        limit: int = None,
+                        continuation_token: ContinuationToken = None,
+                        requested_property_url: PropertyUrl = None) -> tuple[list[RedFlag], ContinuationToken]:
+        """
+        pages through the property url partition first and then through the legacy red flags,
+        listed red flags only carry their vote_count, use get_voted_ids to tell the red flags voted by a user
+        """
+        sources = self.__sources(property_url=property_url,
+                                 requested_property_urls=[] if requested_property_url is None
+                                 else [requested_property_url])
+        first, exclusive_start_key = 0, None
+        if continuation_token is not None:
+            first, exclusive_start_key = self.__decode_continuation_token(sources=sources,
+                                                                          continuation_token=continuation_token)
+        red_flags = []
+        for partition_key, id_prefix in sources[first:]:
+            # a key with the bare id prefix marks the start of a source
+            if exclusive_start_key is not None and exclusive_start_key["id"] == id_prefix:
+                exclusive_start_key = None
+            remaining = None if limit is None else limit - len(red_flags)
+            if remaining == 0:
+                return red_flags, encode_continuation_token(exclusive_start_key or {
+                    "partition_key": partition_key,
+                    "id": id_prefix
+                })
+            response = self.__dynamo_wrapper.query(**self.__key_condition(partition_key=partition_key,
+                                                                          id_prefix=id_prefix),
+                                                   limit=remaining,
+                                                   exclusive_start_key=exclusive_start_key,
+                                                   projection_expression=RED_FLAG_LISTING_PROJECTION,
+                                                   expression_attribute_names=RED_FLAG_LISTING_ATTRIBUTE_NAMES,
+                                                   decode=self.__map_back_item)
+            red_flags += response["Items"]
+            if response.get("LastEvaluatedKey") is not None:
+                return red_flags, encode_continuation_token(response["LastEvaluatedKey"])
+            exclusive_start_key = None
+        return red_flags, None
+
+    @staticmethod
+    def __decode_continuation_token(sources: list[tuple[str, str]],
+                                    continuation_token: ContinuationToken) -> tuple[int, dict]:
+        """
+        returns the index of the source the token continues from along with its exclusive start key
+        """
+        for index, (partition_key, id_prefix) in enumerate(sources):
+            try:
+                return index, decode_continuation_token(continuation_token=continuation_token,
+                                                        partition_key=partition_key,
+                                                        id_prefix=id_prefix)
+            except InvalidContinuationTokenException:
+                continue
+        raise InvalidContinuationTokenException()
+
+    def __sources(self, property_url: PropertyUrl,
+                  requested_property_urls: list[PropertyUrl]) -> list[tuple[str, str]]:
+        """
+        the partition keys and id prefixes the red flags of a url are read from, in paging order. legacy red flags are
+        keyed by the url as it was requested before urls were canonicalized, the canonical url is read as well for red
+        flags requested with a url that was canonical already
+        """
+        sources = [(red_flag_partition_key(property_url), "")]
+        if not self.__legacy_reads:
+            return sources
+        legacy_property_urls = list(dict.fromkeys([legacy_absolute_url(requested_property_url)
+                                                   for requested_property_url in requested_property_urls] +
+                                                  [property_url]))
+        sources += [(hex_red_flag_partition_key(legacy_property_url), "")
+                    for legacy_property_url in legacy_property_urls]
+        sources += [(LEGACY_RED_FLAG_PARTITION_KEY, f"{base64encode(legacy_property_url)}:")
+                    for legacy_property_url in legacy_property_urls]
+        return sources
+
+    @staticmethod
+    def __key_condition(partition_key: str, id_prefix: str) -> dict:
+        if id_prefix == "":
+            return {
+                "key_condition_expression": "partition_key = :partition_key",
+                "expression_attribute_values": {':partition_key': partition_key}
+            }
+        return {
+            "key_condition_expression": "partition_key = :partition_key AND begins_with(id, :id_prefix)",
+            "expression_attribute_values": {':partition_key': partition_key, ':id_prefix': id_prefix}
+        }
 
     def __map_back_item(self, red_flag_dict: dict) -> RedFlag:
-        red_flag = self.__object_mapper.map_from_dict(_from=red_flag_dict, to=RedFlag)
+        red_flag = self.__dynamo_wrapper.codec.red_flag(red_flag_dict)
         self.__id_re_setter(red_flag=red_flag)
         return red_flag
 
+    def __to_item(self, red_flag: RedFlag) -> dict:
+        """
+        votes are stored as a string set, dynamo does not allow empty sets so no votes means no attribute
+        """
+        item = self.__object_mapper.map_to_dict(_from=replace(red_flag, votes=sorted(red_flag.votes)), to=RedFlag)
+        if len(red_flag.votes) == 0:
+            item.pop('votes')
+        else:
+            item['votes'] = set(red_flag.votes)
+        return item
+
     def add_voter(self, user_id: UserId, red_flag: RedFlag) -> None:
         try:
             prev_etag = red_flag.etag
-            self.__id_setter(red_flag=red_flag)
-            red_flag.votes.append(user_id)
-            etag = self.__object_hasher.hash(red_flag)
-            red_flag.etag = etag
-            self.__dynamo_wrapper.update_item(key={
-                "id": red_flag.id,
-                "partition_key": f"red_flag"
-            },
-                update_expression="SET votes = list_append(votes, :i), etag = :j",
-                condition_expression=Attr("etag").eq(prev_etag),
-                expression_attribute_values={
-                    ':i': [user_id],
+            vote_item = self.__vote_key(user_id=user_id, red_flag=red_flag)
+            etag = self.__object_hasher.hash_change(etag=prev_etag, change="add_voter", value=user_id)
+            # red flags stored before votes became a set have no vote_count, their list is rewritten as a set once
+            if red_flag.vote_count is None:
+                update_expression = "SET votes = :votes, vote_count = :vote_count, etag = :j"
+                expression_attribute_values = {
+                    ':votes': red_flag.votes | {user_id},
+                    ':vote_count': len(red_flag.votes | {user_id}),
                     ':j': etag
-                })
+                }
+            else:
+                update_expression = "ADD votes :i, vote_count :one SET etag = :j"
+                expression_attribute_values = {
+                    ':i': {user_id},
+                    ':one': 1,
+                    ':j': etag
+                }
+            self.__id_setter(red_flag=red_flag)
+            self.__dynamo_wrapper.transact_write(transact_items=[
+                {
+                    "Update": {
+                        "Key": {
+                            "id": red_flag.id,
+                            "partition_key": red_flag.partition_key
+                        },
+                        "UpdateExpression": update_expression,
+                        "ConditionExpression": "etag = :prev_etag",
+                        "ExpressionAttributeValues": {**expression_attribute_values, ':prev_etag': prev_etag}
+                    }
+                },
+                {
+                    "Put": {
+                        "Item": {**vote_item, "etag": etag}
+                    }
+                }
+            ])
             self.__id_re_setter(red_flag)
+            red_flag.votes.add(user_id)
+            red_flag.vote_count = len(red_flag.votes)
+            red_flag.etag = etag
         except ClientError as e:
-            code = e.response['Error']['Code']
-            if code == CONDITIONAL_CHECK_FAILED:
+            if is_conflict(e):
                 raise ConflictException()
             else:
                 raise DataException(f"dynamo error: {e.response['Error']['Code']} {e.response['Error']['Message']}")
@@ -328,50 +572,113 @@ class DynamoDbRedFlagRepo:
     def remove_voter(self, user_id: UserId, red_flag: RedFlag) -> None:
         try:
             prev_etag = red_flag.etag
-            self.__id_setter(red_flag=red_flag)
-            index_to_remove_at = red_flag.votes.index(user_id)
-            red_flag.votes.remove(user_id)
-            etag = self.__object_hasher.hash(red_flag)
-            red_flag.etag = etag
-            self.__dynamo_wrapper.update_item(key={
-                "id": red_flag.id,
-                "partition_key": f"red_flag"
-            },
-                update_expression="SET votes = :votes, etag = :j",
-                condition_expression=Attr("etag").eq(prev_etag),
-                expression_attribute_values={
-                    ':votes': red_flag.votes,
+            vote_key = self.__vote_key(user_id=user_id, red_flag=red_flag)
+            votes = red_flag.votes - {user_id}
+            etag = self.__object_hasher.hash_change(etag=prev_etag, change="remove_voter", value=user_id)
+            if red_flag.vote_count is None and len(votes) == 0:
+                update_expression = "SET vote_count = :vote_count, etag = :j REMOVE votes"
+                expression_attribute_values = {
+                    ':vote_count': 0,
                     ':j': etag
-                })
+                }
+            elif red_flag.vote_count is None:
+                update_expression = "SET votes = :votes, vote_count = :vote_count, etag = :j"
+                expression_attribute_values = {
+                    ':votes': votes,
+                    ':vote_count': len(votes),
+                    ':j': etag
+                }
+            else:
+                update_expression = "DELETE votes :i ADD vote_count :minus_one SET etag = :j"
+                expression_attribute_values = {
+                    ':i': {user_id},
+                    ':minus_one': -1,
+                    ':j': etag
+                }
+            self.__id_setter(red_flag=red_flag)
+            self.__dynamo_wrapper.transact_write(transact_items=[
+                {
+                    "Update": {
+                        "Key": {
+                            "id": red_flag.id,
+                            "partition_key": red_flag.partition_key
+                        },
+                        "UpdateExpression": update_expression,
+                        "ConditionExpression": "etag = :prev_etag",
+                        "ExpressionAttributeValues": {**expression_attribute_values, ':prev_etag': prev_etag}
+                    }
+                },
+                {
+                    "Delete": {
+                        "Key": vote_key
+                    }
+                }
+            ])
             self.__id_re_setter(red_flag)
+            red_flag.votes = votes
+            red_flag.vote_count = len(votes)
+            red_flag.etag = etag
         except ClientError as e:
-            code = e.response['Error']['Code']
-            if code == CONDITIONAL_CHECK_FAILED:
+            if is_conflict(e):
                 raise ConflictException()
             else:
                 raise DataException(f"dynamo error: {e.response['Error']['Code']} {e.response['Error']['Message']}")
 
-    def get(self, property_url: PropertyUrl, _id: RedFlagId) -> RedFlag:
-        items = self.__dynamo_wrapper.query(
-            key_condition_expression="partition_key = :partition_key AND id = :id",
-            expression_attribute_values={
-                ':partition_key': "red_flag",
-                ':id': f"{base64encode(property_url)}:{_id}"
-            })["Items"]
-        if len(items) == 0:
-            raise RedFlagNotFoundException()
-        first_item = items[0]
-        red_flag = self.__map_back_item(red_flag_dict=first_item)
-        return red_flag
+    def get_voted_ids(self, user_id: UserId, property_url: PropertyUrl) -> set[RedFlagId]:
+        """
+        vote ids start with the partition key of the canonical url of their red flag, wherever the red flag is stored
+        """
+        items = self.__dynamo_wrapper.query_iter(key_condition_expression="partition_key = :partition_key AND begins_with(id, :red_flags)",
+                                                 expression_attribute_values={
+                                                     ':partition_key': red_flag_vote_partition_key(user_id),
+                                                     ':red_flags': red_flag_vote_id_prefix(property_url)
+                                                 },
+                                                 projection_expression="id",
+                                                 decode=self.__dynamo_wrapper.codec.item_id)
+        return {item_id.split(":")[-1] for item_id in items}
+
+    def get_voted_ids_by_urls(self, user_id: UserId,
+                              property_urls: list[PropertyUrl]) -> dict[PropertyUrl, set[RedFlagId]]:
+        if len(property_urls) == 0:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(len(property_urls), MAX_CONCURRENT_RED_FLAG_QUERIES)) as executor:
+            voted_ids = map_concurrently(executor, lambda property_url: self.get_voted_ids(user_id=user_id,
+                                                                             property_url=property_url),
+                                     property_urls)
+            return dict(zip(property_urls, voted_ids))
+
+    def get(self, property_url: PropertyUrl, _id: RedFlagId, requested_property_url: PropertyUrl = None) -> RedFlag:
+        for partition_key, id_prefix in self.__sources(property_url=property_url,
+                                                       requested_property_urls=[] if requested_property_url is None
+                                                       else [requested_property_url]):
+            red_flag = self.__dynamo_wrapper.get_item(key={
+                "partition_key": partition_key,
+                "id": f"{id_prefix}{_id}"
+            }, decode=self.__map_back_item)
+            if red_flag is not None:
+                return red_flag
+        raise RedFlagNotFoundException()
+
+    @staticmethod
+    def __vote_key(user_id: UserId, red_flag: RedFlag) -> dict:
+        """
+        a vote item per user and red flag, lets listings answer "voted by me" without reading the voters
+        """
+        return {
+            "partition_key": red_flag_vote_partition_key(user_id),
+            "id": f"{red_flag_vote_id_prefix(red_flag.property_url)}{red_flag.id}"
+        }
 
     @staticmethod
     def __partition_key_gen(red_flag: RedFlag):
-        red_flag.partition_key = f"red_flag"
+        red_flag.partition_key = red_flag_partition_key(red_flag.property_url)
 
     @staticmethod
     def __id_setter(red_flag: RedFlag):
-        red_flag.id = f"{base64encode(red_flag.property_url)}:{red_flag.id}"
+        if red_flag.partition_key == LEGACY_RED_FLAG_PARTITION_KEY:
+            red_flag.id = f"{base64encode(red_flag.property_url)}:{red_flag.id}"
 
     @staticmethod
     def __id_re_setter(red_flag: RedFlag):
-        red_flag.id = red_flag.id.split(":")[1]
\ No newline at end of file
+        if red_flag.partition_key == LEGACY_RED_FLAG_PARTITION_KEY:
+            red_flag.id = red_flag.id.rpartition(":")[2]
\ No newline at end of file
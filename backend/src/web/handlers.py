@@ -1,12 +1,16 @@
-from formula_thoughts_web.abstractions import Deserializer, Logger
+from typing import Callable
+
+from formula_thoughts_web.abstractions import Deserializer, Logger, ApiRequestHandler, ApplicationContext
 from formula_thoughts_web.application import TopLevelSequenceRunner
 from formula_thoughts_web.web import ApiRequestHandlerBase
 
 from src.core import IUpdateGroupSequenceBuilder, IFetchUserGroupsSequenceBuilder, ICreatePropertySequenceBuilder, \
     IDeletePropertySequenceBuilder, IAddUserToGroupSequenceBuilder, IGetCodeForGroupSequenceBuilder, \
-    IGetUserGroupByIdSequenceBuilder, ICreateGroupSequenceBuilder, ICreateRedFlagSequenceBuilder, \
+    ICreateGroupSequenceBuilder, ICreateRedFlagSequenceBuilder, \
     IGetRedFlagsSequenceBuilder, ICreateVoteForRedFlagSequenceBuilder, IDeleteVoteForRedFlagSequenceBuilder, \
-    IRemoveUserFromGroupSequenceBuilder
+    IRemoveUserFromGroupSequenceBuilder, IGetUserGroupPageByIdSequenceBuilder, ICreatePropertiesSequenceBuilder, \
+    ILookupRedFlagsSequenceBuilder
+from src.domain import JWT_CLAIMS, ROUTE_KEY
 
 
 class UpdateGroupApiHandler(ApiRequestHandlerBase):
@@ -48,6 +52,19 @@ class CreatePropertyApiHandler(ApiRequestHandlerBase):
                          logger=logger)
 
 
+class CreatePropertiesApiHandler(ApiRequestHandlerBase):
+
+    def __init__(self, sequence: ICreatePropertiesSequenceBuilder,
+                 command_pipeline: TopLevelSequenceRunner,
+                 deserializer: Deserializer,
+                 logger: Logger):
+        super().__init__(route_key='POST /groups/{group_id}/properties:batch',
+                         sequence=sequence,
+                         command_pipeline=command_pipeline,
+                         deserializer=deserializer,
+                         logger=logger)
+
+
 class FetchUserGroupsApiHandler(ApiRequestHandlerBase):
 
     def __init__(self, sequence: IFetchUserGroupsSequenceBuilder,
@@ -102,7 +119,7 @@ class GetCodeForGroupApiHandler(ApiRequestHandlerBase):
 
 class GetUserGroupByIdApiHandler(ApiRequestHandlerBase):
 
-    def __init__(self, sequence: IGetUserGroupByIdSequenceBuilder,
+    def __init__(self, sequence: IGetUserGroupPageByIdSequenceBuilder,
                  command_pipeline: TopLevelSequenceRunner,
                  deserializer: Deserializer,
                  logger: Logger):
@@ -139,6 +156,19 @@ class GetRedFlagsApiHandler(ApiRequestHandlerBase):
                          logger=logger)
 
 
+class LookupRedFlagsApiHandler(ApiRequestHandlerBase):
+
+    def __init__(self, sequence: ILookupRedFlagsSequenceBuilder,
+                 command_pipeline: TopLevelSequenceRunner,
+                 deserializer: Deserializer,
+                 logger: Logger):
+        super().__init__(route_key='POST /red-flags:lookup',
+                         sequence=sequence,
+                         command_pipeline=command_pipeline,
+                         deserializer=deserializer,
+                         logger=logger)
+
+
 class CreateVoteForRedFlagApiHandler(ApiRequestHandlerBase):
 
     def __init__(self, sequence: ICreateVoteForRedFlagSequenceBuilder,
@@ -176,3 +206,54 @@ class RemoveUserFromGroupApiHandler(ApiRequestHandlerBase):
                          command_pipeline=command_pipeline,
                          deserializer=deserializer,
                          logger=logger)
+
+
+class LazyApiRequestHandler:
+    """
+    matches on route key without building the handler, the handler and its sequence are only built when run
+    """
+
+    def __init__(self, route_key: str,
+                 factory: Callable[[], ApiRequestHandler]):
+        self.__factory = factory
+        self.__route_key = route_key
+
+    def run(self, event: dict) -> ApplicationContext:
+        return self.__factory().run(event=with_route_key(event=with_jwt_claims(event=event),
+                                                          route_key=self.__route_key))
+
+    @property
+    def route_key(self) -> str:
+        return self.__route_key
+
+
+def with_route_key(event: dict, route_key: str) -> dict:
+    """
+    the route key is set as a path param, query params of the same name are dropped so it cannot be set by a request
+    """
+    event = {**event, 'pathParameters': {**(event.get('pathParameters') or {}), ROUTE_KEY: route_key}}
+    if event.get('queryStringParameters') is not None:
+        event['queryStringParameters'] = {name: value for name, value in event['queryStringParameters'].items()
+                                          if name != ROUTE_KEY}
+    return event
+
+
+def with_jwt_claims(event: dict) -> dict:
+    """
+    params are merged into the variables along with the claims, a claim missing from the token can be set by a param
+    of the same name. the claims are also kept under JWT_CLAIMS, which params cannot set
+    """
+    event = {**event}
+    for parameters in ['pathParameters', 'queryStringParameters']:
+        if event.get(parameters) is not None:
+            event[parameters] = {name: value for name, value in event[parameters].items() if name != JWT_CLAIMS}
+    try:
+        jwt = event['requestContext']['authorizer']['jwt']
+        claims = jwt['claims']
+    except KeyError:
+        return event
+    event['requestContext'] = {**event['requestContext'], 'authorizer': {
+        **event['requestContext']['authorizer'],
+        'jwt': {**jwt, 'claims': {**claims, JWT_CLAIMS: dict(claims)}}
+    }}
+    return event
@@ -1,33 +1,47 @@
+import punq
 from formula_thoughts_web.abstractions import ApiRequestHandler
-from formula_thoughts_web.ioc import Container
+from formula_thoughts_web.ioc import Container, LambdaRunner
+from formula_thoughts_web.web import WebRunner
 
 from src.domain.errors import InvalidGroupDataError, UserGroupsNotFoundError, GroupNotFoundError, PropertyNotFoundError, \
-    RedFlagNotFoundError, InvalidPropertyDataError, InvalidRedFlagDataError, InvalidVotingStatusError
+    RedFlagNotFoundError, InvalidPropertyDataError, InvalidRedFlagDataError, InvalidVotingStatusError, \
+    InvalidPageRequestError, ConcurrentUpdateError
 from src.domain.responses import CreatedGroupResponse, ListUserGroupsResponse, SingleGroupResponse, \
     GetGroupCodeResponse, SingleGroupPropertiesResponse, PropertyCreatedResponse, SingleRedFlagResponse, \
-    CreatedRedFlagResponse, ListRedFlagsResponse
-from src.domain.sequence_builders import RemoveUserFromGroupSequenceBuilder
+    CreatedRedFlagResponse, ListRedFlagsResponse, PropertiesBatchCreatedResponse, \
+    RedFlagsByUrlResponse
 from src.web.handlers import UpdateGroupApiHandler, FetchUserGroupsApiHandler, CreatePropertyApiHandler, \
     DeletePropertyApiHandler, AddCurrentUserToGroupApiHandler, GetCodeForGroupApiHandler, GetUserGroupByIdApiHandler, \
     CreateGroupApiHandler, CreateRedFlagApiHandler, GetRedFlagsApiHandler, CreateVoteForRedFlagApiHandler, \
-    DeleteVoteForRedFlagApiHandler, RemoveUserFromGroupApiHandler
+    DeleteVoteForRedFlagApiHandler, RemoveUserFromGroupApiHandler, LazyApiRequestHandler, CreatePropertiesApiHandler, \
+    LookupRedFlagsApiHandler
+
+
+ROUTES: dict[str, type[ApiRequestHandler]] = {
+    'PUT /groups/{group_id}': UpdateGroupApiHandler,
+    'POST /groups': CreateGroupApiHandler,
+    'GET /groups': FetchUserGroupsApiHandler,
+    'POST /groups/{group_id}/properties': CreatePropertyApiHandler,
+    'POST /groups/{group_id}/properties:batch': CreatePropertiesApiHandler,
+    'DELETE /groups/{group_id}/properties/{property_id}': DeletePropertyApiHandler,
+    'POST /participants': AddCurrentUserToGroupApiHandler,
+    'GET /groups/{group_id}/code': GetCodeForGroupApiHandler,
+    'GET /groups/{group_id}': GetUserGroupByIdApiHandler,
+    'POST /red-flags': CreateRedFlagApiHandler,
+    'GET /red-flags': GetRedFlagsApiHandler,
+    'POST /red-flags:lookup': LookupRedFlagsApiHandler,
+    'POST /red-flags/{red_flag_id}/votes': CreateVoteForRedFlagApiHandler,
+    'DELETE /red-flags/{red_flag_id}/votes': DeleteVoteForRedFlagApiHandler,
+    'DELETE /groups/{group_id}/participants': RemoveUserFromGroupApiHandler
+}
 
 
 def register_web_dependencies(container: Container):
+    for route_key, handler in ROUTES.items():
+        register_route(container=container, route_key=route_key, handler=handler)
     (container
-     .register(service=ApiRequestHandler, implementation=UpdateGroupApiHandler)
-     .register(service=ApiRequestHandler, implementation=CreateGroupApiHandler)
-     .register(service=ApiRequestHandler, implementation=FetchUserGroupsApiHandler)
-     .register(service=ApiRequestHandler, implementation=CreatePropertyApiHandler)
-     .register(service=ApiRequestHandler, implementation=DeletePropertyApiHandler)
-     .register(service=ApiRequestHandler, implementation=AddCurrentUserToGroupApiHandler)
-     .register(service=ApiRequestHandler, implementation=GetCodeForGroupApiHandler)
-     .register(service=ApiRequestHandler, implementation=GetUserGroupByIdApiHandler)
-     .register(service=ApiRequestHandler, implementation=CreateRedFlagApiHandler)
-     .register(service=ApiRequestHandler, implementation=GetRedFlagsApiHandler)
-     .register(service=ApiRequestHandler, implementation=CreateVoteForRedFlagApiHandler)
-     .register(service=ApiRequestHandler, implementation=DeleteVoteForRedFlagApiHandler)
-     .register(service=ApiRequestHandler, implementation=RemoveUserFromGroupApiHandler)
+     .register(service=LambdaRunner, scope=punq.Scope.transient)
+     .register(service=WebRunner, scope=punq.Scope.transient)
      .register_status_code_mappings(mappings={
         CreatedGroupResponse: 201,
         ListUserGroupsResponse: 200,
@@ -35,15 +49,28 @@ def register_web_dependencies(container: Container):
         SingleGroupResponse: 200,
         SingleGroupPropertiesResponse: 200,
         PropertyCreatedResponse: 201,
+        PropertiesBatchCreatedResponse: 200,
         SingleRedFlagResponse: 200,
         CreatedRedFlagResponse: 201,
         ListRedFlagsResponse: 200,
+        RedFlagsByUrlResponse: 200,
         InvalidGroupDataError: 400,
         InvalidPropertyDataError: 400,
         InvalidRedFlagDataError: 400,
         InvalidVotingStatusError: 400,
+        InvalidPageRequestError: 400,
         UserGroupsNotFoundError: 404,
         GroupNotFoundError: 404,
         PropertyNotFoundError: 404,
-        RedFlagNotFoundError: 404
+        RedFlagNotFoundError: 404,
+        ConcurrentUpdateError: 409
     }))
+
+
+def register_route(container: Container, route_key: str, handler: type[ApiRequestHandler]):
+    (container
+     .register(service=handler, scope=punq.Scope.transient)
+     .register_factory(service=ApiRequestHandler,
+                       factory=lambda: LazyApiRequestHandler(route_key=route_key,
+                                                             factory=lambda: container.resolve(service=handler)),
+                       scope=punq.Scope.transient))
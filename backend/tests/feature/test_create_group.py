@@ -1,4 +1,6 @@
+import os
 from http import HTTPStatus
+from unittest.mock import patch
 
 from formula_thoughts_web.crosscutting import ObjectMapper
 from moto import mock_aws
@@ -45,3 +47,63 @@ class TestCreateGroupSequenceBuilder(FeatureTestCase):
             group = self.__group_repo.get(_id=user_groups.groups[0])
             self.assertEqual(self.__object_mapper.map_to_dict(_from=CreatedGroupResponse(group=self.__object_mapper.map(_from=group, to=Group)), to=CreatedGroupResponse),
                              response.content)
+
+    def test_create_group_twice_on_warm_container_runs_sequence_once_per_request(self):
+        # arrange
+        route = "POST /groups"
+        auth_user = "test_user"
+        self._cognito.admin_create_user(
+            UserPoolId=self._user_pool_id,
+            Username=auth_user,
+            UserAttributes=[
+                {
+                    "Name": "name",
+                    "Value": "John Doe"
+                },
+            ]
+        )
+        self._send_request(route_key=route, auth_user_id=auth_user)
+
+        # act
+        response = self._send_request(route_key=route, auth_user_id=auth_user)
+
+        # assert
+        with self.subTest(msg="response status is created"):
+            self.assertEqual(response.status, HTTPStatus.CREATED)
+
+        # assert
+        with self.subTest(msg="one group is created per request"):
+            user_groups = self.__user_group_repo.get(_id=auth_user)
+            self.assertEqual(len(user_groups.groups), 2)
+
+    def test_create_group_should_not_take_name_from_query_string(self):
+        # arrange
+        route = "POST /groups"
+        auth_user = "test_user"
+        self._cognito.admin_create_user(
+            UserPoolId=self._user_pool_id,
+            Username=auth_user,
+            UserAttributes=[
+                {
+                    "Name": "name",
+                    "Value": "John Doe"
+                },
+            ]
+        )
+
+        # act
+        with patch.dict(os.environ, {"NAME_CLAIM_SOURCE": "jwt"}):
+            response = self._send_request(route_key=route, auth_user_id=auth_user, params={
+                "name": "Jane Doe",
+                "jwt_claims": "Jane Doe"
+            })
+
+        # assert
+        with self.subTest(msg="response status is created"):
+            self.assertEqual(response.status, HTTPStatus.CREATED)
+
+        # assert
+        with self.subTest(msg="name is read from cognito as the token has no name claim"):
+            user_groups = self.__user_group_repo.get(_id=auth_user)
+            self.assertEqual((user_groups.name, self.__group_repo.get(_id=user_groups.groups[0]).participants),
+                             ("John Doe", ["John Doe"]))
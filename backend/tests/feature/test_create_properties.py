@@ -0,0 +1,83 @@
+from http import HTTPStatus
+
+from ddt import ddt, data
+from formula_thoughts_web.crosscutting import ObjectMapper
+from moto import mock_aws
+
+from src.core import IGroupRepo
+from src.domain.responses import CreatedGroupResponse
+from tests.feature import FeatureTestCase
+
+
+@ddt
+@mock_aws
+class TestCreatePropertiesSequenceBuilder(FeatureTestCase):
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.__object_mapper = self._container.resolve(service=ObjectMapper)
+        self.__group_repo = self._container.resolve(service=IGroupRepo)
+        self.__auth_user = "test_user"
+        self._cognito.admin_create_user(
+            UserPoolId=self._user_pool_id,
+            Username=self.__auth_user,
+            UserAttributes=[
+                {
+                    "Name": "name",
+                    "Value": "John Doe"
+                },
+            ]
+        )
+        create_group_response = self._send_request(route_key="POST /groups", auth_user_id=self.__auth_user)
+        self.__group = self.__object_mapper.map_from_dict(_from=create_group_response.content,
+                                                          to=CreatedGroupResponse).group
+
+    def test_create_properties_creates_valid_properties_and_reports_invalid_ones(self):
+        # act
+        response = self._send_request(route_key="POST /groups/{group_id}/properties:batch",
+                                      auth_user_id=self.__auth_user,
+                                      path_params={"group_id": self.__group.id},
+                                      body={
+                                          "properties": [
+                                              {"price": 1000, "title": "flat 1", "url": "https://test.com/1"},
+                                              {"title": "flat 2", "url": "https://test.com/2"},
+                                              {"price": 1200, "title": "flat 3", "url": "https://test.com/3"}
+                                          ]
+                                      })
+
+        # assert
+        with self.subTest(msg="response status is ok"):
+            self.assertEqual(response.status, HTTPStatus.OK)
+
+        # assert
+        with self.subTest(msg="invalid property is reported"):
+            self.assertEqual(response.content["rejected"],
+                             [{"index": 1, "errors": ["price field is a required attribute"]}])
+
+        # assert
+        with self.subTest(msg="valid properties are added to the group"):
+            group = self.__group_repo.get(_id=self.__group.id)
+            self.assertEqual(sorted(property.title for property in group.properties), ["flat 1", "flat 3"])
+
+    def test_create_properties_when_batch_is_empty(self):
+        # act
+        response = self._send_request(route_key="POST /groups/{group_id}/properties:batch",
+                                      auth_user_id=self.__auth_user,
+                                      path_params={"group_id": self.__group.id},
+                                      body={"properties": []})
+
+        # assert
+        with self.subTest(msg="response status is bad request"):
+            self.assertEqual(response.status, HTTPStatus.BAD_REQUEST)
+
+    @data("abc", ["abc"])
+    def test_create_properties_when_properties_are_not_a_list_of_objects(self, properties):
+        # act
+        response = self._send_request(route_key="POST /groups/{group_id}/properties:batch",
+                                      auth_user_id=self.__auth_user,
+                                      path_params={"group_id": self.__group.id},
+                                      body={"properties": properties})
+
+        # assert
+        with self.subTest(msg="response status is bad request"):
+            self.assertEqual(response.status, HTTPStatus.BAD_REQUEST)
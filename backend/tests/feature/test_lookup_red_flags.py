@@ -0,0 +1,64 @@
+from http import HTTPStatus
+
+from ddt import ddt, data
+from moto import mock_aws
+
+from tests.feature import FeatureTestCase
+
+
+@ddt
+@mock_aws
+class TestLookupRedFlagsSequenceBuilder(FeatureTestCase):
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.__auth_user = "test_user"
+
+    def test_lookup_red_flags_groups_red_flags_by_normalized_url(self):
+        # arrange
+        created = self._send_request(route_key="POST /red-flags",
+                                     auth_user_id=self.__auth_user,
+                                     body={"body": "mould in bathroom", "property_url": "https://test.com/1?ref=a"})
+        self._send_request(route_key="POST /red-flags/{red_flag_id}/votes",
+                           auth_user_id=self.__auth_user,
+                           path_params={"red_flag_id": created.content["red_flag"]["id"]},
+                           params={"property_url": "https://test.com/1"})
+
+        # act
+        response = self._send_request(route_key="POST /red-flags:lookup",
+                                      auth_user_id=self.__auth_user,
+                                      body={"property_urls": ["https://test.com/1?ref=b", "https://test.com/2"]})
+
+        # assert
+        with self.subTest(msg="response status is ok"):
+            self.assertEqual(response.status, HTTPStatus.OK)
+
+        # assert
+        with self.subTest(msg="red flags are grouped by normalized url"):
+            self.assertEqual([(property_red_flags["property_url"],
+                               [(red_flag["body"], red_flag["votes"], red_flag["voted_by_me"])
+                                for red_flag in property_red_flags["red_flags"]])
+                              for property_red_flags in response.content["property_red_flags"]],
+                             [("https://test.com/1", [("mould in bathroom", 1, True)]),
+                              ("https://test.com/2", [])])
+
+    def test_lookup_red_flags_when_no_urls(self):
+        # act
+        response = self._send_request(route_key="POST /red-flags:lookup",
+                                      auth_user_id=self.__auth_user,
+                                      body={"property_urls": []})
+
+        # assert
+        with self.subTest(msg="response status is bad request"):
+            self.assertEqual(response.status, HTTPStatus.BAD_REQUEST)
+
+    @data("abcdef", [123], [None], None)
+    def test_lookup_red_flags_when_urls_are_not_strings(self, property_urls):
+        # act
+        response = self._send_request(route_key="POST /red-flags:lookup",
+                                      auth_user_id=self.__auth_user,
+                                      body={"property_urls": property_urls})
+
+        # assert
+        with self.subTest(msg="response status is bad request"):
+            self.assertEqual(response.status, HTTPStatus.BAD_REQUEST)
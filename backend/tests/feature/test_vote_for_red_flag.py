@@ -0,0 +1,47 @@
+from http import HTTPStatus
+
+from boto3.dynamodb.conditions import Attr
+from formula_thoughts_web.crosscutting import base64encode
+from moto import mock_aws
+
+from src.infra import LEGACY_RED_FLAG_PARTITION_KEY
+from tests.feature import FeatureTestCase
+
+
+@mock_aws
+class TestVoteForRedFlagSequenceBuilder(FeatureTestCase):
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.__auth_user = "test_user"
+
+    def test_vote_for_legacy_red_flag_is_listed_as_voted_by_me(self):
+        # arrange
+        property_url = "https://www.test.com/1/"
+        self._dynamo_client_wrapper.put(item={"partition_key": LEGACY_RED_FLAG_PARTITION_KEY,
+                                              "id": f"{base64encode(property_url)}:abc",
+                                              "etag": "etag",
+                                              "body": "mould in bathroom",
+                                              "property_url": property_url,
+                                              "votes": [],
+                                              "date": "2024-03-01T10:15:00"},
+                                        condition_expression=Attr('etag').not_exists())
+
+        # act
+        vote_response = self._send_request(route_key="POST /red-flags/{red_flag_id}/votes",
+                                           auth_user_id=self.__auth_user,
+                                           path_params={"red_flag_id": "abc"},
+                                           params={"property_url": property_url})
+        response = self._send_request(route_key="GET /red-flags",
+                                      auth_user_id=self.__auth_user,
+                                      params={"property_url": property_url})
+
+        # assert
+        with self.subTest(msg="vote response status is ok"):
+            self.assertEqual(vote_response.status, HTTPStatus.OK)
+
+        # assert
+        with self.subTest(msg="red flag is listed as voted by me"):
+            self.assertEqual([(red_flag["id"], red_flag["votes"], red_flag["voted_by_me"])
+                              for red_flag in response.content["red_flags"]],
+                             [("abc", 1, True)])
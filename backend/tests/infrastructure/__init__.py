@@ -6,7 +6,8 @@ import boto3
 from formula_thoughts_web.crosscutting import ObjectMapper, JsonSnakeToCamelSerializer
 from moto import mock_aws
 
-from src.infra import ObjectHasher, DynamoDbWrapper
+from src.infra import ObjectHasher, DynamoDbWrapper, DynamoDbClientResource
+from src.infra.codecs import AttributeValueCodec
 
 
 @patch.dict(os.environ, {
@@ -14,13 +15,23 @@ from src.infra import ObjectHasher, DynamoDbWrapper
     "AWS_SECRET_ACCESS_KEY": "test"
 }, clear=True)
 class DynamoDbTestCase(TestCase):
+    """
+    set attribute_values to run the tests on the low-level client, with items read by AttributeValueCodec
+    """
+    attribute_values = False
 
     def setUp(self):
         self._object_mapper = ObjectMapper()
         self._object_hasher = ObjectHasher(object_mapper=self._object_mapper, serializer=JsonSnakeToCamelSerializer())
         table_name = 'flatini-test'
         self.__dynamo = boto3.resource('dynamodb', region_name="eu-west-2")
-        self._dynamo_client_wrapper = DynamoDbWrapper(dynamo_client=self.__dynamo, tablename=table_name)
+        if self.attribute_values:
+            self._dynamo_client_wrapper = DynamoDbWrapper(dynamo_client=DynamoDbClientResource(
+                client=boto3.client('dynamodb', region_name="eu-west-2"), deserialize_output=False),
+                tablename=table_name,
+                codec=AttributeValueCodec())
+        else:
+            self._dynamo_client_wrapper = DynamoDbWrapper(dynamo_client=self.__dynamo, tablename=table_name)
         self.__dynamo.create_table(TableName=table_name,
                                    KeySchema=[
                                        {
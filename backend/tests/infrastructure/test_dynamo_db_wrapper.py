@@ -0,0 +1,352 @@
+import uuid
+from decimal import Decimal
+from unittest.mock import Mock
+
+import boto3
+from boto3.dynamodb.conditions import Attr
+from moto import mock_aws
+
+from src.exceptions import DataException, ConflictException
+from src.core import Group, Property
+from src.infra import DynamoDbWrapper, DynamoDbCallStats, DynamoDbCallAccounting, DynamoDbClientResource
+from src.infra.repositories import DynamoDbGroupRepo, DynamoDbPropertyRepo
+from tests.infrastructure import DynamoDbTestCase
+
+
+@mock_aws
+class TestDynamoDbWrapper(DynamoDbTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.__partition_key = f"test:{uuid.uuid4()}"
+        self.__ids = [f"item:{i}" for i in range(5)]
+        for _id in self.__ids:
+            self._dynamo_client_wrapper.put(item={
+                "partition_key": self.__partition_key,
+                "id": _id,
+                "etag": str(uuid.uuid4())
+            }, condition_expression=Attr('etag').not_exists())
+
+    def test_query_returns_single_page(self):
+        # act
+        response = self._dynamo_client_wrapper.query(key_condition_expression="partition_key = :partition_key",
+                                                     expression_attribute_values={
+                                                         ":partition_key": self.__partition_key
+                                                     },
+                                                     limit=2)
+
+        # assert
+        with self.subTest(msg="assert only first page is returned"):
+            self.assertEqual([item["id"] for item in response["Items"]], self.__ids[:2])
+
+        # assert
+        with self.subTest(msg="assert last evaluated key is returned"):
+            self.assertIn("LastEvaluatedKey", response)
+
+    def test_query_iter_streams_every_page(self):
+        # act
+        items = self._dynamo_client_wrapper.query_iter(key_condition_expression="partition_key = :partition_key",
+                                                       expression_attribute_values={
+                                                           ":partition_key": self.__partition_key
+                                                       },
+                                                       page_size=2)
+
+        # assert
+        with self.subTest(msg="assert items from every page are returned"):
+            self.assertEqual([item["id"] for item in items], self.__ids)
+
+    def test_query_iter_stops_at_limit(self):
+        # act
+        items = self._dynamo_client_wrapper.query_iter(key_condition_expression="partition_key = :partition_key",
+                                                       expression_attribute_values={
+                                                           ":partition_key": self.__partition_key
+                                                       },
+                                                       limit=3,
+                                                       page_size=2)
+
+        # assert
+        with self.subTest(msg="assert only limit items are returned"):
+            self.assertEqual([item["id"] for item in items], self.__ids[:3])
+
+    def test_query_iter_when_no_items(self):
+        # act
+        items = self._dynamo_client_wrapper.query_iter(key_condition_expression="partition_key = :partition_key",
+                                                       expression_attribute_values={
+                                                           ":partition_key": str(uuid.uuid4())
+                                                       })
+
+        # assert
+        with self.subTest(msg="assert no items are returned"):
+            self.assertEqual(list(items), [])
+
+    def test_query_applies_filter_expression_only_when_given(self):
+        # arrange
+        self._dynamo_client_wrapper.put(item={
+            "partition_key": self.__partition_key,
+            "id": "item:without etag"
+        }, condition_expression=Attr('etag').not_exists())
+
+        # act
+        unfiltered = self._dynamo_client_wrapper.query(key_condition_expression="partition_key = :partition_key",
+                                                       expression_attribute_values={
+                                                           ":partition_key": self.__partition_key
+                                                       })
+        filtered = self._dynamo_client_wrapper.query(key_condition_expression="partition_key = :partition_key",
+                                                     expression_attribute_values={
+                                                         ":partition_key": self.__partition_key
+                                                     },
+                                                     filter_expression=Attr('etag').exists())
+
+        # assert
+        with self.subTest(msg="assert every item is returned without filter"):
+            self.assertEqual(unfiltered["Count"], 6)
+
+        # assert
+        with self.subTest(msg="assert filter drops item after it was read"):
+            self.assertEqual((filtered["ScannedCount"], filtered["Count"]), (6, 5))
+
+    def test_query_logs_scanned_and_returned_count_with_query_diagnostics(self):
+        # arrange
+        logger = Mock()
+        sut = DynamoDbWrapper(tablename='flatini-test',
+                              dynamo_client=boto3.resource('dynamodb', region_name="eu-west-2"),
+                              logger=logger,
+                              query_diagnostics=True)
+
+        # act
+        sut.query(key_condition_expression="partition_key = :partition_key",
+                  expression_attribute_values={
+                      ":partition_key": self.__partition_key
+                  },
+                  limit=2)
+
+        # assert
+        with self.subTest(msg="assert counts are logged"):
+            logger.log_info.assert_called_once_with("dynamodb query", properties={
+                "key_condition_expression": "partition_key = :partition_key",
+                "filter_expression": None,
+                "scanned_count": 2,
+                "count": 2
+            })
+
+    def test_query_does_not_log_without_query_diagnostics(self):
+        # arrange
+        logger = Mock()
+        sut = DynamoDbWrapper(tablename='flatini-test',
+                              dynamo_client=boto3.resource('dynamodb', region_name="eu-west-2"),
+                              logger=logger)
+
+        # act
+        sut.query(key_condition_expression="partition_key = :partition_key",
+                  expression_attribute_values={
+                      ":partition_key": self.__partition_key
+                  })
+
+        # assert
+        with self.subTest(msg="assert nothing is logged"):
+            logger.log_info.assert_not_called()
+
+    def test_batch_put_retries_unprocessed_items(self):
+        # arrange
+        item = {"partition_key": self.__partition_key, "id": "item:unprocessed"}
+        dynamo_client = Mock()
+        dynamo_client.meta.client.batch_write_item.side_effect = [
+            {"UnprocessedItems": {"flatini-test": [{"PutRequest": {"Item": item}}]}},
+            {"UnprocessedItems": {}}
+        ]
+        sleep = Mock()
+        sut = DynamoDbWrapper(tablename='flatini-test', dynamo_client=dynamo_client)
+
+        # act
+        sut.batch_put(items=[item], sleep=sleep)
+
+        # assert
+        with self.subTest(msg="assert unprocessed items are written again"):
+            self.assertEqual(dynamo_client.meta.client.batch_write_item.call_args_list[1].kwargs,
+                             {"RequestItems": {"flatini-test": [{"PutRequest": {"Item": item}}]}})
+
+        # assert
+        with self.subTest(msg="assert retry backs off"):
+            sleep.assert_called_once()
+
+    def test_batch_put_raises_when_items_stay_unprocessed(self):
+        # arrange
+        item = {"partition_key": self.__partition_key, "id": "item:unprocessed"}
+        dynamo_client = Mock()
+        dynamo_client.meta.client.batch_write_item.return_value = {
+            "UnprocessedItems": {"flatini-test": [{"PutRequest": {"Item": item}}]}
+        }
+        sut = DynamoDbWrapper(tablename='flatini-test', dynamo_client=dynamo_client)
+
+        # act
+        sut_call = lambda: sut.batch_put(items=[item], max_attempts=3, sleep=Mock())
+
+        # assert
+        with self.subTest(msg="assert data exception is raised"):
+            with self.assertRaises(expected_exception=DataException):
+                sut_call()
+
+        # assert
+        with self.subTest(msg="assert every attempt was made"):
+            self.assertEqual(dynamo_client.meta.client.batch_write_item.call_count, 3)
+
+    def test_update_item_omits_empty_expression_attribute_values(self):
+        # arrange
+        dynamo_client = Mock()
+        sut = DynamoDbWrapper(tablename='flatini-test', dynamo_client=dynamo_client)
+
+        # act
+        sut.update_item(key={"partition_key": self.__partition_key, "id": "item:0"},
+                        update_expression="REMOVE etag",
+                        condition_expression=Attr('etag').exists(),
+                        expression_attribute_values={})
+
+        # assert
+        with self.subTest(msg="assert no expression attribute values are sent"):
+            self.assertNotIn("ExpressionAttributeValues",
+                             dynamo_client.meta.client.update_item.call_args.kwargs)
+
+
+@mock_aws
+class TestDynamoDbCallStats(DynamoDbTestCase):
+
+    def setUp(self):
+        super().setUp()
+        dynamo = boto3.resource('dynamodb', region_name="eu-west-2")
+        self.__dynamo_wrapper = DynamoDbWrapper(tablename='flatini-test', dynamo_client=dynamo)
+        self.__sut = DynamoDbCallStats(dynamo_client=dynamo)
+
+    def test_snapshot_counts_calls_and_bytes_read(self):
+        # act
+        self.__dynamo_wrapper.put(item={"partition_key": "test:1", "id": "item:1", "etag": "1234"},
+                                  condition_expression=Attr('etag').not_exists())
+        self.__dynamo_wrapper.get_item(key={"partition_key": "test:1", "id": "item:1"})
+        calls, bytes_read = self.__sut.snapshot()
+
+        # assert
+        with self.subTest(msg="assert every call is counted"):
+            self.assertEqual(calls, 2)
+
+        # assert
+        with self.subTest(msg="assert response bytes are counted"):
+            self.assertGreater(bytes_read, len('{"Item"'))
+
+
+@mock_aws
+class TestDynamoDbCallAccounting(DynamoDbTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.__sut = DynamoDbCallAccounting()
+        dynamo_wrapper = DynamoDbWrapper(tablename='flatini-test',
+                                         dynamo_client=boto3.resource('dynamodb', region_name="eu-west-2"),
+                                         call_accounting=self.__sut)
+        self.__group_repo = DynamoDbGroupRepo(dynamo_wrapper=dynamo_wrapper,
+                                              object_mapper=self._object_mapper,
+                                              object_hasher=self._object_hasher)
+
+    def test_flush_totals_calls_by_repo_method(self):
+        # arrange
+        group = Group()
+        self.__group_repo.create(group=group)
+        self.__group_repo.get_metadata(_id=group.id)
+        self.__group_repo.get_metadata(_id=group.id)
+
+        # act
+        totals = self.__sut.flush()
+
+        # assert
+        with self.subTest(msg="assert calls are recorded against the repo method"):
+            self.assertEqual({caller: (caller_totals.calls, caller_totals.items)
+                              for caller, caller_totals in totals.items()},
+                             {"DynamoDbGroupRepo.create": (1, 1), "DynamoDbGroupRepo.get_metadata": (2, 2)})
+
+        # assert
+        with self.subTest(msg="assert consumed capacity is split into reads and writes"):
+            self.assertEqual((totals["DynamoDbGroupRepo.create"].read_capacity_units > 0,
+                              totals["DynamoDbGroupRepo.create"].write_capacity_units > 0,
+                              totals["DynamoDbGroupRepo.get_metadata"].read_capacity_units > 0),
+                             (False, True, True))
+
+        # assert
+        with self.subTest(msg="assert totals are reset"):
+            self.assertEqual(self.__sut.flush(), {})
+
+    def test_flush_records_concurrent_calls_against_the_outer_repo_method(self):
+        # arrange
+        groups = [Group(), Group()]
+        for group in groups:
+            self.__group_repo.create(group=group)
+        self.__sut.flush()
+        self.__group_repo.get_many(ids=[group.id for group in groups])
+
+        # act
+        totals = self.__sut.flush()
+
+        # assert
+        self.assertEqual(list(totals), ["DynamoDbGroupRepo.get_many"])
+
+
+@mock_aws
+class TestDynamoDbClientResource(DynamoDbTestCase):
+
+    def setUp(self):
+        super().setUp()
+        dynamo_wrapper = DynamoDbWrapper(tablename='flatini-test',
+                                         dynamo_client=DynamoDbClientResource(
+                                             client=boto3.client('dynamodb', region_name="eu-west-2")))
+        self.__group_repo = DynamoDbGroupRepo(dynamo_wrapper=dynamo_wrapper,
+                                              object_mapper=self._object_mapper,
+                                              object_hasher=self._object_hasher)
+        self.__property_repo = DynamoDbPropertyRepo(dynamo_wrapper=dynamo_wrapper,
+                                                    object_mapper=self._object_mapper,
+                                                    object_hasher=self._object_hasher)
+
+    def test_repos_read_and_write_through_client(self):
+        # arrange
+        group = Group(participants=["user_1"], price_limit=Decimal("1200.5"), locations=["SW4"])
+        self.__group_repo.create(group=group)
+        group.locations = ["SW4", "SW9"]
+        self.__group_repo.update(group=group)
+        self.__property_repo.create(group_id=group.id, property=Property(url="https://openrent.co.uk/1234"))
+
+        # act
+        group_properties = self.__group_repo.get(_id=group.id)
+
+        # assert
+        with self.subTest(msg="assert attribute values are converted to python values"):
+            self.assertEqual((group_properties.participants, group_properties.price_limit,
+                              group_properties.locations),
+                             (["user_1"], Decimal("1200.5"), ["SW4", "SW9"]))
+
+        # assert
+        with self.subTest(msg="assert items of the key condition are queried"):
+            self.assertEqual([prop.url for prop in group_properties.properties], ["https://openrent.co.uk/1234"])
+
+        # assert
+        with self.subTest(msg="assert item is read by key"):
+            self.assertEqual(self.__group_repo.get_metadata(_id=group.id).locations, ["SW4", "SW9"])
+
+    def test_conditions_are_built_from_condition_expressions(self):
+        # arrange
+        group = Group(participants=["user_1"])
+        self.__group_repo.create(group=group)
+        etag = group.etag
+        self.__group_repo.update(group=group)
+
+        # act
+        group.etag = etag
+        sut_call = lambda: self.__group_repo.update(group=group)
+
+        # assert
+        with self.subTest(msg="assert failed condition raises conflict"):
+            with self.assertRaises(expected_exception=ConflictException):
+                sut_call()
+
+
+@mock_aws
+class TestDynamoDbWrapperWithAttributeValues(TestDynamoDbWrapper):
+    attribute_values = True
+
+    def setUp(self):
+        super().setUp()
@@ -0,0 +1,400 @@
+import hashlib
+from dataclasses import replace
+from unittest.mock import patch
+
+from autofixture import AutoFixture
+from boto3.dynamodb.conditions import Attr
+from formula_thoughts_web.crosscutting import base64encode
+from moto import mock_aws
+
+from src.core import RedFlag
+from src.infra import LEGACY_RED_FLAG_PARTITION_KEY, red_flag_partition_key, red_flag_vote_partition_key
+from src.infra.migrations import RedFlagMigration, RedFlagVoteBackfill, MembershipSetMigration, \
+    RedFlagPartitionKeyMigration, pre_deploy, post_deploy
+from src.infra.repositories import DynamoDbRedFlagRepo, DynamoDbGroupRepo, DynamoDbUserGroupsRepo
+from tests.infrastructure import DynamoDbTestCase
+
+
+@mock_aws
+class TestRedFlagMigration(DynamoDbTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.__red_flag_repo = DynamoDbRedFlagRepo(dynamo_wrapper=self._dynamo_client_wrapper,
+                                                   object_mapper=self._object_mapper,
+                                                   object_hasher=self._object_hasher,
+                                                   legacy_reads=False)
+        self.__sut = RedFlagMigration(dynamo_wrapper=self._dynamo_client_wrapper)
+
+    def test_run_moves_legacy_red_flags(self):
+        # arrange
+        red_flags = AutoFixture().create_many(dto=RedFlag, ammount=3)
+        red_flags[1].property_url = red_flags[0].property_url
+        for red_flag in red_flags:
+            self.__create_legacy(red_flag=red_flag)
+
+        # act
+        result = self.__sut.run()
+
+        # assert
+        with self.subTest(msg="assert every red flag was migrated"):
+            self.assertEqual(result.migrated, 3)
+
+        # assert
+        with self.subTest(msg="assert legacy partition is empty"):
+            self.assertEqual(self.__legacy_items(), [])
+
+        # assert
+        with self.subTest(msg="assert red flags are readable without legacy reads"):
+            for red_flag in red_flags:
+                self.assertEqual(self.__red_flag_repo.get(property_url=red_flag.property_url, _id=red_flag.id).votes,
+                                 red_flag.votes)
+
+        # assert
+        with self.subTest(msg="assert red flags are grouped by property url"):
+            self.assertEqual(len(self.__red_flag_repo.get_by_url(property_url=red_flags[0].property_url)), 2)
+
+    def test_run_is_idempotent(self):
+        # arrange
+        red_flag = AutoFixture().create(dto=RedFlag)
+        self.__create_legacy(red_flag=red_flag)
+        self.__sut.run()
+
+        # act
+        result = self.__sut.run()
+
+        # assert
+        with self.subTest(msg="assert nothing is left to migrate"):
+            self.assertEqual((result.migrated, result.conflicted), (0, 0))
+
+    def test_run_leaves_legacy_red_flag_when_migrated_copy_was_changed(self):
+        # arrange
+        red_flag = AutoFixture().create(dto=RedFlag)
+        self.__create_legacy(red_flag=red_flag)
+        migrated_red_flag = AutoFixture().create(dto=RedFlag)
+        migrated_red_flag.id = red_flag.id
+        migrated_red_flag.property_url = red_flag.property_url
+        self.__red_flag_repo.create(red_flag=migrated_red_flag)
+
+        # act
+        result = self.__sut.run()
+
+        # assert
+        with self.subTest(msg="assert red flag is reported as conflicted"):
+            self.assertEqual(result.conflicted, 1)
+
+        # assert
+        with self.subTest(msg="assert legacy red flag is kept"):
+            self.assertEqual(len(self.__legacy_items()), 1)
+
+    def test_run_copies_again_when_legacy_red_flag_changed_during_migration(self):
+        # arrange
+        red_flag = AutoFixture().create(dto=RedFlag)
+        self.__create_legacy(red_flag=red_flag)
+        legacy_red_flag_repo = DynamoDbRedFlagRepo(dynamo_wrapper=self._dynamo_client_wrapper,
+                                                   object_mapper=self._object_mapper,
+                                                   object_hasher=self._object_hasher)
+        delete_item = self._dynamo_client_wrapper.delete_item
+
+        def vote_before_delete(**kwargs):
+            if len(self.__legacy_items()[0]['votes']) == len(red_flag.votes):
+                legacy_red_flag_repo.add_voter("1234", legacy_red_flag_repo.get(property_url=red_flag.property_url,
+                                                                                _id=red_flag.id))
+            delete_item(**kwargs)
+
+        # act
+        with patch.object(self._dynamo_client_wrapper, 'delete_item', side_effect=vote_before_delete):
+            result = self.__sut.run()
+
+        # assert
+        with self.subTest(msg="assert red flag was migrated"):
+            self.assertEqual(result.migrated, 1)
+
+        # assert
+        with self.subTest(msg="assert vote cast during migration is kept"):
+            self.assertEqual(self.__red_flag_repo.get(property_url=red_flag.property_url, _id=red_flag.id).votes,
+                             red_flag.votes | {"1234"})
+
+    def __create_legacy(self, red_flag: RedFlag):
+        red_flag.partition_key = LEGACY_RED_FLAG_PARTITION_KEY
+        red_flag.id = f"{base64encode(red_flag.property_url)}:{red_flag.id}"
+        red_flag.vote_count = None
+        stored_red_flag = replace(red_flag, votes=sorted(red_flag.votes))
+        red_flag.etag = stored_red_flag.etag = self._object_hasher.hash(object=stored_red_flag)
+        self._dynamo_client_wrapper.put(item=self._object_mapper.map_to_dict(_from=stored_red_flag, to=RedFlag),
+                                        condition_expression=Attr('etag').not_exists())
+        red_flag.id = red_flag.id.split(":")[1]
+
+    def __legacy_items(self) -> list[dict]:
+        return list(self._dynamo_client_wrapper.query_iter(key_condition_expression="partition_key = :partition_key",
+                                                           expression_attribute_values={
+                                                               ':partition_key': LEGACY_RED_FLAG_PARTITION_KEY
+                                                           }))
+
+
+@mock_aws
+class TestRedFlagVoteBackfill(DynamoDbTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.__red_flag_repo = DynamoDbRedFlagRepo(dynamo_wrapper=self._dynamo_client_wrapper,
+                                                   object_mapper=self._object_mapper,
+                                                   object_hasher=self._object_hasher)
+        self.__sut = RedFlagVoteBackfill(dynamo_wrapper=self._dynamo_client_wrapper)
+
+    def test_run_backfills_vote_items_and_vote_count(self):
+        # arrange
+        red_flag = AutoFixture().create(dto=RedFlag)
+        red_flag.votes = {"1234", "5678"}
+        self.__create_legacy(red_flag=red_flag)
+
+        # act
+        result = self.__sut.run()
+
+        # assert
+        with self.subTest(msg="assert red flag was backfilled"):
+            self.assertEqual(result.migrated, 1)
+
+        # assert
+        with self.subTest(msg="assert vote items were written"):
+            self.assertEqual(self.__red_flag_repo.get_voted_ids(user_id="1234", property_url=red_flag.property_url),
+                             {red_flag.id})
+
+        # assert
+        with self.subTest(msg="assert vote count is listed"):
+            red_flags, _ = self.__red_flag_repo.get_page_by_url(property_url=red_flag.property_url)
+            self.assertEqual(red_flags[0].vote_count, 2)
+
+    def test_run_keys_vote_items_by_canonical_url(self):
+        # arrange
+        red_flag = AutoFixture().create(dto=RedFlag)
+        red_flag.property_url = "https://www.test.com/1/"
+        red_flag.votes = {"1234"}
+        self.__create_legacy(red_flag=red_flag)
+
+        # act
+        self.__sut.run()
+
+        # assert
+        with self.subTest(msg="assert vote item is read by the canonical url"):
+            self.assertEqual(self.__red_flag_repo.get_voted_ids(user_id="1234", property_url="https://test.com/1"),
+                             {red_flag.id})
+
+    def test_run_is_idempotent(self):
+        # arrange
+        red_flag = AutoFixture().create(dto=RedFlag)
+        red_flag.votes = {"1234"}
+        self.__create_legacy(red_flag=red_flag)
+        self.__sut.run()
+
+        # act
+        result = self.__sut.run()
+
+        # assert
+        with self.subTest(msg="assert rerun succeeds"):
+            self.assertEqual((result.migrated, result.conflicted), (1, 0))
+
+        # assert
+        with self.subTest(msg="assert votes are kept"):
+            self.assertEqual(self.__red_flag_repo.get(property_url=red_flag.property_url, _id=red_flag.id).votes,
+                             {"1234"})
+
+    def __create_legacy(self, red_flag: RedFlag):
+        red_flag.partition_key = LEGACY_RED_FLAG_PARTITION_KEY
+        red_flag.id = f"{base64encode(red_flag.property_url)}:{red_flag.id}"
+        red_flag.vote_count = None
+        stored_red_flag = replace(red_flag, votes=sorted(red_flag.votes))
+        red_flag.etag = stored_red_flag.etag = self._object_hasher.hash(object=stored_red_flag)
+        self._dynamo_client_wrapper.put(item=self._object_mapper.map_to_dict(_from=stored_red_flag, to=RedFlag),
+                                        condition_expression=Attr('etag').not_exists())
+        red_flag.id = red_flag.id.split(":")[1]
+
+
+@mock_aws
+class TestRedFlagPartitionKeyMigration(DynamoDbTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.__red_flag_repo = DynamoDbRedFlagRepo(dynamo_wrapper=self._dynamo_client_wrapper,
+                                                   object_mapper=self._object_mapper,
+                                                   object_hasher=self._object_hasher,
+                                                   legacy_reads=False)
+        self.__sut = RedFlagPartitionKeyMigration(dynamo_wrapper=self._dynamo_client_wrapper)
+
+    def test_run_moves_red_flags_to_canonical_url(self):
+        # arrange
+        red_flag = AutoFixture().create(dto=RedFlag)
+        red_flag.property_url = "https://www.rightmove.co.uk/properties/123456/"
+        red_flag.votes = {"1234"}
+        self.__red_flag_repo.create(red_flag=red_flag)
+        # votes used to be keyed by the url the red flag was stored with
+        self._dynamo_client_wrapper.put(item={"partition_key": red_flag_vote_partition_key("1234"),
+                                              "id": f"{red_flag_partition_key(red_flag.property_url)}:{red_flag.id}",
+                                              "etag": red_flag.etag},
+                                        condition_expression=Attr('etag').not_exists())
+
+        # act
+        result = self.__sut.run()
+
+        # assert
+        with self.subTest(msg="assert red flag was migrated"):
+            self.assertEqual((result.migrated, result.conflicted), (1, 0))
+
+        # assert
+        with self.subTest(msg="assert red flag is read by its canonical url"):
+            migrated_red_flag = self.__red_flag_repo.get(property_url="https://rightmove.co.uk/properties/123456",
+                                                         _id=red_flag.id)
+            self.assertEqual((migrated_red_flag.property_url, migrated_red_flag.votes),
+                             ("https://rightmove.co.uk/properties/123456", {"1234"}))
+
+        # assert
+        with self.subTest(msg="assert vote item was moved"):
+            self.assertEqual([item['id'] for item in self.__vote_items(user_id="1234")],
+                             [f"{red_flag_partition_key('https://rightmove.co.uk/properties/123456')}:{red_flag.id}"])
+
+        # assert
+        with self.subTest(msg="assert nothing is left under the old url"):
+            self.assertEqual(self.__red_flag_repo.get_by_url(property_url=red_flag.property_url), [])
+
+    def test_run_moves_red_flags_keyed_by_hex_digest(self):
+        # arrange
+        red_flag = AutoFixture().create(dto=RedFlag)
+        red_flag.property_url = "https://website.com/flat/1408"
+        self.__red_flag_repo.create(red_flag=red_flag)
+        item = self.__red_flag_items()[0]
+        self._dynamo_client_wrapper.delete_item(key={"partition_key": item['partition_key'], "id": item['id']},
+                                                condition_expression=Attr('etag').exists())
+        hex_partition_key = f"red_flag:{hashlib.sha256(red_flag.property_url.encode()).hexdigest()}"
+        self._dynamo_client_wrapper.put(item={**item, "partition_key": hex_partition_key},
+                                        condition_expression=Attr('etag').not_exists())
+
+        # act
+        result = self.__sut.run()
+
+        # assert
+        with self.subTest(msg="assert red flag was migrated"):
+            self.assertEqual(result.migrated, 1)
+
+        # assert
+        with self.subTest(msg="assert red flag is keyed by the compact digest"):
+            self.assertEqual([(item['partition_key'], item['id']) for item in self.__red_flag_items()],
+                             [(red_flag_partition_key(red_flag.property_url), red_flag.id)])
+
+    def test_run_is_idempotent(self):
+        # arrange
+        red_flag = AutoFixture().create(dto=RedFlag)
+        red_flag.property_url = "https://www.website.com/flat/1408/"
+        self.__red_flag_repo.create(red_flag=red_flag)
+        self.__sut.run()
+
+        # act
+        result = self.__sut.run()
+
+        # assert
+        with self.subTest(msg="assert nothing is left to migrate"):
+            self.assertEqual((result.migrated, result.conflicted), (0, 0))
+
+    def __red_flag_items(self) -> list[dict]:
+        return list(self._dynamo_client_wrapper.scan_iter(filter_expression=Attr('property_url').exists()))
+
+    def __vote_items(self, user_id: str) -> list[dict]:
+        return list(self._dynamo_client_wrapper.query_iter(key_condition_expression="partition_key = :partition_key",
+                                                           expression_attribute_values={
+                                                               ':partition_key': red_flag_vote_partition_key(user_id)
+                                                           }))
+
+
+@mock_aws
+class TestMembershipSetMigration(DynamoDbTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.__group_repo = DynamoDbGroupRepo(dynamo_wrapper=self._dynamo_client_wrapper,
+                                              object_mapper=self._object_mapper,
+                                              object_hasher=self._object_hasher)
+        self.__user_groups_repo = DynamoDbUserGroupsRepo(dynamo_wrapper=self._dynamo_client_wrapper,
+                                                         object_mapper=self._object_mapper,
+                                                         object_hasher=self._object_hasher)
+        self.__sut = MembershipSetMigration(dynamo_wrapper=self._dynamo_client_wrapper)
+
+    def test_run_rewrites_lists_as_sets(self):
+        # arrange
+        self.__put_legacy(item={"partition_key": "group:1", "id": "group:1", "etag": "etag",
+                                "participants": ["Dom Farr", "Aidan Gannon"], "locations": []})
+        self.__put_legacy(item={"partition_key": "user_group:1234", "id": "1234", "etag": "etag",
+                                "name": "Dom Farr", "groups": []})
+
+        # act
+        result = self.__sut.run()
+
+        # assert
+        with self.subTest(msg="assert the group and the user groups were migrated"):
+            self.assertEqual((result.groups, result.user_groups, result.conflicted), (1, 1, 0))
+
+        # assert
+        with self.subTest(msg="assert participants can be added to the set"):
+            group = self.__group_repo.get_metadata(_id="1")
+            self.__group_repo.add_participant(participant="Bob Marley", group=group)
+            self.assertEqual(self.__group_repo.get_metadata(_id="1").participants,
+                             ["Aidan Gannon", "Bob Marley", "Dom Farr"])
+
+        # assert
+        with self.subTest(msg="assert groups can be added to the set"):
+            user_groups = self.__user_groups_repo.get(_id="1234")
+            self.__user_groups_repo.add_group(user_groups=user_groups, group="1")
+            self.assertEqual(self.__user_groups_repo.get(_id="1234").groups, ["1"])
+
+    def test_run_is_idempotent(self):
+        # arrange
+        self.__put_legacy(item={"partition_key": "group:1", "id": "group:1", "etag": "etag",
+                                "participants": ["Dom Farr"], "locations": []})
+        self.__sut.run()
+
+        # act
+        result = self.__sut.run()
+
+        # assert
+        with self.subTest(msg="assert nothing is left to migrate"):
+            self.assertEqual((result.groups, result.user_groups, result.conflicted), (0, 0, 0))
+
+    def __put_legacy(self, item: dict):
+        self._dynamo_client_wrapper.put(item=item, condition_expression=Attr('etag').not_exists())
+
+
+@mock_aws
+class TestMigrationSteps(DynamoDbTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self._dynamo_client_wrapper.put(item={"partition_key": "group:1", "id": "group:1", "etag": "etag",
+                                              "participants": ["Dom Farr"], "locations": []},
+                                        condition_expression=Attr('etag').not_exists())
+        self._dynamo_client_wrapper.put(item={"partition_key": "red_flag:legacy", "id": "5678", "etag": "etag",
+                                              "body": "damp", "property_url": "https://www.website.com/flat/1408/"},
+                                        condition_expression=Attr('etag').not_exists())
+
+    def test_pre_deploy_only_rewrites_memberships(self):
+        # act
+        with patch("builtins.print"):
+            pre_deploy(dynamo_wrapper=self._dynamo_client_wrapper)
+
+        # assert
+        with self.subTest(msg="assert participants are a set and the red flag is left in place"):
+            self.assertEqual((self.__item("group:1")["participants"], self.__item("red_flag:legacy")["id"]),
+                             ({"Dom Farr"}, "5678"))
+
+    def test_post_deploy_only_moves_red_flags(self):
+        # act
+        with patch("builtins.print"):
+            post_deploy(dynamo_wrapper=self._dynamo_client_wrapper)
+
+        # assert
+        with self.subTest(msg="assert red flag is moved and participants are left a list"):
+            self.assertEqual((self.__item("group:1")["participants"], self.__item("red_flag:legacy")),
+                             (["Dom Farr"], None))
+
+    def __item(self, partition_key: str) -> dict:
+        return next(self._dynamo_client_wrapper.query_iter(key_condition_expression="partition_key = :partition_key",
+                                                           expression_attribute_values={
+                                                               ':partition_key': partition_key
+                                                           }), None)
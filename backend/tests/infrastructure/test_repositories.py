@@ -1,20 +1,22 @@
 import os
 import uuid
 from copy import copy, deepcopy
+from dataclasses import replace
 from decimal import Decimal
 from unittest.mock import patch
 
 from autofixture import AutoFixture
-from formula_thoughts_web.crosscutting import JsonSnakeToCamelSerializer, ObjectMapper
+from boto3.dynamodb.conditions import Attr
+from formula_thoughts_web.crosscutting import JsonSnakeToCamelSerializer, ObjectMapper, base64encode
 from moto import mock_aws
 
 from src.core import Group, UserGroups, Property, GroupProperties, RedFlag
-from src.infra import ObjectHasher
+from src.infra import ObjectHasher, LEGACY_RED_FLAG_PARTITION_KEY, get_absolute_url, hex_red_flag_partition_key
 from src.infra.repositories import DynamoDbUserGroupsRepo, DynamoDbGroupRepo, \
     DynamoDbPropertyRepo, DynamoDbRedFlagRepo
 from src.exceptions import GroupNotFoundException, UserGroupsNotFoundException, ConflictException, \
     GroupAlreadyExistsException, UserGroupAlreadyExistsException, PropertyNotFoundException, \
-    RedFlagAlreadyExistsException, RedFlagNotFoundException
+    RedFlagAlreadyExistsException, RedFlagNotFoundException, InvalidContinuationTokenException
 from tests.infrastructure import DynamoDbTestCase
 
 
@@ -78,22 +80,22 @@ class TestUserGroupRepo(DynamoDbTestCase):
         with self.subTest(msg="assert document was updated"):
             self.assertEqual(received_user_groups.groups, user_groups.groups)
 
-    def test_add_group_adds_group_to_user_groups_when_precondition_check_fails(self):
+    def test_add_group_keeps_groups_added_concurrently(self):
         # arrange
         user_groups = AutoFixture().create(dto=UserGroups)
         self.__sut.create(user_groups=user_groups)
-        old_etag = user_groups.etag
-        group_to_add = str(uuid.uuid4())
+        stale_user_groups = deepcopy(user_groups)
+        first_group = str(uuid.uuid4())
+        second_group = str(uuid.uuid4())
+        self.__sut.add_group(group=first_group, user_groups=user_groups)
 
         # act
-        self.__sut.add_group(group=str(uuid.uuid4()), user_groups=user_groups)
-        user_groups.etag = old_etag
-        sut_call = lambda: self.__sut.add_group(group=group_to_add, user_groups=user_groups)
+        self.__sut.add_group(group=second_group, user_groups=stale_user_groups)
 
         # assert
-        with self.subTest(msg="assert conflict exception is thrown"):
-            with self.assertRaises(expected_exception=ConflictException):
-                sut_call()
+        with self.subTest(msg="assert both groups were added"):
+            self.assertEqual(self.__sut.get(_id=user_groups.id).groups,
+                             sorted({*user_groups.groups, second_group}))
 
     def test_add_group_adds_group_to_user_groups_when_not_found(self):
         # arrange
@@ -126,7 +128,7 @@ class TestUserGroupRepo(DynamoDbTestCase):
         with self.subTest(msg="assert document was updated to remove new user group"):
             self.assertNotIn(member=group_to_remove, container=received_user_groups.groups)
 
-    def test_remove_group_raises_conflict_when_precondition_check_fails(self):
+    def test_remove_group_keeps_groups_removed_concurrently(self):
         # arrange
         user_groups = AutoFixture().create(dto=UserGroups)
         group_to_remove = str(uuid.uuid4())
@@ -134,17 +136,34 @@ class TestUserGroupRepo(DynamoDbTestCase):
         user_groups.groups.append(group_to_remove)
         user_groups.groups.append(second_group_to_remove)
         self.__sut.create(user_groups=user_groups)
-        old_etag = user_groups.etag
+        stale_user_groups = deepcopy(user_groups)
+        self.__sut.remove_group(group=group_to_remove, user_groups=user_groups)
 
         # act
-        self.__sut.remove_group(group=group_to_remove, user_groups=user_groups)
-        user_groups.etag = old_etag
-        sut_call = lambda: self.__sut.remove_group(group=second_group_to_remove, user_groups=user_groups)
+        self.__sut.remove_group(group=second_group_to_remove, user_groups=stale_user_groups)
 
         # assert
-        with self.subTest(msg="assert conflict exception is thrown"):
-            with self.assertRaises(expected_exception=ConflictException):
-                sut_call()
+        with self.subTest(msg="assert both groups were removed"):
+            self.assertEqual(self.__sut.get(_id=user_groups.id).groups,
+                             sorted(set(user_groups.groups) - {second_group_to_remove}))
+
+    def test_remove_group_removes_attribute_with_last_group(self):
+        # arrange
+        user_groups = AutoFixture().create(dto=UserGroups)
+        user_groups.groups = ["group_id"]
+        self.__sut.create(user_groups=user_groups)
+
+        # act
+        self.__sut.remove_group(group="group_id", user_groups=user_groups)
+
+        # assert
+        with self.subTest(msg="assert user groups are read back empty"):
+            self.assertEqual(self.__sut.get(_id=user_groups.id).groups, [])
+
+        # assert
+        with self.subTest(msg="assert group can be added again"):
+            self.__sut.add_group(group="group_id", user_groups=user_groups)
+            self.assertEqual(self.__sut.get(_id=user_groups.id).groups, ["group_id"])
 
     def test_remove_group_raises_conflict_when_not_found(self):
         # arrange
@@ -250,6 +269,142 @@ class TestGroupRepo(DynamoDbTestCase):
             with self.assertRaises(expected_exception=GroupNotFoundException):
                 sut_call()
 
+    def test_get_metadata_reads_group_without_properties(self):
+        # arrange
+        group = AutoFixture().create(dto=Group)
+        group_id = group.id
+        self.__sut.create(group=group)
+        self.__prop_repo.create(group_id=group_id, property=AutoFixture().create(dto=Property))
+        expected_group = Group(etag=group.etag,
+                               partition_key=f"group:{group_id}",
+                               id=group_id,
+                               participants=group.participants,
+                               price_limit=group.price_limit,
+                               locations=group.locations)
+
+        # act
+        group_metadata = self.__sut.get_metadata(_id=group_id)
+
+        # assert
+        with self.subTest(msg="assert group is read without properties"):
+            self.assertEqual(group_metadata, expected_group)
+
+    def test_get_metadata_should_throw_when_not_found(self):
+        # act
+        sut_call = lambda: self.__sut.get_metadata(_id=str(uuid.uuid4()))
+
+        # assert
+        with self.subTest(msg="assert group was not found"):
+            with self.assertRaises(expected_exception=GroupNotFoundException):
+                sut_call()
+
+    def test_get_page_pages_through_group_properties(self):
+        # arrange
+        group = AutoFixture().create(dto=Group)
+        group.etag = None
+        self.__sut.create(group=group)
+        props: list[Property] = AutoFixture().create_many(dto=Property, ammount=5)
+        for prop in props:
+            self.__prop_repo.create(group_id=group.id, property=prop)
+
+        # act
+        first_page, continuation_token = self.__sut.get_page(_id=group.id, limit=3)
+        second_page, last_continuation_token = self.__sut.get_page(_id=group.id,
+                                                                   limit=3,
+                                                                   continuation_token=continuation_token)
+
+        # assert
+        with self.subTest(msg="assert first page is limited"):
+            self.assertEqual(len(first_page.properties), 3)
+
+        # assert
+        with self.subTest(msg="assert group is returned with every page"):
+            self.assertEqual((first_page.id, second_page.id), (group.id, group.id))
+
+        # assert
+        with self.subTest(msg="assert pages contain every property once"):
+            self.assertEqual(sorted(prop.id for prop in first_page.properties + second_page.properties),
+                             sorted(prop.id for prop in props))
+
+        # assert
+        with self.subTest(msg="assert last page has no continuation token"):
+            self.assertIsNone(last_continuation_token)
+
+    def test_get_page_should_throw_when_continuation_token_is_for_another_group(self):
+        # arrange
+        groups = AutoFixture().create_many(dto=Group, ammount=2)
+        for group in groups:
+            self.__sut.create(group=group)
+            for prop in AutoFixture().create_many(dto=Property, ammount=2):
+                self.__prop_repo.create(group_id=group.id, property=prop)
+        _, continuation_token = self.__sut.get_page(_id=groups[0].id, limit=1)
+
+        # act
+        sut_call = lambda: self.__sut.get_page(_id=groups[1].id, continuation_token=continuation_token)
+
+        # assert
+        with self.subTest(msg="assert continuation token is invalid"):
+            with self.assertRaises(expected_exception=InvalidContinuationTokenException):
+                sut_call()
+
+    def test_get_page_should_throw_when_continuation_token_is_malformed(self):
+        # arrange
+        group = AutoFixture().create(dto=Group)
+        self.__sut.create(group=group)
+
+        # act
+        sut_call = lambda: self.__sut.get_page(_id=group.id, continuation_token="not a token")
+
+        # assert
+        with self.subTest(msg="assert continuation token is invalid"):
+            with self.assertRaises(expected_exception=InvalidContinuationTokenException):
+                sut_call()
+
+    def test_get_page_should_throw_when_not_found(self):
+        # act
+        sut_call = lambda: self.__sut.get_page(_id=str(uuid.uuid4()))
+
+        # assert
+        with self.subTest(msg="assert group was not found"):
+            with self.assertRaises(expected_exception=GroupNotFoundException):
+                sut_call()
+
+    def test_get_many_group_properties_keeps_order_of_ids(self):
+        # arrange
+        groups = AutoFixture().create_many(dto=Group, ammount=5)
+        for group in groups:
+            group.etag = None
+            self.__sut.create(group=group)
+        ids = list(reversed([group.id for group in groups]))
+
+        # act
+        group_properties_list = self.__sut.get_many(ids=ids)
+
+        # assert
+        with self.subTest(msg="assert groups are returned in order of ids"):
+            self.assertEqual([group_properties.id for group_properties in group_properties_list], ids)
+
+    def test_get_many_group_properties_when_no_ids(self):
+        # act
+        group_properties_list = self.__sut.get_many(ids=[])
+
+        # assert
+        with self.subTest(msg="assert no groups are returned"):
+            self.assertEqual(group_properties_list, [])
+
+    def test_get_many_group_properties_should_throw_when_one_not_found(self):
+        # arrange
+        group = AutoFixture().create(dto=Group)
+        self.__sut.create(group=group)
+
+        # act
+        sut_call = lambda: self.__sut.get_many(ids=[group.id, str(uuid.uuid4())])
+
+        # assert
+        with self.subTest(msg="assert group was not found"):
+            with self.assertRaises(expected_exception=GroupNotFoundException):
+                sut_call()
+
     def test_update_group(self):
         # arrange
         group = AutoFixture().create(dto=Group)
@@ -336,7 +491,7 @@ class TestGroupRepo(DynamoDbTestCase):
 
         # assert
         with self.subTest(msg="assert participant was added"):
-            self.assertEqual([*prev_participants, participant_to_add], group.participants)
+            self.assertEqual(sorted([*prev_participants, participant_to_add]), group.participants)
 
     def test_add_participant_when_not_found(self):
         # arrange
@@ -351,21 +506,39 @@ class TestGroupRepo(DynamoDbTestCase):
             with self.assertRaises(expected_exception=ConflictException):
                 sut_call()
 
-    def test_add_participant_when_conflict(self):
+    def test_add_participant_keeps_participants_added_concurrently(self):
         # arrange
         group = AutoFixture().create(dto=Group)
         self.__sut.create(group=group)
-        old_etag = group.etag
+        stale_group = deepcopy(group)
         self.__sut.add_participant(participant="Aidan Gannon", group=group)
-        group.etag = old_etag
 
         # act
-        sut_call = lambda: self.__sut.add_participant(participant="Dom Farr", group=group)
+        self.__sut.add_participant(participant="Dom Farr", group=stale_group)
 
         # assert
-        with self.subTest(msg="assert conflict is raised"):
-            with self.assertRaises(expected_exception=ConflictException):
-                sut_call()
+        with self.subTest(msg="assert both participants were added"):
+            self.assertEqual(self.__sut.get_metadata(_id=group.id).participants,
+                             sorted({*group.participants, "Dom Farr"}))
+
+    def test_update_keeps_participants_added_since_read(self):
+        # arrange
+        group = AutoFixture().create(dto=Group)
+        self.__sut.create(group=group)
+        stale_group = deepcopy(group)
+        self.__sut.add_participant(participant="Aidan Gannon", group=group)
+        stale_group.price_limit = Decimal("123.4")
+
+        # act
+        self.__sut.update(group=stale_group)
+
+        # assert
+        with self.subTest(msg="assert participant is kept"):
+            self.assertIn(member="Aidan Gannon", container=self.__sut.get_metadata(_id=group.id).participants)
+
+        # assert
+        with self.subTest(msg="assert price limit was updated"):
+            self.assertEqual(self.__sut.get_metadata(_id=group.id).price_limit, Decimal("123.4"))
 
     def test_remove_participant(self):
         # arrange
@@ -411,23 +584,22 @@ class TestGroupRepo(DynamoDbTestCase):
             with self.assertRaises(expected_exception=ConflictException):
                 sut_call()
 
-    def test_remove_participant_when_conflict(self):
+    def test_remove_participant_keeps_participants_removed_concurrently(self):
         # arrange
         group = AutoFixture().create(dto=Group)
         group.participants.append("Aidan Gannon")
         group.participants.append("Dom Farr")
         self.__sut.create(group=group)
-        old_etag = group.etag
+        stale_group = deepcopy(group)
         self.__sut.remove_participant(participant="Aidan Gannon", group=group)
-        group.etag = old_etag
 
         # act
-        sut_call = lambda: self.__sut.remove_participant(participant="Dom Farr", group=group)
+        self.__sut.remove_participant(participant="Dom Farr", group=stale_group)
 
         # assert
-        with self.subTest(msg="assert conflict is raised"):
-            with self.assertRaises(expected_exception=ConflictException):
-                sut_call()
+        with self.subTest(msg="assert both participants were removed"):
+            self.assertEqual(self.__sut.get_metadata(_id=group.id).participants,
+                             sorted(set(group.participants) - {"Dom Farr"}))
 
 
 @mock_aws
@@ -459,6 +631,30 @@ class TestPropertyRepo(DynamoDbTestCase):
         with self.subTest(msg="assert property is not found"):
             self.assertEqual(len(items), 0)
 
+    def test_create_many_writes_every_property(self):
+        # arrange
+        properties = AutoFixture().create_many(dto=Property, ammount=30)
+        group_id = str(uuid.uuid4())
+
+        # act
+        self.__sut.create_many(group_id=group_id, properties=properties)
+
+        items = list(self._dynamo_client_wrapper.query_iter(
+            key_condition_expression="partition_key = :partition_key",
+            expression_attribute_values={
+                ":partition_key": f"group:{group_id}"
+            }))
+
+        # assert
+        with self.subTest(msg="assert every property is written"):
+            self.assertEqual(sorted(item["id"] for item in items),
+                             sorted(f"property:{property.id}" for property in properties))
+
+        # assert
+        with self.subTest(msg="assert properties are returned with their etag and plain id"):
+            self.assertEqual({(property.id, property.etag) for property in properties},
+                             {(item["id"].split(":")[1], item["etag"]) for item in items})
+
     def test_delete_property_when_not_found(self):
         # act
         sut_call = lambda: self.__sut.delete(group_id=str(uuid.uuid4()), property_id=str(uuid.uuid4()))
@@ -515,6 +711,319 @@ class TestRedFlagsRepo(DynamoDbTestCase):
         with self.subTest(msg="assert red flags are empty"):
             self.assertEqual(len(red_flags), 0)
 
+    def test_get_page_by_url_pages_through_red_flags(self):
+        # arrange
+        property_url = "https://example.com/properties/1"
+        red_flags = AutoFixture().create_many(dto=RedFlag, ammount=5)
+        for red_flag in red_flags:
+            red_flag.property_url = property_url
+            self.__sut.create(red_flag=red_flag)
+
+        # act
+        first_page, continuation_token = self.__sut.get_page_by_url(property_url=property_url, limit=3)
+        second_page, last_continuation_token = self.__sut.get_page_by_url(property_url=property_url,
+                                                                          limit=3,
+                                                                          continuation_token=continuation_token)
+
+        # assert
+        with self.subTest(msg="assert first page is limited"):
+            self.assertEqual(len(first_page), 3)
+
+        # assert
+        with self.subTest(msg="assert pages contain every red flag once"):
+            self.assertEqual(sorted(red_flag.id for red_flag in first_page + second_page),
+                             sorted(red_flag.id for red_flag in red_flags))
+
+        # assert
+        with self.subTest(msg="assert last page has no continuation token"):
+            self.assertIsNone(last_continuation_token)
+
+    def test_get_page_by_url_should_throw_when_continuation_token_is_for_another_url(self):
+        # arrange
+        red_flags = AutoFixture().create_many(dto=RedFlag, ammount=2)
+        for red_flag in red_flags:
+            red_flag.property_url = "https://example.com/properties/1"
+            self.__sut.create(red_flag=red_flag)
+        _, continuation_token = self.__sut.get_page_by_url(property_url="https://example.com/properties/1", limit=1)
+
+        # act
+        sut_call = lambda: self.__sut.get_page_by_url(property_url="https://example.com/properties/2",
+                                                      continuation_token=continuation_token)
+
+        # assert
+        with self.subTest(msg="assert continuation token is invalid"):
+            with self.assertRaises(expected_exception=InvalidContinuationTokenException):
+                sut_call()
+
+    def test_create_writes_to_property_url_partition(self):
+        # arrange
+        red_flags = AutoFixture().create_many(dto=RedFlag, ammount=2)
+        red_flags[1].property_url = f"{red_flags[0].property_url}/other"
+
+        # act
+        for red_flag in red_flags:
+            self.__sut.create(red_flag=red_flag)
+
+        # assert
+        with self.subTest(msg="assert red flags of different urls are in different partitions"):
+            self.assertNotEqual(red_flags[0].partition_key, red_flags[1].partition_key)
+
+        # assert
+        with self.subTest(msg="assert nothing is written to legacy partition"):
+            self.assertEqual(self.__legacy_items(), [])
+
+    def test_get_by_url_reads_legacy_red_flags(self):
+        # arrange
+        red_flag = AutoFixture().create(dto=RedFlag)
+        legacy_red_flag = AutoFixture().create(dto=RedFlag)
+        legacy_red_flag.property_url = red_flag.property_url
+        self.__sut.create(red_flag=red_flag)
+        self.__create_legacy(red_flag=legacy_red_flag)
+
+        # act
+        red_flags = self.__sut.get_by_url(property_url=red_flag.property_url)
+
+        # assert
+        with self.subTest(msg="assert red flags from both layouts are returned"):
+            self.assertEqual(red_flags, [red_flag, legacy_red_flag])
+
+    def test_get_by_url_prefers_migrated_red_flag(self):
+        # arrange
+        red_flag = AutoFixture().create(dto=RedFlag)
+        legacy_red_flag = deepcopy(red_flag)
+        self.__create_legacy(red_flag=legacy_red_flag)
+        self.__sut.create(red_flag=red_flag)
+
+        # act
+        red_flags = self.__sut.get_by_url(property_url=red_flag.property_url)
+
+        # assert
+        with self.subTest(msg="assert only migrated red flag is returned"):
+            self.assertEqual(red_flags, [red_flag])
+
+    def test_get_by_url_ignores_legacy_red_flags_when_legacy_reads_are_off(self):
+        # arrange
+        sut = DynamoDbRedFlagRepo(dynamo_wrapper=self._dynamo_client_wrapper,
+                                  object_mapper=self._object_mapper,
+                                  object_hasher=self._object_hasher,
+                                  legacy_reads=False)
+        legacy_red_flag = AutoFixture().create(dto=RedFlag)
+        self.__create_legacy(red_flag=legacy_red_flag)
+
+        # act
+        red_flags = sut.get_by_url(property_url=legacy_red_flag.property_url)
+
+        # assert
+        with self.subTest(msg="assert no red flags are returned"):
+            self.assertEqual(red_flags, [])
+
+    def test_get_page_by_url_pages_through_both_layouts(self):
+        # arrange
+        property_url = "https://example.com/properties/1"
+        red_flags = AutoFixture().create_many(dto=RedFlag, ammount=3)
+        legacy_red_flags = AutoFixture().create_many(dto=RedFlag, ammount=3)
+        for red_flag in red_flags:
+            red_flag.property_url = property_url
+            self.__sut.create(red_flag=red_flag)
+        for legacy_red_flag in legacy_red_flags:
+            legacy_red_flag.property_url = property_url
+            self.__create_legacy(red_flag=legacy_red_flag)
+
+        # act
+        pages = []
+        continuation_token = None
+        while True:
+            page, continuation_token = self.__sut.get_page_by_url(property_url=property_url,
+                                                                  limit=4,
+                                                                  continuation_token=continuation_token)
+            pages.append(page)
+            if continuation_token is None:
+                break
+
+        # assert
+        with self.subTest(msg="assert first page is filled up with legacy red flags"):
+            self.assertEqual(len(pages[0]), 4)
+
+        # assert
+        with self.subTest(msg="assert pages contain every red flag once"):
+            self.assertEqual(sorted(red_flag.id for page in pages for red_flag in page),
+                             sorted(red_flag.id for red_flag in red_flags + legacy_red_flags))
+
+    def test_get_by_id_reads_legacy_red_flag(self):
+        # arrange
+        legacy_red_flag = AutoFixture().create(dto=RedFlag)
+        self.__create_legacy(red_flag=legacy_red_flag)
+
+        # act
+        returned_red_flag = self.__sut.get(property_url=legacy_red_flag.property_url, _id=legacy_red_flag.id)
+
+        # assert
+        with self.subTest(msg="assert legacy red flag is returned"):
+            self.assertEqual(returned_red_flag, legacy_red_flag)
+
+    def test_add_voter_to_legacy_red_flag(self):
+        # arrange
+        legacy_red_flag = AutoFixture().create(dto=RedFlag)
+        self.__create_legacy(red_flag=legacy_red_flag)
+        user = "1234"
+        red_flag = self.__sut.get(property_url=legacy_red_flag.property_url, _id=legacy_red_flag.id)
+
+        # act
+        self.__sut.add_voter(user, red_flag)
+
+        # assert
+        with self.subTest(msg="assert legacy red flag is updated in place"):
+            self.assertEqual(self.__sut.get(red_flag.property_url, red_flag.id).votes, legacy_red_flag.votes | {user})
+
+        # assert
+        with self.subTest(msg="assert propagated object keeps its id"):
+            self.assertEqual(red_flag.id, legacy_red_flag.id)
+
+    def test_vote_on_legacy_red_flag_stored_under_pre_canonical_url_is_read_by_canonical_url(self):
+        # arrange
+        requested_property_url = "https://www.test.com/1/"
+        property_url = get_absolute_url(requested_property_url)
+        legacy_red_flag = AutoFixture().create(dto=RedFlag)
+        legacy_red_flag.property_url = requested_property_url
+        self.__create_legacy(red_flag=legacy_red_flag)
+        red_flag = self.__sut.get(property_url=property_url, _id=legacy_red_flag.id,
+                                  requested_property_url=requested_property_url)
+
+        # act
+        self.__sut.add_voter("1234", red_flag)
+
+        # assert
+        with self.subTest(msg="assert vote is read by the canonical url"):
+            self.assertEqual(self.__sut.get_voted_ids(user_id="1234", property_url=property_url), {red_flag.id})
+
+    def test_legacy_red_flag_stored_under_pre_canonical_url_is_read(self):
+        # arrange
+        requested_property_url = "https://www.openrent.co.uk/property-to-rent/london/2-bed-flat/1234567?ref=search"
+        property_url = get_absolute_url(requested_property_url)
+        legacy_red_flag = AutoFixture().create(dto=RedFlag)
+        legacy_red_flag.property_url = "https://www.openrent.co.uk/property-to-rent/london/2-bed-flat/1234567"
+        self.__create_legacy(red_flag=legacy_red_flag)
+
+        # act
+        red_flags = self.__sut.get_by_url(property_url=property_url, requested_property_url=requested_property_url)
+        page, _ = self.__sut.get_page_by_url(property_url=property_url, requested_property_url=requested_property_url)
+        listed = self.__sut.get_listed_by_urls(property_urls=[property_url],
+                                               requested_property_urls={property_url: [requested_property_url]})
+        red_flag = self.__sut.get(property_url=property_url, _id=legacy_red_flag.id,
+                                  requested_property_url=requested_property_url)
+
+        # assert
+        with self.subTest(msg="assert red flag is read by url"):
+            self.assertEqual(red_flags, [legacy_red_flag])
+
+        # assert
+        with self.subTest(msg="assert red flag is paged and listed"):
+            self.assertEqual(([red_flag.id for red_flag in page], [red_flag.id for red_flag in listed[property_url]]),
+                             ([legacy_red_flag.id], [legacy_red_flag.id]))
+
+        # assert
+        with self.subTest(msg="assert red flag is read by id"):
+            self.assertEqual(red_flag, legacy_red_flag)
+
+    def test_red_flag_under_hex_partition_key_is_read(self):
+        # arrange
+        property_url = "https://openrent.co.uk/1234567"
+        red_flag = AutoFixture().create(dto=RedFlag)
+        red_flag.property_url = property_url
+        self.__sut.create(red_flag=red_flag)
+        self.__rekey(red_flag=red_flag, partition_key=hex_red_flag_partition_key(property_url))
+
+        # act
+        red_flags = self.__sut.get_by_url(property_url=property_url)
+        page, continuation_token = self.__sut.get_page_by_url(property_url=property_url, limit=1)
+        returned_red_flag = self.__sut.get(property_url=property_url, _id=red_flag.id)
+
+        # assert
+        with self.subTest(msg="assert red flag is read by url and by id"):
+            self.assertEqual((red_flags, returned_red_flag), ([red_flag], red_flag))
+
+        # assert
+        with self.subTest(msg="assert red flag is paged"):
+            self.assertEqual([red_flag.id for red_flag in page], [red_flag.id])
+
+    def test_red_flag_under_hex_partition_key_is_ignored_when_legacy_reads_are_off(self):
+        # arrange
+        sut = DynamoDbRedFlagRepo(dynamo_wrapper=self._dynamo_client_wrapper,
+                                  object_mapper=self._object_mapper,
+                                  object_hasher=self._object_hasher,
+                                  legacy_reads=False)
+        red_flag = AutoFixture().create(dto=RedFlag)
+        sut.create(red_flag=red_flag)
+        self.__rekey(red_flag=red_flag, partition_key=hex_red_flag_partition_key(red_flag.property_url))
+
+        # act
+        red_flags = sut.get_by_url(property_url=red_flag.property_url)
+
+        # assert
+        with self.subTest(msg="assert no red flags are returned"):
+            self.assertEqual(red_flags, [])
+
+    def test_get_page_by_url_pages_through_every_legacy_url(self):
+        # arrange
+        requested_property_url = "https://www.example.com/properties/1/"
+        property_url = get_absolute_url(requested_property_url)
+        legacy_red_flags = AutoFixture().create_many(dto=RedFlag, ammount=4)
+        for index, legacy_red_flag in enumerate(legacy_red_flags):
+            legacy_red_flag.property_url = requested_property_url if index % 2 == 0 else property_url
+            self.__create_legacy(red_flag=legacy_red_flag)
+
+        # act
+        pages = []
+        continuation_token = None
+        while True:
+            page, continuation_token = self.__sut.get_page_by_url(property_url=property_url,
+                                                                  limit=1,
+                                                                  continuation_token=continuation_token,
+                                                                  requested_property_url=requested_property_url)
+            pages.append(page)
+            if continuation_token is None:
+                break
+
+        # assert
+        with self.subTest(msg="assert pages contain every red flag once"):
+            self.assertEqual(sorted(red_flag.id for page in pages for red_flag in page),
+                             sorted(red_flag.id for red_flag in legacy_red_flags))
+
+    def __rekey(self, red_flag: RedFlag, partition_key: str):
+        item = self.__stored_item(red_flag=red_flag)
+        self._dynamo_client_wrapper.delete_item(key={"partition_key": item["partition_key"], "id": item["id"]},
+                                                condition_expression=Attr('etag').exists())
+        self._dynamo_client_wrapper.put(item={**item, "partition_key": partition_key},
+                                        condition_expression=Attr('etag').not_exists())
+        red_flag.partition_key = partition_key
+
+    def __create_legacy(self, red_flag: RedFlag):
+        red_flag.partition_key = LEGACY_RED_FLAG_PARTITION_KEY
+        red_flag.id = f"{base64encode(red_flag.property_url)}:{red_flag.id}"
+        red_flag.vote_count = None
+        stored_red_flag = replace(red_flag, votes=sorted(red_flag.votes))
+        red_flag.etag = stored_red_flag.etag = self._object_hasher.hash(object=stored_red_flag)
+        self._dynamo_client_wrapper.put(item=self._object_mapper.map_to_dict(_from=stored_red_flag, to=RedFlag),
+                                        condition_expression=Attr('etag').not_exists())
+        red_flag.id = red_flag.id.split(":")[1]
+
+    def __stored_item(self, red_flag: RedFlag) -> dict:
+        if red_flag.partition_key == LEGACY_RED_FLAG_PARTITION_KEY:
+            _id = f"{base64encode(red_flag.property_url)}:{red_flag.id}"
+        else:
+            _id = red_flag.id
+        return next(self._dynamo_client_wrapper.query_iter(key_condition_expression="partition_key = :partition_key AND id = :id",
+                                                           expression_attribute_values={
+                                                               ':partition_key': red_flag.partition_key,
+                                                               ':id': _id
+                                                           }))
+
+    def __legacy_items(self) -> list[dict]:
+        return list(self._dynamo_client_wrapper.query_iter(key_condition_expression="partition_key = :partition_key",
+                                                           expression_attribute_values={
+                                                               ':partition_key': LEGACY_RED_FLAG_PARTITION_KEY
+                                                           }))
+
     def test_get_by_id(self):
         # arrange
         red_flag = AutoFixture().create(dto=RedFlag)
@@ -542,7 +1051,8 @@ class TestRedFlagsRepo(DynamoDbTestCase):
         self.__sut.create(red_flag)
         expected_red_flag = deepcopy(red_flag)
         user = "1234"
-        expected_red_flag.votes.append(user)
+        expected_red_flag.votes.add(user)
+        expected_red_flag.vote_count = 1
         self.__sut.add_voter(user, red_flag)
         expected_red_flag.etag = red_flag.etag
 
@@ -557,6 +1067,151 @@ class TestRedFlagsRepo(DynamoDbTestCase):
         with self.subTest(msg="propagated object equals expected"):
             self.assertEqual(expected_red_flag, red_flag)
 
+    def test_votes_are_stored_as_string_set_with_vote_count(self):
+        # arrange
+        red_flag = AutoFixture().create(dto=RedFlag)
+        self.__sut.create(red_flag)
+
+        # act
+        self.__sut.add_voter("1234", red_flag)
+        self.__sut.add_voter("5678", red_flag)
+        self.__sut.remove_voter("1234", red_flag)
+        item = self.__stored_item(red_flag=red_flag)
+
+        # assert
+        with self.subTest(msg="assert votes are a set"):
+            self.assertEqual(item['votes'], {"5678"})
+
+        # assert
+        with self.subTest(msg="assert vote count is maintained"):
+            self.assertEqual(item['vote_count'], 1)
+
+    def test_remove_last_voter_removes_votes_attribute(self):
+        # arrange
+        red_flag = AutoFixture().create(dto=RedFlag)
+        red_flag.votes.add("1234")
+        self.__sut.create(red_flag)
+
+        # act
+        self.__sut.remove_voter("1234", red_flag)
+
+        # assert
+        with self.subTest(msg="assert empty vote set is not stored"):
+            self.assertNotIn('votes', self.__stored_item(red_flag=red_flag))
+
+        # assert
+        with self.subTest(msg="assert red flag is read back without votes"):
+            self.assertEqual(self.__sut.get(red_flag.property_url, red_flag.id).votes, set())
+
+    def test_add_voter_converts_vote_list_to_set(self):
+        # arrange
+        legacy_red_flag = AutoFixture().create(dto=RedFlag)
+        legacy_red_flag.votes = {"1234", "5678"}
+        self.__create_legacy(red_flag=legacy_red_flag)
+        red_flag = self.__sut.get(property_url=legacy_red_flag.property_url, _id=legacy_red_flag.id)
+
+        # act
+        self.__sut.add_voter("9012", red_flag)
+        self.__sut.remove_voter("1234", red_flag)
+
+        # assert
+        with self.subTest(msg="assert votes are a set"):
+            self.assertEqual(self.__stored_item(red_flag=red_flag)['votes'], {"5678", "9012"})
+
+        # assert
+        with self.subTest(msg="assert vote count is maintained"):
+            self.assertEqual(self.__stored_item(red_flag=red_flag)['vote_count'], 2)
+
+    def test_get_page_by_url_lists_red_flags_without_voters(self):
+        # arrange
+        red_flag = AutoFixture().create(dto=RedFlag)
+        self.__sut.create(red_flag)
+        self.__sut.add_voter("1234", red_flag)
+        self.__sut.add_voter("5678", red_flag)
+
+        # act
+        red_flags, _ = self.__sut.get_page_by_url(property_url=red_flag.property_url)
+
+        # assert
+        with self.subTest(msg="assert voters are not read"):
+            self.assertEqual(red_flags[0].votes, set())
+
+        # assert
+        with self.subTest(msg="assert vote count is read"):
+            self.assertEqual(red_flags[0].vote_count, 2)
+
+        # assert
+        with self.subTest(msg="assert listed fields are read"):
+            self.assertEqual((red_flags[0].id, red_flags[0].body, red_flags[0].date, red_flags[0].etag),
+                             (red_flag.id, red_flag.body, red_flag.date, red_flag.etag))
+
+    def test_get_listed_by_urls(self):
+        # arrange
+        red_flags = AutoFixture().create_many(dto=RedFlag, ammount=3)
+        red_flags[1].property_url = red_flags[0].property_url
+        for red_flag in red_flags:
+            self.__sut.create(red_flag)
+        self.__sut.add_voter("1234", red_flags[0])
+        unknown_url = "https://example.com/properties/unknown"
+
+        # act
+        red_flags_by_url = self.__sut.get_listed_by_urls(property_urls=[red_flags[0].property_url,
+                                                                        red_flags[2].property_url,
+                                                                        unknown_url])
+
+        # assert
+        with self.subTest(msg="assert red flags are grouped by url"):
+            self.assertEqual({property_url: sorted(red_flag.id for red_flag in listed)
+                              for property_url, listed in red_flags_by_url.items()},
+                             {red_flags[0].property_url: sorted([red_flags[0].id, red_flags[1].id]),
+                              red_flags[2].property_url: [red_flags[2].id],
+                              unknown_url: []})
+
+        # assert
+        with self.subTest(msg="assert voters are not read"):
+            self.assertTrue(all(red_flag.votes == set() for listed in red_flags_by_url.values()
+                                for red_flag in listed))
+
+    def test_get_voted_ids_by_urls(self):
+        # arrange
+        red_flags = AutoFixture().create_many(dto=RedFlag, ammount=3)
+        for red_flag in red_flags:
+            self.__sut.create(red_flag)
+        self.__sut.add_voter("1234", red_flags[0])
+        self.__sut.add_voter("1234", red_flags[2])
+        self.__sut.add_voter("5678", red_flags[1])
+
+        # act
+        voted_ids_by_url = self.__sut.get_voted_ids_by_urls(user_id="1234",
+                                                            property_urls=[red_flags[0].property_url,
+                                                                           red_flags[1].property_url])
+
+        # assert
+        with self.subTest(msg="assert only votes of user on requested urls are returned"):
+            self.assertEqual(voted_ids_by_url, {red_flags[0].property_url: {red_flags[0].id},
+                                                red_flags[1].property_url: set()})
+
+    def test_get_voted_ids(self):
+        # arrange
+        red_flags = AutoFixture().create_many(dto=RedFlag, ammount=3)
+        for red_flag in red_flags:
+            red_flag.property_url = "https://example.com/properties/1"
+            self.__sut.create(red_flag)
+        other_red_flag = AutoFixture().create(dto=RedFlag)
+        self.__sut.create(other_red_flag)
+        self.__sut.add_voter("1234", red_flags[0])
+        self.__sut.add_voter("1234", red_flags[1])
+        self.__sut.add_voter("5678", red_flags[2])
+        self.__sut.add_voter("1234", other_red_flag)
+        self.__sut.remove_voter("1234", red_flags[1])
+
+        # act
+        voted_ids = self.__sut.get_voted_ids(user_id="1234", property_url="https://example.com/properties/1")
+
+        # assert
+        with self.subTest(msg="assert only current votes of user on property url are returned"):
+            self.assertEqual(voted_ids, {red_flags[0].id})
+
     def test_add_voter_when_conflict(self):
         # arrange
         red_flag = AutoFixture().create(dto=RedFlag)
@@ -578,10 +1233,12 @@ class TestRedFlagsRepo(DynamoDbTestCase):
         # arrange
         user = "1234"
         red_flag = AutoFixture().create(dto=RedFlag)
-        red_flag.votes.append(user)
+        red_flag.votes.add(user)
+        red_flag.votes.add("5678")
         self.__sut.create(red_flag)
         expected_red_flag = deepcopy(red_flag)
         expected_red_flag.votes.remove(user)
+        expected_red_flag.vote_count = 1
         self.__sut.remove_voter(user, red_flag)
         expected_red_flag.etag = red_flag.etag
 
@@ -600,8 +1257,7 @@ class TestRedFlagsRepo(DynamoDbTestCase):
         # arrange
         user = "1234"
         red_flag = AutoFixture().create(dto=RedFlag)
-        red_flag.votes.append(user)
-        red_flag.votes.append(user)
+        red_flag.votes.add(user)
         self.__sut.create(red_flag)
         old_etag = red_flag.etag
         self.__sut.remove_voter(user, red_flag)
@@ -614,3 +1270,126 @@ class TestRedFlagsRepo(DynamoDbTestCase):
         with self.subTest(msg="conflict error is raised"):
             with self.assertRaises(expected_exception=ConflictException):
                 sut_call()
+
+
+@mock_aws
+class TestUnitOfWork(DynamoDbTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.__group_repo = DynamoDbGroupRepo(dynamo_wrapper=self._dynamo_client_wrapper,
+                                              object_mapper=self._object_mapper,
+                                              object_hasher=self._object_hasher)
+        self.__user_groups_repo = DynamoDbUserGroupsRepo(dynamo_wrapper=self._dynamo_client_wrapper,
+                                                         object_mapper=self._object_mapper,
+                                                         object_hasher=self._object_hasher)
+
+    def test_commit_writes_group_and_user_groups_together(self):
+        # arrange
+        group = AutoFixture().create(dto=Group)
+        self.__group_repo.create(group=group)
+        user_groups = UserGroups(id="1234", name="Bob Marley", groups=[group.id])
+        sut = self._dynamo_client_wrapper.begin_unit_of_work()
+        self.__group_repo.add_participant(participant="Bob Marley", group=group, unit_of_work=sut)
+        self.__user_groups_repo.create(user_groups=user_groups, unit_of_work=sut)
+
+        # assert
+        with self.subTest(msg="assert nothing is written before commit"):
+            with self.assertRaises(expected_exception=UserGroupsNotFoundException):
+                self.__user_groups_repo.get(_id="1234")
+
+        # act
+        sut.commit()
+
+        # assert
+        with self.subTest(msg="assert participant was added"):
+            self.assertEqual(self.__group_repo.get_metadata(_id=group.id), group)
+
+        # assert
+        with self.subTest(msg="assert user groups were created"):
+            self.assertEqual(self.__user_groups_repo.get(_id="1234"), user_groups)
+
+    def test_commit_removes_participant_and_group_together(self):
+        # arrange
+        group = AutoFixture().create(dto=Group)
+        group.participants = ["Bob Marley"]
+        self.__group_repo.create(group=group)
+        user_groups = UserGroups(id="1234", name="Bob Marley", groups=[group.id])
+        self.__user_groups_repo.create(user_groups=user_groups)
+        sut = self._dynamo_client_wrapper.begin_unit_of_work()
+        self.__group_repo.remove_participant(participant="Bob Marley", group=group, unit_of_work=sut)
+        self.__user_groups_repo.remove_group(user_groups=user_groups, group=group.id, unit_of_work=sut)
+
+        # act
+        sut.commit()
+
+        # assert
+        with self.subTest(msg="assert participant was removed"):
+            self.assertEqual(self.__group_repo.get_metadata(_id=group.id).participants, [])
+
+        # assert
+        with self.subTest(msg="assert group was removed from user groups"):
+            self.assertEqual(self.__user_groups_repo.get(_id="1234").groups, [])
+
+    def test_commit_writes_nothing_when_any_condition_fails(self):
+        # arrange
+        group = AutoFixture().create(dto=Group)
+        self.__group_repo.create(group=group)
+        stored_group = deepcopy(group)
+        user_groups = UserGroups(id="1234", name="Bob Marley", groups=[])
+        self.__user_groups_repo.create(user_groups=deepcopy(user_groups))
+        sut = self._dynamo_client_wrapper.begin_unit_of_work()
+        self.__group_repo.add_participant(participant="Bob Marley", group=group, unit_of_work=sut)
+        self.__user_groups_repo.create(user_groups=user_groups, unit_of_work=sut)
+
+        # act
+        sut_call = lambda: sut.commit()
+
+        # assert
+        with self.subTest(msg="assert conflict error is thrown"):
+            with self.assertRaises(expected_exception=ConflictException):
+                sut_call()
+
+        # assert
+        with self.subTest(msg="assert group was not changed"):
+            self.assertEqual(self.__group_repo.get_metadata(_id=group.id), stored_group)
+
+    def test_commit_runs_after_commit_callbacks_on_conflict(self):
+        # arrange
+        group = AutoFixture().create(dto=Group)
+        callbacks = []
+        sut = self._dynamo_client_wrapper.begin_unit_of_work()
+        self.__group_repo.add_participant(participant="Bob Marley", group=group, unit_of_work=sut)
+        sut.after_commit(lambda: callbacks.append("invalidated"))
+
+        # act
+        with self.assertRaises(expected_exception=ConflictException):
+            sut.commit()
+
+        # assert
+        with self.subTest(msg="assert callback ran"):
+            self.assertEqual(callbacks, ["invalidated"])
+
+
+@mock_aws
+class TestUserGroupRepoWithAttributeValues(TestUserGroupRepo):
+    attribute_values = True
+
+    def setUp(self):
+        super().setUp()
+
+
+@mock_aws
+class TestGroupRepoWithAttributeValues(TestGroupRepo):
+    attribute_values = True
+
+    def setUp(self):
+        super().setUp()
+
+
+@mock_aws
+class TestRedFlagsRepoWithAttributeValues(TestRedFlagsRepo):
+    attribute_values = True
+
+    def setUp(self):
+        super().setUp()
@@ -4,7 +4,9 @@ from unittest.mock import Mock
 from src.web.handlers import UpdateGroupApiHandler, FetchUserGroupsApiHandler, CreatePropertyApiHandler, \
     DeletePropertyApiHandler, AddCurrentUserToGroupApiHandler, GetCodeForGroupApiHandler, GetUserGroupByIdApiHandler, \
     CreateGroupApiHandler, CreateRedFlagApiHandler, GetRedFlagsApiHandler, CreateVoteForRedFlagApiHandler, \
-    DeleteVoteForRedFlagApiHandler
+    DeleteVoteForRedFlagApiHandler, LazyApiRequestHandler, CreatePropertiesApiHandler, \
+    LookupRedFlagsApiHandler, with_jwt_claims, with_route_key
+from src.web.ioc import ROUTES
 
 
 class TestUpdateGroupHandler(TestCase):
@@ -58,6 +60,23 @@ class TestCreatePropertyApiHandler(TestCase):
             self.assertEqual(route_key, "POST /groups/{group_id}/properties")
 
 
+class TestCreatePropertiesApiHandler(TestCase):
+
+    def test_route_key_matches_expected(self):
+        # arrange
+        sut = CreatePropertiesApiHandler(sequence=Mock(),
+                                         command_pipeline=Mock(),
+                                         deserializer=Mock(),
+                                         logger=Mock())
+
+        # act
+        route_key = sut.route_key
+
+        # assert
+        with self.subTest(msg="route key matches"):
+            self.assertEqual(route_key, "POST /groups/{group_id}/properties:batch")
+
+
 class TestDeletePropertyApiHandler(TestCase):
 
     def test_route_key_matches_expected(self):
@@ -209,3 +228,132 @@ class TestDeleteVoteForRedFlagApiHandler(TestCase):
         # assert
         with self.subTest(msg="route key matches"):
             self.assertEqual(route_key, "DELETE /red-flags/{red_flag_id}/votes")
+
+
+class TestLazyApiRequestHandler(TestCase):
+
+    def setUp(self):
+        self.__handler = Mock()
+        self.__factory = Mock(return_value=self.__handler)
+        self.__sut = LazyApiRequestHandler(route_key="GET /groups", factory=self.__factory)
+
+    def test_route_key_does_not_build_handler(self):
+        # act
+        route_key = self.__sut.route_key
+
+        # assert
+        with self.subTest(msg="route key matches"):
+            self.assertEqual(route_key, "GET /groups")
+
+        # assert
+        with self.subTest(msg="handler is not built"):
+            self.__factory.assert_not_called()
+
+    def test_run_builds_handler_and_runs_it(self):
+        # arrange
+        event = {"routeKey": "GET /groups"}
+
+        # act
+        context = self.__sut.run(event=event)
+
+        # assert
+        with self.subTest(msg="handler is run with the route key as a path param"):
+            self.__handler.run.assert_called_once_with(event={"routeKey": "GET /groups",
+                                                              "pathParameters": {"route_key": "GET /groups"}})
+
+        # assert
+        with self.subTest(msg="context from handler is returned"):
+            self.assertEqual(context, self.__handler.run.return_value)
+
+
+class TestWithRouteKey(TestCase):
+
+    def test_route_key_is_added_where_params_cannot_set_it(self):
+        # arrange
+        event = {
+            "routeKey": "GET /groups/{group_id}",
+            "pathParameters": {"group_id": "1234"},
+            "queryStringParameters": {"route_key": "spoofed"}
+        }
+
+        # act
+        result = with_route_key(event=event, route_key="GET /groups/{group_id}")
+
+        # assert
+        with self.subTest(msg="route key is added to the path params"):
+            self.assertEqual(result["pathParameters"], {"group_id": "1234", "route_key": "GET /groups/{group_id}"})
+
+        # assert
+        with self.subTest(msg="route key param is dropped"):
+            self.assertEqual(result["queryStringParameters"], {})
+
+        # assert
+        with self.subTest(msg="event is not changed"):
+            self.assertEqual(event["pathParameters"], {"group_id": "1234"})
+
+
+class TestWithJwtClaims(TestCase):
+
+    def test_claims_are_kept_where_params_cannot_set_them(self):
+        # arrange
+        event = {
+            "routeKey": "POST /participants",
+            "requestContext": {"authorizer": {"jwt": {"claims": {"username": "1234"}}}},
+            "queryStringParameters": {"code": "abcd", "name": "spoofed", "jwt_claims": "spoofed"}
+        }
+
+        # act
+        result = with_jwt_claims(event=event)
+
+        # assert
+        with self.subTest(msg="claims are added under jwt claims"):
+            self.assertEqual(result["requestContext"]["authorizer"]["jwt"]["claims"],
+                             {"username": "1234", "jwt_claims": {"username": "1234"}})
+
+        # assert
+        with self.subTest(msg="jwt claims param is dropped"):
+            self.assertEqual(result["queryStringParameters"], {"code": "abcd", "name": "spoofed"})
+
+        # assert
+        with self.subTest(msg="event is not changed"):
+            self.assertEqual(event["requestContext"]["authorizer"]["jwt"]["claims"], {"username": "1234"})
+
+    def test_event_without_claims_is_left_without_jwt_claims(self):
+        # act
+        result = with_jwt_claims(event={"routeKey": "GET /groups", "pathParameters": {"jwt_claims": "spoofed"}})
+
+        # assert
+        with self.subTest(msg="jwt claims param is dropped"):
+            self.assertEqual(result, {"routeKey": "GET /groups", "pathParameters": {}})
+
+
+class TestLookupRedFlagsApiHandler(TestCase):
+
+    def test_route_key_matches_expected(self):
+        # arrange
+        sut = LookupRedFlagsApiHandler(sequence=Mock(),
+                                       command_pipeline=Mock(),
+                                       deserializer=Mock(),
+                                       logger=Mock())
+
+        # act
+        route_key = sut.route_key
+
+        # assert
+        with self.subTest(msg="route key matches"):
+            self.assertEqual(route_key, "POST /red-flags:lookup")
+
+
+class TestRoutes(TestCase):
+
+    def test_route_keys_match_handler_route_keys(self):
+        for route_key, handler in ROUTES.items():
+            # arrange
+            sut = handler(sequence=Mock(),
+                          command_pipeline=Mock(),
+                          deserializer=Mock(),
+                          logger=Mock())
+
+            # assert
+            with self.subTest(msg=f"route key {route_key} matches handler"):
+                self.assertEqual(sut.route_key, route_key)
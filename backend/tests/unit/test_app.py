@@ -0,0 +1,99 @@
+from unittest import TestCase
+from unittest.mock import patch, Mock
+
+from formula_thoughts_web.abstractions import Logger
+
+from src import app
+from src.app import get_container, begin_request, end_request
+from src.infra import DynamoDbCallTotals
+
+
+class TestGetContainer(TestCase):
+
+    def setUp(self):
+        app._container = None
+
+    def tearDown(self):
+        app._container = None
+
+    def test_get_container_should_bootstrap_once(self):
+        # act
+        with patch("src.app.bootstrap") as bootstrap:
+            first = get_container()
+            second = get_container()
+
+        # assert
+        with self.subTest(msg="same container is reused"):
+            self.assertIs(first, second)
+
+        # assert
+        with self.subTest(msg="bootstrap is only called once"):
+            bootstrap.assert_called_once_with(container=first)
+
+
+class TestBeginRequest(TestCase):
+
+    def test_begin_request_should_reset_logger_global_properties(self):
+        # arrange
+        logger = Mock()
+        container = Mock()
+        container.resolve.return_value = logger
+
+        # act
+        begin_request(container=container)
+
+        # assert
+        with self.subTest(msg="logger is resolved"):
+            container.resolve.assert_called_once_with(service=Logger)
+
+        # assert
+        with self.subTest(msg="global properties are cleared"):
+            logger.add_global_properties.assert_called_once_with(properties={})
+
+
+class TestEndRequest(TestCase):
+
+    def setUp(self):
+        self.__logger = Mock()
+        self.__call_accounting = Mock()
+        self.__container = Mock()
+        self.__container.resolve.side_effect = lambda service: (self.__logger if service is Logger
+                                                                else self.__call_accounting)
+
+    def test_end_request_should_log_dynamodb_calls(self):
+        # arrange
+        self.__call_accounting.flush.return_value = {
+            "DynamoDbGroupRepo.get": DynamoDbCallTotals(calls=1, read_capacity_units=0.5, items=1, latency_ms=12.5)
+        }
+
+        # act
+        end_request(container=self.__container, event={"routeKey": "GET /groups/{group_id}",
+                                                       "pathParameters": {"group_id": "1234"},
+                                                       "queryStringParameters": None})
+
+        # assert
+        with self.subTest(msg="totals are logged by repo method with the route and group"):
+            self.__logger.log_event.assert_called_once_with(message="dynamodb calls", properties={
+                "route_key": "GET /groups/{group_id}",
+                "group_id": "1234",
+                "callers": {
+                    "DynamoDbGroupRepo.get": {
+                        "calls": 1,
+                        "read_capacity_units": 0.5,
+                        "write_capacity_units": 0,
+                        "items": 1,
+                        "latency_ms": 12.5
+                    }
+                }
+            })
+
+    def test_end_request_should_not_log_without_dynamodb_calls(self):
+        # arrange
+        self.__call_accounting.flush.return_value = {}
+
+        # act
+        end_request(container=self.__container, event={"routeKey": "GET /groups"})
+
+        # assert
+        with self.subTest(msg="nothing is logged"):
+            self.__logger.log_event.assert_not_called()
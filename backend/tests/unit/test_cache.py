@@ -0,0 +1,259 @@
+from copy import deepcopy
+from unittest import TestCase
+from unittest.mock import Mock
+
+from autofixture import AutoFixture
+
+from src.core import Group, GroupProperties, Property
+from src.exceptions import ConflictException
+from src.infra.cache import TtlLruCache, GroupCache, CachingGroupRepo, CachingPropertyRepo, CacheStats
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestTtlLruCache(TestCase):
+
+    def setUp(self):
+        self.__clock = FakeClock()
+        self.__sut = TtlLruCache(max_size=2, ttl_seconds=10, clock=self.__clock)
+
+    def test_get_returns_set_value(self):
+        # arrange
+        self.__sut.set("key", "value")
+
+        # act
+        value = self.__sut.get("key")
+
+        # assert
+        with self.subTest(msg="assert value is returned"):
+            self.assertEqual(value, "value")
+
+        # assert
+        with self.subTest(msg="assert hit is counted"):
+            self.assertEqual(self.__sut.stats, CacheStats(hits=1, misses=0, evictions=0, size=1))
+
+    def test_get_expires_entry_after_ttl(self):
+        # arrange
+        self.__sut.set("key", "value")
+        self.__clock.now = 10
+
+        # act
+        value = self.__sut.get("key")
+
+        # assert
+        with self.subTest(msg="assert value is not returned"):
+            self.assertIsNone(value)
+
+        # assert
+        with self.subTest(msg="assert miss is counted and entry dropped"):
+            self.assertEqual(self.__sut.stats, CacheStats(hits=0, misses=1, evictions=0, size=0))
+
+    def test_set_evicts_least_recently_used_entry(self):
+        # arrange
+        self.__sut.set("first", 1)
+        self.__sut.set("second", 2)
+        self.__sut.get("first")
+
+        # act
+        self.__sut.set("third", 3)
+
+        # assert
+        with self.subTest(msg="assert least recently used entry is evicted"):
+            self.assertEqual((self.__sut.get("first"), self.__sut.get("second"), self.__sut.get("third")),
+                             (1, None, 3))
+
+        # assert
+        with self.subTest(msg="assert eviction is counted"):
+            self.assertEqual(self.__sut.stats.evictions, 1)
+
+    def test_invalidate_removes_entry(self):
+        # arrange
+        self.__sut.set("key", "value")
+
+        # act
+        self.__sut.invalidate("key")
+
+        # assert
+        with self.subTest(msg="assert entry is removed"):
+            self.assertIsNone(self.__sut.get("key"))
+
+
+class TestCachingGroupRepo(TestCase):
+
+    def setUp(self):
+        self.__group_repo = Mock()
+        self.__group_cache = GroupCache(max_size=10, ttl_seconds=10)
+        self.__sut = CachingGroupRepo(group_repo=self.__group_repo, group_cache=self.__group_cache)
+
+    def test_get_reads_through_once(self):
+        # arrange
+        group = AutoFixture().create(dto=GroupProperties)
+        self.__group_repo.get = Mock(return_value=group)
+        expected_group = deepcopy(group)
+
+        # act
+        first = self.__sut.get(_id=group.id)
+        second = self.__sut.get(_id=group.id)
+
+        # assert
+        with self.subTest(msg="assert repo is only queried once"):
+            self.__group_repo.get.assert_called_once_with(_id=group.id)
+
+        # assert
+        with self.subTest(msg="assert cached group is returned"):
+            self.assertEqual(second, expected_group)
+
+        # assert
+        with self.subTest(msg="assert callers get their own copy"):
+            first.participants.append("new participant")
+            self.assertEqual(self.__sut.get(_id=group.id), expected_group)
+
+    def test_get_metadata_reads_through_once(self):
+        # arrange
+        group = AutoFixture().create(dto=Group)
+        self.__group_repo.get_metadata = Mock(return_value=group)
+        expected_group = deepcopy(group)
+
+        # act
+        first = self.__sut.get_metadata(_id=group.id)
+        second = self.__sut.get_metadata(_id=group.id)
+
+        # assert
+        with self.subTest(msg="assert repo is only queried once"):
+            self.__group_repo.get_metadata.assert_called_once_with(_id=group.id)
+
+        # assert
+        with self.subTest(msg="assert callers get their own copy"):
+            first.participants.append("new participant")
+            self.assertEqual(second, expected_group)
+
+    def test_get_metadata_reads_cached_group(self):
+        # arrange
+        group = AutoFixture().create(dto=GroupProperties)
+        self.__group_repo.get = Mock(return_value=group)
+        self.__sut.get(_id=group.id)
+
+        # act
+        metadata = self.__sut.get_metadata(_id=group.id)
+
+        # assert
+        with self.subTest(msg="assert metadata is not read from the repo"):
+            self.__group_repo.get_metadata.assert_not_called()
+
+        # assert
+        with self.subTest(msg="assert group is returned without its properties"):
+            self.assertEqual(metadata, Group(etag=group.etag, partition_key=group.partition_key, id=group.id,
+                                             participants=group.participants, price_limit=group.price_limit,
+                                             locations=group.locations))
+
+    def test_get_many_only_fetches_missing_groups(self):
+        # arrange
+        groups = AutoFixture().create_many(dto=GroupProperties, ammount=3)
+        self.__group_repo.get = Mock(return_value=groups[1])
+        self.__group_repo.get_many = Mock(return_value=[groups[0], groups[2]])
+        self.__sut.get(_id=groups[1].id)
+
+        # act
+        returned_groups = self.__sut.get_many(ids=[group.id for group in groups])
+
+        # assert
+        with self.subTest(msg="assert only missing groups are fetched"):
+            self.__group_repo.get_many.assert_called_once_with(ids=[groups[0].id, groups[2].id])
+
+        # assert
+        with self.subTest(msg="assert groups keep order of ids"):
+            self.assertEqual(returned_groups, groups)
+
+    def test_writes_invalidate_group(self):
+        for write in ["update", "add_participant", "remove_participant"]:
+            # arrange
+            group = AutoFixture().create(dto=GroupProperties)
+            self.__group_repo.get = Mock(return_value=group)
+            self.__sut.get(_id=group.id)
+            kwargs = {"group": group} if write == "update" else {"group": group, "participant": "participant"}
+
+            # act
+            getattr(self.__sut, write)(**kwargs)
+            self.__sut.get(_id=group.id)
+
+            # assert
+            with self.subTest(msg=f"assert {write} invalidates group"):
+                self.assertEqual(self.__group_repo.get.call_count, 2)
+
+    def test_writes_invalidate_group_metadata(self):
+        for write in ["update", "add_participant", "remove_participant"]:
+            # arrange
+            group = AutoFixture().create(dto=Group)
+            self.__group_repo.get_metadata = Mock(return_value=group)
+            self.__sut.get_metadata(_id=group.id)
+            kwargs = {"group": group} if write == "update" else {"group": group, "participant": "participant"}
+
+            # act
+            getattr(self.__sut, write)(**kwargs)
+            self.__sut.get_metadata(_id=group.id)
+
+            # assert
+            with self.subTest(msg=f"assert {write} invalidates group metadata"):
+                self.assertEqual(self.__group_repo.get_metadata.call_count, 2)
+
+    def test_conflicting_write_invalidates_group(self):
+        # arrange
+        group = AutoFixture().create(dto=GroupProperties)
+        self.__group_repo.get = Mock(return_value=group)
+        self.__group_repo.add_participant = Mock(side_effect=ConflictException())
+        self.__sut.get(_id=group.id)
+
+        # act
+        with self.assertRaises(expected_exception=ConflictException):
+            self.__sut.add_participant(participant="participant", group=group)
+        self.__sut.get(_id=group.id)
+
+        # assert
+        with self.subTest(msg="assert stale group is read again"):
+            self.assertEqual(self.__group_repo.get.call_count, 2)
+
+
+class TestCachingPropertyRepo(TestCase):
+
+    def setUp(self):
+        self.__property_repo = Mock()
+        self.__group_cache = GroupCache(max_size=10, ttl_seconds=10)
+        self.__sut = CachingPropertyRepo(property_repo=self.__property_repo, group_cache=self.__group_cache)
+
+    def test_create_invalidates_group(self):
+        # arrange
+        self.__group_cache.set("group_id", AutoFixture().create(dto=GroupProperties))
+        prop = AutoFixture().create(dto=Property)
+
+        # act
+        self.__sut.create(group_id="group_id", property=prop)
+
+        # assert
+        with self.subTest(msg="assert property is created"):
+            self.__property_repo.create.assert_called_once_with(group_id="group_id", property=prop)
+
+        # assert
+        with self.subTest(msg="assert group is invalidated"):
+            self.assertIsNone(self.__group_cache.get("group_id"))
+
+    def test_delete_invalidates_group(self):
+        # arrange
+        self.__group_cache.set("group_id", AutoFixture().create(dto=GroupProperties))
+
+        # act
+        self.__sut.delete(group_id="group_id", property_id="property_id")
+
+        # assert
+        with self.subTest(msg="assert property is deleted"):
+            self.__property_repo.delete.assert_called_once_with(group_id="group_id", property_id="property_id")
+
+        # assert
+        with self.subTest(msg="assert group is invalidated"):
+            self.assertIsNone(self.__group_cache.get("group_id"))
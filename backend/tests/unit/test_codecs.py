@@ -0,0 +1,70 @@
+from datetime import datetime
+from decimal import Decimal
+from unittest import TestCase
+
+from boto3.dynamodb.types import TypeSerializer
+from ddt import ddt, data
+from formula_thoughts_web.crosscutting import ObjectMapper
+
+from src.infra.codecs import AttributeValueCodec, ObjectMapperCodec
+
+
+@ddt
+class TestAttributeValueCodec(TestCase):
+
+    def setUp(self):
+        self.__serializer = TypeSerializer()
+        self.__object_mapper_codec = ObjectMapperCodec(object_mapper=ObjectMapper())
+        self.__sut = AttributeValueCodec()
+
+    @data(
+        ["group", {"partition_key": "group:1234", "id": "group:1234", "etag": "abcd",
+                   "participants": {"user_2", "user_1"}, "price_limit": "1200.50", "locations": ["SW9", "SW4"]}],
+        ["group", {"partition_key": "group:1234", "id": "group:1234", "etag": "abcd", "participants": ["user_1"],
+                   "price_limit": None, "locations": []}],
+        ["group", {"partition_key": "group:1234", "id": "group:1234", "etag": "abcd", "price_limit": Decimal("950")}],
+        ["property", {"partition_key": "group:1234", "id": "property:5678", "etag": "abcd",
+                      "url": "https://openrent.co.uk/1234567", "title": "2 bed flat", "price": "1100.0",
+                      "added_by": "user_1"}],
+        ["property", {"partition_key": "group:1234", "id": "property:5678", "etag": "abcd", "url": None,
+                      "title": None, "price": None, "added_by": None}],
+        ["user_groups", {"partition_key": "user_group:user_1", "id": "user_1", "etag": "abcd", "name": "Anna",
+                         "groups": {"5678", "1234"}}],
+        ["user_groups", {"partition_key": "user_group:user_1", "id": "user_1", "etag": "abcd", "name": "Anna"}],
+        ["red_flag", {"partition_key": "red_flag:abcd", "id": "5678", "etag": "abcd", "body": "damp",
+                      "property_url": "https://openrent.co.uk/1234567", "votes": {"user_1", "user_2"},
+                      "vote_count": Decimal(2), "date": "2024-03-01T10:15:00"}],
+        ["red_flag", {"partition_key": "red_flag", "id": "aHR0cHM6:5678", "etag": "abcd", "body": "damp",
+                      "property_url": "https://openrent.co.uk/1234567", "votes": ["user_1"], "date": None}],
+        ["red_flag", {"partition_key": "red_flag:abcd", "id": "5678", "etag": "abcd", "body": "damp",
+                      "property_url": "https://openrent.co.uk/1234567", "vote_count": Decimal(0),
+                      "date": "2024-03-01T10:15:00"}])
+    def test_entity_is_read_like_the_object_mapper_reads_it(self, data):
+        # arrange
+        [entity, item] = data
+        attribute_values = {name: self.__serializer.serialize(value) for name, value in item.items()}
+
+        # act
+        decoded = getattr(self.__sut, entity)(attribute_values)
+
+        # assert
+        with self.subTest(msg="assert entity matches the object mapper"):
+            self.assertEqual(decoded, getattr(self.__object_mapper_codec, entity)(item))
+
+    def test_red_flag_values_are_converted(self):
+        # act
+        red_flag = self.__sut.red_flag({"id": {"S": "5678"}, "vote_count": {"N": "3"},
+                                        "date": {"S": "2024-03-01T10:15:00"}, "votes": {"SS": ["user_1"]}})
+
+        # assert
+        with self.subTest(msg="assert vote count, date and votes are converted"):
+            self.assertEqual((red_flag.vote_count, red_flag.date, red_flag.votes),
+                             (3, datetime(2024, 3, 1, 10, 15), {"user_1"}))
+
+    def test_key_is_read_as_python_values(self):
+        # act
+        key = self.__sut.key({"partition_key": {"S": "group:1234"}, "id": {"S": "property:5678"}})
+
+        # assert
+        with self.subTest(msg="assert key can be sent back as an exclusive start key"):
+            self.assertEqual(key, {"partition_key": "group:1234", "id": "property:5678"})
@@ -12,11 +12,15 @@ from formula_thoughts_web.abstractions import ApplicationContext, Error
 from formula_thoughts_web.crosscutting import ObjectMapper
 
 from src.core import UpsertGroupRequest, Group, IGroupRepo, IUserGroupsRepo, UserGroups, CreatePropertyRequest, \
-    Property, GroupProperties, IPropertyRepo, IRedFlagRepo, CreateRedFlagRequest, RedFlag, AnonymousRedFlag
+    Property, GroupProperties, IPropertyRepo, IRedFlagRepo, CreateRedFlagRequest, RedFlag, AnonymousRedFlag, \
+    PageRequest, CreatePropertiesRequest, RedFlagsLookupRequest, IUnitOfWork, IUnitOfWorkFactory
 from src.infra import CognitoClientWrapper
+from src.infra.cache import NameClaimCache
 from src.domain import UPSERT_GROUP_REQUEST, GROUP_ID, USER_BELONGS_TO_AT_LEAST_ONE_GROUP, USER_GROUPS, \
     CREATE_PROPERTY_REQUEST, GROUP, FULLNAME_CLAIM, PROPERTY_ID, CREATE_RED_FLAG_REQUEST, RED_FLAG, PROPERTY_URL, \
-    RED_FLAGS, RED_FLAG_ID
+    RED_FLAGS, VOTED_RED_FLAG_IDS, RED_FLAG_ID, PAGE_REQUEST, NEXT_CONTINUATION_TOKEN, LIMIT, CONTINUATION_TOKEN, \
+    CREATE_PROPERTIES_REQUEST, PROPERTY_REQUEST_ERRORS, RED_FLAGS_LOOKUP_REQUEST, RED_FLAGS_BY_URL, \
+    VOTED_RED_FLAG_IDS_BY_URL, UNIT_OF_WORK, JWT_CLAIMS, REQUESTED_PROPERTY_URL, REQUESTED_PROPERTY_URLS
 from src.domain.commands import SetGroupRequestCommand, ValidateGroupCommand, \
     FetchUserGroupsCommand, ValidateIfUserBelongsToAtLeastOneGroupCommand, \
     ValidateIfGroupBelongsToUserCommand, FetchGroupByIdCommand, SetPropertyRequestCommand, CreatePropertyCommand, \
@@ -27,18 +31,23 @@ from src.domain.commands import SetGroupRequestCommand, ValidateGroupCommand, \
     GetRedFlagsCommand, ValidatePropertyUrlCommand, SetAnonymousRedFlagsCommand, GetRedFlagByIdCommand, \
     SetAnonymousRedFlagCommand, ValidateAlreadyVotedCommand, ValidateNotVotedCommand, CreateVoteCommand, \
     DeleteVoteCommand, ValidateUserIsAlreadyParticipantCommand, RemoveParticipantFromGroupCommand, \
-    RemoveGroupFromUserGroupsCommand
+    RemoveGroupFromUserGroupsCommand, FetchGroupPageByIdCommand, ValidatePageRequestCommand, \
+    FetchGroupMetadataByIdCommand, SetPropertiesRequestCommand, ValidatePropertiesRequestCommand, \
+    CreatePropertiesCommand, SetRedFlagsLookupRequestCommand, ValidateRedFlagsLookupRequestCommand, \
+    GetRedFlagsByUrlsCommand, SetAnonymousRedFlagsByUrlCommand, BeginUnitOfWorkCommand, CommitUnitOfWorkCommand
 from src.domain.errors import invalid_price_error, UserGroupsNotFoundError, GroupNotFoundError, \
     PropertyNotFoundError, \
     code_required_error, user_already_part_of_group_error, \
     property_price_required_error, property_url_required_error, property_title_required_error, InvalidRedFlagDataError, \
-    RedFlagNotFoundError, InvalidVotingStatusError, user_not_part_of_group_error
+    RedFlagNotFoundError, InvalidVotingStatusError, user_not_part_of_group_error, page_limit_invalid_error, \
+    continuation_token_invalid_error, property_batch_size_error, red_flag_property_urls_invalid_error
 from src.domain.helpers import RedFlagMappingHelper
 from src.domain.responses import CreatedGroupResponse, ListUserGroupsResponse, SingleGroupResponse, \
     GetGroupCodeResponse, SingleGroupPropertiesResponse, PropertyCreatedResponse, SingleRedFlagResponse, \
-    CreatedRedFlagResponse, ListRedFlagsResponse
+    CreatedRedFlagResponse, ListRedFlagsResponse, RejectedPropertyResult, PropertiesBatchCreatedResponse, \
+    PropertyRedFlags, RedFlagsByUrlResponse
 from src.exceptions import UserGroupsNotFoundException, GroupNotFoundException, PropertyNotFoundException, \
-    RedFlagNotFoundException
+    RedFlagNotFoundException, InvalidContinuationTokenException
 
 UUID_EXAMPLE = "723f9ec2-fec1-4616-9cf2-576ee632822d"
 UTC_NOW = datetime.datetime.fromisoformat("2024-07-04T11:09:39+00:00")
@@ -129,7 +138,7 @@ class TestFetchUserGroupsCommand(TestCase):
         user_groups.groups = [str(uuid.uuid4()), str(uuid.uuid4()), str(uuid.uuid4())]
         groups = AutoFixture().create_many(dto=Group, ammount=3)
         self.__user_groups_repo.get = MagicMock(return_value=user_groups)
-        self.__group_repo.get = MagicMock(side_effect=groups)
+        self.__group_repo.get_many = MagicMock(return_value=groups)
 
         # act
         self.__sut.run(context=context)
@@ -151,19 +160,15 @@ class TestFetchUserGroupsCommand(TestCase):
             self.__user_groups_repo.get.assert_called_with(_id=auth_user_id)
 
         # assert
-        with self.subTest("assert group repo is called 3 times for each group"):
-            self.__group_repo.get.assert_has_calls([
-                call(_id=user_groups.groups[0]),
-                call(_id=user_groups.groups[1]),
-                call(_id=user_groups.groups[2])
-            ])
+        with self.subTest("assert group repo is called once with all groups"):
+            self.__group_repo.get_many.assert_called_once_with(ids=user_groups.groups)
 
     def test_run_should_error_when_user_groups_cannot_be_found(self):
         # arrange
         auth_user_id = "12345"
         context = ApplicationContext(auth_user_id=auth_user_id, variables={})
         self.__user_groups_repo.get = MagicMock(side_effect=UserGroupsNotFoundException())
-        self.__group_repo.get = MagicMock()
+        self.__group_repo.get_many = MagicMock()
 
         # act
         self.__sut.run(context=context)
@@ -178,7 +183,7 @@ class TestFetchUserGroupsCommand(TestCase):
 
         # assert
         with self.subTest("assert user groups repo is never called"):
-            self.__group_repo.get.assert_not_called()
+            self.__group_repo.get_many.assert_not_called()
 
 
 class TestValidateIfUserBelongsToAtLeastOneGroupCommand(TestCase):
@@ -342,6 +347,152 @@ class TestFetchGroupByIdCommand(TestCase):
             self.assertEqual(type(context.error_capsules[0]), GroupNotFoundError)
 
 
+class TestFetchGroupMetadataByIdCommand(TestCase):
+
+    def setUp(self):
+        self.__group_repo: IGroupRepo = Mock()
+        self.__sut = FetchGroupMetadataByIdCommand(group_repo=self.__group_repo)
+
+    def test_run(self):
+        # arrange
+        group = AutoFixture().create(dto=Group)
+        group_id = "1234"
+        context = ApplicationContext(variables={GROUP_ID: group_id})
+        self.__group_repo.get_metadata = MagicMock(return_value=group)
+
+        # act
+        self.__sut.run(context=context)
+
+        # assert
+        with self.subTest(msg="assert repo was called with correct params"):
+            self.__group_repo.get_metadata.assert_called_once_with(_id=group_id)
+
+        # assert
+        with self.subTest(msg="assert properties were not fetched"):
+            self.__group_repo.get.assert_not_called()
+
+        # assert
+        with self.subTest(msg="group was set as context var"):
+            self.assertEqual(context.get_var(name=GROUP, _type=Group), group)
+
+        # assert
+        with self.subTest(msg="no response was set"):
+            self.assertIsNone(context.response)
+
+    def test_run_if_group_not_found(self):
+        # arrange
+        context = ApplicationContext(variables={GROUP_ID: "1234"})
+        self.__group_repo.get_metadata = MagicMock(side_effect=GroupNotFoundException())
+
+        # act
+        self.__sut.run(context=context)
+
+        # assert
+        with self.subTest(msg="single error was added"):
+            self.assertEqual(len(context.error_capsules), 1)
+
+        # assert
+        with self.subTest(msg="group not found error was added"):
+            self.assertEqual(type(context.error_capsules[0]), GroupNotFoundError)
+
+
+class TestFetchGroupPageByIdCommand(TestCase):
+
+    def setUp(self):
+        self.__group_repo: IGroupRepo = Mock()
+        self.__sut = FetchGroupPageByIdCommand(group_repo=self.__group_repo)
+
+    def test_run(self):
+        # arrange
+        group = AutoFixture().create(dto=GroupProperties)
+        group_id = "1234"
+        context = ApplicationContext(variables={
+            GROUP_ID: group_id,
+            PAGE_REQUEST: PageRequest(limit=10, continuation_token="current")
+        })
+        self.__group_repo.get_page = MagicMock(return_value=(group, "next"))
+
+        # act
+        self.__sut.run(context=context)
+
+        # assert
+        with self.subTest(msg="assert repo was called with correct params"):
+            self.__group_repo.get_page.assert_called_once_with(_id=group_id, limit=10, continuation_token="current")
+
+        # assert
+        with self.subTest(msg="group was set as context var"):
+            self.assertEqual(context.get_var(name=GROUP, _type=GroupProperties), group)
+
+        # assert
+        with self.subTest(msg="group page was set as response"):
+            self.assertEqual(context.response, SingleGroupPropertiesResponse(group_properties=group,
+                                                                             continuation_token="next"))
+
+    def test_run_if_group_not_found(self):
+        # arrange
+        context = ApplicationContext(variables={GROUP_ID: "1234", PAGE_REQUEST: PageRequest()})
+        self.__group_repo.get_page = MagicMock(side_effect=GroupNotFoundException())
+
+        # act
+        self.__sut.run(context=context)
+
+        # assert
+        with self.subTest(msg="group not found error was added"):
+            self.assertEqual(type(context.error_capsules[0]), GroupNotFoundError)
+
+    def test_run_if_continuation_token_is_invalid(self):
+        # arrange
+        context = ApplicationContext(variables={GROUP_ID: "1234", PAGE_REQUEST: PageRequest(continuation_token="x")})
+        self.__group_repo.get_page = MagicMock(side_effect=InvalidContinuationTokenException())
+
+        # act
+        self.__sut.run(context=context)
+
+        # assert
+        with self.subTest(msg="continuation token invalid error was added"):
+            self.assertEqual(context.error_capsules, [continuation_token_invalid_error])
+
+
+@ddt
+class TestValidatePageRequestCommand(TestCase):
+
+    def setUp(self):
+        self.__sut = ValidatePageRequestCommand()
+
+    @data(
+        [{}, PageRequest()],
+        [{LIMIT: "1"}, PageRequest(limit=1)],
+        [{LIMIT: "100", CONTINUATION_TOKEN: "token"}, PageRequest(limit=100, continuation_token="token")],
+        [{CONTINUATION_TOKEN: "token"}, PageRequest(continuation_token="token")])
+    def test_run_with_valid_page_request(self, data):
+        # arrange
+        [variables, page_request] = data
+        context = ApplicationContext(variables=dict(variables))
+
+        # act
+        self.__sut.run(context=context)
+
+        # assert
+        with self.subTest(msg="assert no errors are set"):
+            self.assertEqual(context.error_capsules, [])
+
+        # assert
+        with self.subTest(msg="assert page request is set"):
+            self.assertEqual(context.get_var(name=PAGE_REQUEST, _type=PageRequest), page_request)
+
+    @data("0", "101", "-1", "ten")
+    def test_run_with_invalid_limit(self, limit):
+        # arrange
+        context = ApplicationContext(variables={LIMIT: limit})
+
+        # act
+        self.__sut.run(context=context)
+
+        # assert
+        with self.subTest(msg="assert limit invalid error is set"):
+            self.assertEqual(context.error_capsules, [page_limit_invalid_error])
+
+
 class TestSetPropertyRequestCommand(TestCase):
 
     def setUp(self):
@@ -398,6 +549,159 @@ class TestCreatePropertyCommand(TestCase):
             self.assertEqual(context.response, PropertyCreatedResponse(property=expected_property))
 
 
+@ddt
+class TestSetPropertiesRequestCommand(TestCase):
+
+    def setUp(self):
+        self.__logger = Mock()
+        self.__sut = SetPropertiesRequestCommand(object_mapper=ObjectMapper(), logger=self.__logger)
+
+    def test_run(self):
+        # arrange
+        context = ApplicationContext(variables={}, body={
+            "properties": [
+                {"price": 100, "title": "flat", "url": "https://test.com/1"},
+                {"title": "flat without price", "url": "https://test.com/2"}
+            ]
+        })
+
+        # act
+        self.__sut.run(context=context)
+
+        # assert
+        with self.subTest(msg="request is set with every property"):
+            self.assertEqual(context.get_var(name=CREATE_PROPERTIES_REQUEST, _type=CreatePropertiesRequest),
+                             CreatePropertiesRequest(properties=[
+                                 CreatePropertyRequest(price=100, title="flat", url="https://test.com/1"),
+                                 CreatePropertyRequest(title="flat without price", url="https://test.com/2")
+                             ]))
+
+    @data("abc", None, ["abc"])
+    def test_run_when_properties_are_not_a_list_of_objects(self, properties):
+        # arrange
+        context = ApplicationContext(variables={}, body={"properties": properties})
+
+        # act
+        self.__sut.run(context=context)
+
+        # assert
+        with self.subTest(msg="properties are left for validation"):
+            self.assertEqual(context.get_var(name=CREATE_PROPERTIES_REQUEST, _type=CreatePropertiesRequest),
+                             CreatePropertiesRequest(properties=properties))
+
+
+@ddt
+class TestValidatePropertiesRequestCommand(TestCase):
+
+    def setUp(self):
+        self.__sut = ValidatePropertiesRequestCommand()
+
+    def test_run_collects_errors_per_property(self):
+        # arrange
+        context = ApplicationContext(variables={
+            CREATE_PROPERTIES_REQUEST: CreatePropertiesRequest(properties=[
+                CreatePropertyRequest(price=Decimal(100), title="flat", url="https://test.com/1"),
+                CreatePropertyRequest(price=Decimal(-1), title=None, url="https://test.com/2")
+            ])
+        })
+
+        # act
+        self.__sut.run(context=context)
+
+        # assert
+        with self.subTest(msg="batch is not rejected"):
+            self.assertEqual(context.error_capsules, [])
+
+        # assert
+        with self.subTest(msg="errors are set per property"):
+            self.assertEqual(context.get_var(name=PROPERTY_REQUEST_ERRORS, _type=list),
+                             [[], [invalid_price_error, property_title_required_error]])
+
+    @data(0, 101)
+    def test_run_when_batch_size_out_of_bounds(self, size):
+        # arrange
+        context = ApplicationContext(variables={
+            CREATE_PROPERTIES_REQUEST: CreatePropertiesRequest(
+                properties=AutoFixture().create_many(dto=CreatePropertyRequest, ammount=size) if size > 0 else [])
+        })
+
+        # act
+        self.__sut.run(context=context)
+
+        # assert
+        with self.subTest(msg="batch is rejected"):
+            self.assertEqual(context.error_capsules, [property_batch_size_error])
+
+    @data("abc", None, ["abc"])
+    def test_run_when_properties_are_not_a_list_of_properties(self, properties):
+        # arrange
+        context = ApplicationContext(variables={
+            CREATE_PROPERTIES_REQUEST: CreatePropertiesRequest(properties=properties)
+        })
+
+        # act
+        self.__sut.run(context=context)
+
+        # assert
+        with self.subTest(msg="batch is rejected"):
+            self.assertEqual(context.error_capsules, [property_batch_size_error])
+
+
+class TestCreatePropertiesCommand(TestCase):
+
+    def setUp(self):
+        self.__property_repo: IPropertyRepo = Mock()
+        self.__sut = CreatePropertiesCommand(property_repo=self.__property_repo)
+
+    @patch('uuid.uuid4', return_value=UUID(UUID_EXAMPLE))
+    def test_run_creates_valid_properties_in_one_batch(self, _):
+        # arrange
+        group = AutoFixture().create(dto=Group)
+        user_groups = AutoFixture().create(dto=UserGroups)
+        property_requests = AutoFixture().create_many(dto=CreatePropertyRequest, ammount=3)
+        context = ApplicationContext(variables={
+            CREATE_PROPERTIES_REQUEST: CreatePropertiesRequest(properties=property_requests),
+            PROPERTY_REQUEST_ERRORS: [[], [property_url_required_error], []],
+            GROUP: group,
+            USER_GROUPS: user_groups
+        })
+        expected_properties = [Property(url=property_request.url,
+                                        title=property_request.title,
+                                        price=property_request.price,
+                                        added_by=user_groups.name)
+                               for property_request in [property_requests[0], property_requests[2]]]
+
+        # act
+        self.__sut.run(context=context)
+
+        # assert
+        with self.subTest(msg="valid properties are created in one call"):
+            self.__property_repo.create_many.assert_called_once_with(group_id=group.id,
+                                                                     properties=expected_properties)
+
+        # assert
+        with self.subTest(msg="response has created and rejected properties"):
+            self.assertEqual(context.response, PropertiesBatchCreatedResponse(
+                properties=expected_properties,
+                rejected=[RejectedPropertyResult(index=1, errors=[property_url_required_error.message])]))
+
+    def test_run_when_no_property_is_valid(self):
+        # arrange
+        context = ApplicationContext(variables={
+            CREATE_PROPERTIES_REQUEST: CreatePropertiesRequest(properties=[CreatePropertyRequest()]),
+            PROPERTY_REQUEST_ERRORS: [[property_price_required_error]],
+            GROUP: AutoFixture().create(dto=Group),
+            USER_GROUPS: AutoFixture().create(dto=UserGroups)
+        })
+
+        # act
+        self.__sut.run(context=context)
+
+        # assert
+        with self.subTest(msg="nothing is written"):
+            self.__property_repo.create_many.assert_not_called()
+
+
 @ddt
 class TestValidatePropertyRequestCommand(TestCase):
 
@@ -460,9 +764,11 @@ class TestAddCurrentUserToGroupCommand(TestCase):
                                participants=group.participants,
                                price_limit=group.price_limit,
                                locations=group.locations)
+        unit_of_work: IUnitOfWork = Mock()
         context = ApplicationContext(variables={
             GROUP: group,
-            FULLNAME_CLAIM: fullname
+            FULLNAME_CLAIM: fullname,
+            UNIT_OF_WORK: unit_of_work
         })
         self.__group_repo.add_participant = MagicMock()
 
@@ -476,7 +782,8 @@ class TestAddCurrentUserToGroupCommand(TestCase):
         # assert
         with self.subTest(msg="assert add user is called with correct args"):
             self.__group_repo.add_participant.assert_called_with(participant=fullname,
-                                                                 group=expected_group)
+                                                                 group=expected_group,
+                                                                 unit_of_work=unit_of_work)
 
         # assert
         with self.subTest(msg="assert response is set"):
@@ -583,7 +890,9 @@ class TestFetchAuthUserClaimsCommand(TestCase):
 
     def setUp(self):
         self.__cognito_wrapper: CognitoClientWrapper = Mock()
-        self.__sut = FetchAuthUserClaimsIfUserDoesNotExistCommand(cognito_wrapper=self.__cognito_wrapper)
+        self.__name_claim_cache = NameClaimCache(max_size=10, ttl_seconds=60)
+        self.__sut = FetchAuthUserClaimsIfUserDoesNotExistCommand(cognito_wrapper=self.__cognito_wrapper,
+                                                                  name_claim_cache=self.__name_claim_cache)
 
     @patch.dict(os.environ, {"USER_POOL_ID": USER_POOL})
     def test_run_should_fetch_name_and_set_it(self):
@@ -638,6 +947,82 @@ class TestFetchAuthUserClaimsCommand(TestCase):
         with self.subTest(msg="assert full name was set as var"):
             self.assertEqual(context.get_var(FULLNAME_CLAIM, str), user_groups.name)
 
+    @patch.dict(os.environ, {"USER_POOL_ID": USER_POOL})
+    def test_run_should_fetch_name_once_per_user(self):
+        # arrange
+        name = "test user"
+        self.__cognito_wrapper.admin_get_user = MagicMock(return_value={
+            'UserAttributes': [
+                {
+                    'Name': 'name',
+                    'Value': name
+                },
+            ]
+        })
+        contexts = [ApplicationContext(variables={
+            USER_BELONGS_TO_AT_LEAST_ONE_GROUP: False
+        }, auth_user_id="1234") for _ in range(2)]
+
+        # act
+        for context in contexts:
+            self.__sut.run(context=context)
+
+        # assert
+        with self.subTest(msg="assert cognito was called once"):
+            self.__cognito_wrapper.admin_get_user.assert_called_once()
+
+        # assert
+        with self.subTest(msg="assert cached full name was set as var"):
+            self.assertEqual(contexts[1].get_var(FULLNAME_CLAIM, str), name)
+
+    @patch.dict(os.environ, {"USER_POOL_ID": USER_POOL, "NAME_CLAIM_SOURCE": "jwt"})
+    def test_run_should_read_name_from_jwt_claims(self):
+        # arrange
+        context = ApplicationContext(variables={
+            USER_BELONGS_TO_AT_LEAST_ONE_GROUP: False,
+            JWT_CLAIMS: {"name": "test user"}
+        }, auth_user_id="1234")
+        self.__cognito_wrapper.admin_get_user = MagicMock()
+
+        # act
+        self.__sut.run(context=context)
+
+        # assert
+        with self.subTest(msg="cognito is not called"):
+            self.__cognito_wrapper.admin_get_user.assert_not_called()
+
+        # assert
+        with self.subTest(msg="assert full name was set as var"):
+            self.assertEqual(context.get_var(FULLNAME_CLAIM, str), "test user")
+
+    @patch.dict(os.environ, {"USER_POOL_ID": USER_POOL, "NAME_CLAIM_SOURCE": "jwt"})
+    def test_run_should_fetch_name_when_jwt_has_no_name_claim(self):
+        # arrange
+        context = ApplicationContext(variables={
+            USER_BELONGS_TO_AT_LEAST_ONE_GROUP: False,
+            JWT_CLAIMS: {"username": "1234"},
+            "name": "name from query string"
+        }, auth_user_id="1234")
+        self.__cognito_wrapper.admin_get_user = MagicMock(return_value={
+            'UserAttributes': [
+                {
+                    'Name': 'name',
+                    'Value': "test user"
+                },
+            ]
+        })
+
+        # act
+        self.__sut.run(context=context)
+
+        # assert
+        with self.subTest(msg="assert cognito was called with correct params"):
+            self.__cognito_wrapper.admin_get_user.assert_called_once_with(user_pool_id=USER_POOL, username="1234")
+
+        # assert
+        with self.subTest(msg="assert full name was set as var"):
+            self.assertEqual(context.get_var(FULLNAME_CLAIM, str), "test user")
+
 
 class TestCreateGroupCommand(TestCase):
 
@@ -705,7 +1090,7 @@ class TestCreateUserGroupsCommand(TestCase):
 
         # assert
         with self.subTest(msg="user group is created with correct fields"):
-            self.__user_groups_repo.create.assert_called_with(user_groups=expected_user_groups)
+            self.__user_groups_repo.create.assert_called_with(user_groups=expected_user_groups, unit_of_work=None)
 
         # assert
         with self.subTest(msg="user groups var is set"):
@@ -719,11 +1104,13 @@ class TestCreateUserGroupsCommand(TestCase):
         auth_user_id = "1234"
         group_id = "group_id"
         user_groups = AutoFixture().create(dto=UserGroups)
+        unit_of_work: IUnitOfWork = Mock()
         context = ApplicationContext(variables={
             USER_BELONGS_TO_AT_LEAST_ONE_GROUP: True,
             FULLNAME_CLAIM: gannon,
             GROUP_ID: group_id,
-            USER_GROUPS: user_groups
+            USER_GROUPS: user_groups,
+            UNIT_OF_WORK: unit_of_work
         }, auth_user_id=auth_user_id)
 
         # act
@@ -739,7 +1126,8 @@ class TestCreateUserGroupsCommand(TestCase):
 
         # assert
         with self.subTest(msg="correct group is added"):
-            self.__user_groups_repo.add_group.assert_called_with(user_groups=user_groups, group=group_id)
+            self.__user_groups_repo.add_group.assert_called_with(user_groups=user_groups, group=group_id,
+                                                                 unit_of_work=unit_of_work)
 
 
 class TestUpdateGroupCommand(TestCase):
@@ -896,10 +1284,12 @@ class TestValidateRedFlagRequestCommand(TestCase):
         self.__sut = ValidateRedFlagRequestCommand()
 
     @data(
-        ["https://www.website.com", "https://www.website.com"],
-        ["https://www.website.com?param=value", "https://www.website.com"],
-        ["https://www.website.com/flat/1408?param=value", "https://www.website.com/flat/1408"],
-        ["https://www.website.com#param=value", "https://www.website.com"])
+        ["https://www.website.com", "https://website.com"],
+        ["https://www.website.com?param=value", "https://website.com"],
+        ["https://www.website.com/flat/1408?param=value", "https://website.com/flat/1408"],
+        ["https://www.website.com#param=value", "https://website.com"],
+        ["HTTPS://WWW.Website.com/flat/1408/", "https://website.com/flat/1408"],
+        ["https://www.rightmove.co.uk/properties/123456#/?channel=RES_LET", "https://rightmove.co.uk/properties/123456"])
     def test_run_when_valid(self, data):
         # arrange
         [property_url, expected_parsed_property_url] = data
@@ -1003,27 +1393,62 @@ class TestGetRedFlagsCommand(TestCase):
     def test_run(self):
         # arrange
         property_url = "http://example.com"
+        continuation_token = "next"
         red_flags = AutoFixture().create_many(dto=RedFlag, ammount=5)
-        self.__red_flag_repo.get_by_url = MagicMock(return_value=red_flags)
+        self.__red_flag_repo.get_page_by_url = MagicMock(return_value=(red_flags, continuation_token))
+        self.__red_flag_repo.get_voted_ids = MagicMock(return_value={red_flags[0].id})
         context = ApplicationContext(variables={
-            PROPERTY_URL: property_url
-        })
+            PROPERTY_URL: property_url,
+            REQUESTED_PROPERTY_URL: "http://www.example.com/?ref=search",
+            PAGE_REQUEST: PageRequest(limit=5, continuation_token="current")
+        }, auth_user_id="1234")
 
         # act
         self.__sut.run(context=context)
 
         # assert
         with self.subTest(msg="assert red flags are fetched once"):
-            self.__red_flag_repo.get_by_url.assert_called_once()
+            self.__red_flag_repo.get_page_by_url.assert_called_once()
 
         # assert
-        with self.subTest(msg="assert red flags are fetched with correct property url"):
-            self.__red_flag_repo.get_by_url.assert_called_with(property_url=property_url)
+        with self.subTest(msg="assert red flags are fetched with correct property url and page"):
+            self.__red_flag_repo.get_page_by_url.assert_called_with(
+                property_url=property_url,
+                limit=5,
+                continuation_token="current",
+                requested_property_url="http://www.example.com/?ref=search")
 
         # assert
-        with self.subTest(msg="assert red flags are fetched with correct property url"):
+        with self.subTest(msg="assert red flags are set"):
             self.assertEqual(context.get_var(name=RED_FLAGS, _type=list[RedFlag]), red_flags)
 
+        # assert
+        with self.subTest(msg="assert next continuation token is set"):
+            self.assertEqual(context.get_var(name=NEXT_CONTINUATION_TOKEN, _type=str), continuation_token)
+
+        # assert
+        with self.subTest(msg="assert votes of current user are looked up for the property url"):
+            self.__red_flag_repo.get_voted_ids.assert_called_once_with(user_id="1234", property_url=property_url)
+
+        # assert
+        with self.subTest(msg="assert voted red flag ids are set"):
+            self.assertEqual(context.get_var(name=VOTED_RED_FLAG_IDS, _type=set), {red_flags[0].id})
+
+    def test_run_when_continuation_token_is_invalid(self):
+        # arrange
+        self.__red_flag_repo.get_page_by_url = MagicMock(side_effect=InvalidContinuationTokenException())
+        context = ApplicationContext(variables={
+            PROPERTY_URL: "http://example.com",
+            PAGE_REQUEST: PageRequest(continuation_token="invalid")
+        })
+
+        # act
+        self.__sut.run(context=context)
+
+        # assert
+        with self.subTest(msg="assert continuation token invalid error is set"):
+            self.assertEqual(context.error_capsules, [continuation_token_invalid_error])
+
 
 class TestIValidatePropertyUrlCommand(TestCase):
 
@@ -1063,6 +1488,10 @@ class TestIValidatePropertyUrlCommand(TestCase):
         with self.subTest(msg="url params are trimmed"):
             self.assertEqual(context.get_var(name=PROPERTY_URL, _type=str), property_url)
 
+        # assert
+        with self.subTest(msg="url as requested is kept"):
+            self.assertEqual(context.get_var(name=REQUESTED_PROPERTY_URL, _type=str), property_url_with_params)
+
     def test_run_when_property_is_not_set(self):
         # arrange
         context = ApplicationContext(variables={})
@@ -1087,27 +1516,196 @@ class TestSetAnonymousRedFlagsCommand(TestCase):
         red_flags = AutoFixture().create_many(dto=RedFlag, ammount=5)
         anonymous_red_flags = AutoFixture().create_many(dto=AnonymousRedFlag, ammount=5)
         context = ApplicationContext(variables={
-            RED_FLAGS: red_flags
+            RED_FLAGS: red_flags,
+            VOTED_RED_FLAG_IDS: {red_flags[1].id},
+            NEXT_CONTINUATION_TOKEN: "next"
         }, auth_user_id=user)
-        self.__red_flag_mapping_helper.map_to_anonymous = Mock()
-        self.__red_flag_mapping_helper.map_to_anonymous.side_effect = anonymous_red_flags
+        self.__red_flag_mapping_helper.map_listed_to_anonymous = Mock()
+        self.__red_flag_mapping_helper.map_listed_to_anonymous.side_effect = anonymous_red_flags
 
         # act
         self.__sut.run(context=context)
 
         # assert
         with self.subTest(msg="assert red flag mapper was called 5 times"):
-            self.__red_flag_mapping_helper.map_to_anonymous.assert_has_calls([
-                call(current_user=user, red_flag=red_flags[0]),
-                call(current_user=user, red_flag=red_flags[1]),
-                call(current_user=user, red_flag=red_flags[2]),
-                call(current_user=user, red_flag=red_flags[3]),
-                call(current_user=user, red_flag=red_flags[4])
+            self.__red_flag_mapping_helper.map_listed_to_anonymous.assert_has_calls([
+                call(red_flag=red_flags[0], voted_by_me=False),
+                call(red_flag=red_flags[1], voted_by_me=True),
+                call(red_flag=red_flags[2], voted_by_me=False),
+                call(red_flag=red_flags[3], voted_by_me=False),
+                call(red_flag=red_flags[4], voted_by_me=False)
             ])
 
         # assert
         with self.subTest(msg="assert red flags response was set"):
-            self.assertEqual(context.response, ListRedFlagsResponse(red_flags=anonymous_red_flags))
+            self.assertEqual(context.response, ListRedFlagsResponse(red_flags=anonymous_red_flags,
+                                                                    continuation_token="next"))
+
+
+class TestSetRedFlagsLookupRequestCommand(TestCase):
+
+    def setUp(self):
+        self.__sut = SetRedFlagsLookupRequestCommand(object_mapper=ObjectMapper(), logger=Mock())
+
+    def test_run(self):
+        # arrange
+        context = ApplicationContext(variables={}, body={
+            "property_urls": ["https://test.com/1", "https://test.com/2"]
+        })
+
+        # act
+        self.__sut.run(context=context)
+
+        # assert
+        with self.subTest(msg="request is set"):
+            self.assertEqual(context.get_var(name=RED_FLAGS_LOOKUP_REQUEST, _type=RedFlagsLookupRequest),
+                             RedFlagsLookupRequest(property_urls=["https://test.com/1", "https://test.com/2"]))
+
+
+@ddt
+class TestValidateRedFlagsLookupRequestCommand(TestCase):
+
+    def setUp(self):
+        self.__sut = ValidateRedFlagsLookupRequestCommand()
+
+    def test_run_normalizes_and_deduplicates_urls(self):
+        # arrange
+        request = RedFlagsLookupRequest(property_urls=["https://test.com/1?ref=search",
+                                                       "https://test.com/2",
+                                                       "https://test.com/1"])
+        context = ApplicationContext(variables={RED_FLAGS_LOOKUP_REQUEST: request})
+
+        # act
+        self.__sut.run(context=context)
+
+        # assert
+        with self.subTest(msg="no errors occur"):
+            self.assertEqual(context.error_capsules, [])
+
+        # assert
+        with self.subTest(msg="urls are normalized once in order"):
+            self.assertEqual(request.property_urls, ["https://test.com/1", "https://test.com/2"])
+
+        # assert
+        with self.subTest(msg="urls as requested are kept by normalized url"):
+            self.assertEqual(context.get_var(name=REQUESTED_PROPERTY_URLS, _type=dict), {
+                "https://test.com/1": ["https://test.com/1?ref=search", "https://test.com/1"],
+                "https://test.com/2": ["https://test.com/2"]
+            })
+
+    @data(0, 101)
+    def test_run_when_url_count_out_of_bounds(self, count):
+        # arrange
+        context = ApplicationContext(variables={
+            RED_FLAGS_LOOKUP_REQUEST: RedFlagsLookupRequest(
+                property_urls=[f"https://test.com/{i}" for i in range(count)])
+        })
+
+        # act
+        self.__sut.run(context=context)
+
+        # assert
+        with self.subTest(msg="request is rejected"):
+            self.assertEqual(context.error_capsules, [red_flag_property_urls_invalid_error])
+
+    @data("abcdef", [123], [None], [""], ["https://test.com/1", None], None)
+    def test_run_when_urls_are_not_non_empty_strings(self, property_urls):
+        # arrange
+        request = RedFlagsLookupRequest(property_urls=property_urls)
+        context = ApplicationContext(variables={RED_FLAGS_LOOKUP_REQUEST: request})
+
+        # act
+        self.__sut.run(context=context)
+
+        # assert
+        with self.subTest(msg="request is rejected"):
+            self.assertEqual(context.error_capsules, [red_flag_property_urls_invalid_error])
+
+        # assert
+        with self.subTest(msg="urls are left as sent"):
+            self.assertEqual(request.property_urls, property_urls)
+
+
+class TestGetRedFlagsByUrlsCommand(TestCase):
+
+    def setUp(self):
+        self.__red_flag_repo: IRedFlagRepo = Mock()
+        self.__sut = GetRedFlagsByUrlsCommand(red_flag_repo=self.__red_flag_repo)
+
+    def test_run(self):
+        # arrange
+        property_urls = ["https://test.com/1", "https://test.com/2"]
+        red_flags_by_url = {property_urls[0]: AutoFixture().create_many(dto=RedFlag, ammount=2),
+                            property_urls[1]: []}
+        voted_ids_by_url = {property_urls[0]: {red_flags_by_url[property_urls[0]][0].id},
+                            property_urls[1]: set()}
+        requested_property_urls = {property_urls[0]: ["https://www.test.com/1/"], property_urls[1]: [property_urls[1]]}
+        context = ApplicationContext(variables={
+            RED_FLAGS_LOOKUP_REQUEST: RedFlagsLookupRequest(property_urls=property_urls),
+            REQUESTED_PROPERTY_URLS: requested_property_urls
+        }, auth_user_id="1234")
+        self.__red_flag_repo.get_listed_by_urls = Mock(return_value=red_flags_by_url)
+        self.__red_flag_repo.get_voted_ids_by_urls = Mock(return_value=voted_ids_by_url)
+
+        # act
+        self.__sut.run(context=context)
+
+        # assert
+        with self.subTest(msg="red flags are read for every url at once"):
+            self.__red_flag_repo.get_listed_by_urls.assert_called_once_with(
+                property_urls=property_urls,
+                requested_property_urls=requested_property_urls)
+
+        # assert
+        with self.subTest(msg="votes of current user are read for every url at once"):
+            self.__red_flag_repo.get_voted_ids_by_urls.assert_called_once_with(user_id="1234",
+                                                                               property_urls=property_urls)
+
+        # assert
+        with self.subTest(msg="red flags and votes are set"):
+            self.assertEqual((context.get_var(name=RED_FLAGS_BY_URL, _type=dict),
+                              context.get_var(name=VOTED_RED_FLAG_IDS_BY_URL, _type=dict)),
+                             (red_flags_by_url, voted_ids_by_url))
+
+
+class TestSetAnonymousRedFlagsByUrlCommand(TestCase):
+
+    def setUp(self):
+        self.__red_flag_mapping_helper: RedFlagMappingHelper = Mock()
+        self.__sut = SetAnonymousRedFlagsByUrlCommand(red_flag_mapping_helper=self.__red_flag_mapping_helper)
+
+    def test_run(self):
+        # arrange
+        red_flags = AutoFixture().create_many(dto=RedFlag, ammount=3)
+        anonymous_red_flags = AutoFixture().create_many(dto=AnonymousRedFlag, ammount=3)
+        context = ApplicationContext(variables={
+            RED_FLAGS_BY_URL: {"https://test.com/1": red_flags[:2],
+                               "https://test.com/2": red_flags[2:],
+                               "https://test.com/3": []},
+            VOTED_RED_FLAG_IDS_BY_URL: {"https://test.com/1": {red_flags[1].id},
+                                        "https://test.com/2": set(),
+                                        "https://test.com/3": set()}
+        })
+        self.__red_flag_mapping_helper.map_listed_to_anonymous = Mock(side_effect=anonymous_red_flags)
+
+        # act
+        self.__sut.run(context=context)
+
+        # assert
+        with self.subTest(msg="assert red flags are mapped with votes of their url"):
+            self.__red_flag_mapping_helper.map_listed_to_anonymous.assert_has_calls([
+                call(red_flag=red_flags[0], voted_by_me=False),
+                call(red_flag=red_flags[1], voted_by_me=True),
+                call(red_flag=red_flags[2], voted_by_me=False)
+            ])
+
+        # assert
+        with self.subTest(msg="assert red flags are grouped by url"):
+            self.assertEqual(context.response, RedFlagsByUrlResponse(property_red_flags=[
+                PropertyRedFlags(property_url="https://test.com/1", red_flags=anonymous_red_flags[:2]),
+                PropertyRedFlags(property_url="https://test.com/2", red_flags=anonymous_red_flags[2:]),
+                PropertyRedFlags(property_url="https://test.com/3", red_flags=[])
+            ]))
 
 
 class TestGetRedFlagByIdCommand(TestCase):
@@ -1136,7 +1734,8 @@ class TestGetRedFlagByIdCommand(TestCase):
 
         # arrange
         with self.subTest(msg="assert repo is called once"):
-            self.__red_flag_repo.get.assert_called_with(property_url=property_url, _id=red_flag_id)
+            self.__red_flag_repo.get.assert_called_with(property_url=property_url, _id=red_flag_id,
+                                                        requested_property_url=None)
 
         # arrange
         with self.subTest(msg="red flag variable is set"):
@@ -1203,7 +1802,7 @@ class TestValidateAlreadyVotedCommand(TestCase):
         # arrange
         user = "1234"
         red_flag = AutoFixture().create(dto=RedFlag)
-        red_flag.votes.append(user)
+        red_flag.votes.add(user)
         context = ApplicationContext(variables={
             RED_FLAG: red_flag
         }, auth_user_id=user)
@@ -1240,7 +1839,7 @@ class TestValidateNotVotedCommand(TestCase):
         # arrange
         user = "1234"
         red_flag = AutoFixture().create(dto=RedFlag)
-        red_flag.votes.append(user)
+        red_flag.votes.add(user)
         context = ApplicationContext(variables={
             RED_FLAG: red_flag
         }, auth_user_id=user)
@@ -1376,9 +1975,11 @@ class TestRemoveParticipantFromGroupCommand(TestCase):
         # arrange
         fullname = "full name"
         group = AutoFixture().create(dto=GroupProperties)
+        unit_of_work: IUnitOfWork = Mock()
         context = ApplicationContext(variables={
             GROUP: group,
-            FULLNAME_CLAIM: fullname
+            FULLNAME_CLAIM: fullname,
+            UNIT_OF_WORK: unit_of_work
         })
         self.__group_repo.remove_participant = MagicMock()
 
@@ -1392,7 +1993,8 @@ class TestRemoveParticipantFromGroupCommand(TestCase):
         # assert
         with self.subTest(msg="assert remove user is called with correct args"):
             self.__group_repo.remove_participant.assert_called_with(participant=fullname,
-                                                                    group=group)
+                                                                    group=group,
+                                                                    unit_of_work=unit_of_work)
 
         # assert
         with self.subTest(msg="assert response is set"):
@@ -1409,9 +2011,11 @@ class TestRemoveGroupFromUserGroupsCommand(TestCase):
         # arrange
         user_groups = AutoFixture().create(dto=UserGroups)
         group_id = "1234"
+        unit_of_work: IUnitOfWork = Mock()
         context = ApplicationContext(variables={
             GROUP_ID: group_id,
-            USER_GROUPS: user_groups
+            USER_GROUPS: user_groups,
+            UNIT_OF_WORK: unit_of_work
         })
         self.__user_groups_repo.remove_group = MagicMock()
 
@@ -1425,4 +2029,45 @@ class TestRemoveGroupFromUserGroupsCommand(TestCase):
         # assert
         with self.subTest(msg="assert remove group is called with correct args"):
             self.__user_groups_repo.remove_group.assert_called_with(user_groups=user_groups,
-                                                                    group=group_id)
+                                                                    group=group_id,
+                                                                    unit_of_work=unit_of_work)
+
+
+class TestBeginUnitOfWorkCommand(TestCase):
+
+    def setUp(self):
+        self.__unit_of_work_factory: IUnitOfWorkFactory = Mock()
+        self.__sut = BeginUnitOfWorkCommand(unit_of_work_factory=self.__unit_of_work_factory)
+
+    def test_run(self):
+        # arrange
+        unit_of_work: IUnitOfWork = Mock()
+        self.__unit_of_work_factory.begin_unit_of_work = MagicMock(return_value=unit_of_work)
+        context = ApplicationContext(variables={})
+
+        # act
+        self.__sut.run(context=context)
+
+        # assert
+        with self.subTest(msg="assert unit of work is set"):
+            self.assertEqual(context.get_var(name=UNIT_OF_WORK, _type=IUnitOfWork), unit_of_work)
+
+
+class TestCommitUnitOfWorkCommand(TestCase):
+
+    def setUp(self):
+        self.__sut = CommitUnitOfWorkCommand()
+
+    def test_run(self):
+        # arrange
+        unit_of_work: IUnitOfWork = Mock()
+        context = ApplicationContext(variables={
+            UNIT_OF_WORK: unit_of_work
+        })
+
+        # act
+        self.__sut.run(context=context)
+
+        # assert
+        with self.subTest(msg="assert unit of work is committed once"):
+            unit_of_work.commit.assert_called_once()
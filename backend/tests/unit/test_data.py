@@ -4,6 +4,7 @@ from unittest import TestCase
 from attr import dataclass
 from formula_thoughts_web.crosscutting import JsonSnakeToCamelSerializer, ObjectMapper
 
+from src.core import Group, GroupProperties, Property
 from src.infra import ObjectHasher
 
 
@@ -14,6 +15,16 @@ class TestModel:
     prop3: Decimal = None
 
 
+@dataclass(unsafe_hash=True)
+class UnslottedGroup:
+    etag: str = None
+    partition_key: str = None
+    id: str = None
+    participants: list = None
+    price_limit: Decimal = None
+    locations: list = None
+
+
 class ObjectHasherTestCase(TestCase):
 
     def setUp(self):
@@ -26,3 +37,76 @@ class ObjectHasherTestCase(TestCase):
 
         with self.subTest(msg="hash should be md5 of object"):
             self.assertEqual("36b84f7fd9583486019daf32a325204b", hash)
+
+    def test_hash_change_should_chain_previous_etag(self):
+        first = self.__sut.hash_change(etag="36b84f7fd9583486019daf32a325204b", change="add_voter", value="1234")
+        second = self.__sut.hash_change(etag=first, change="remove_voter", value="1234")
+        third = self.__sut.hash_change(etag=second, change="add_voter", value="1234")
+
+        with self.subTest(msg="hash change should be deterministic"):
+            self.assertEqual(first,
+                             self.__sut.hash_change(etag="36b84f7fd9583486019daf32a325204b",
+                                                    change="add_voter",
+                                                    value="1234"))
+
+        with self.subTest(msg="hash change should not repeat etags when a change is reverted"):
+            self.assertEqual(len({"36b84f7fd9583486019daf32a325204b", first, second, third}), 4)
+
+
+class SlottedEntityTestCase(TestCase):
+
+    def setUp(self):
+        self.__object_mapper = ObjectMapper()
+        self.__object_hasher = ObjectHasher(serializer=JsonSnakeToCamelSerializer(),
+                                            object_mapper=self.__object_mapper)
+
+    def test_entity_has_no_instance_dict(self):
+        with self.subTest(msg="fields should be kept in slots"):
+            self.assertEqual([entity.__dictoffset__ for entity in [Group, GroupProperties, Property]], [0, 0, 0])
+
+        with self.subTest(msg="attributes other than fields should not be set"):
+            with self.assertRaises(AttributeError):
+                Property().votes = 1
+
+    def test_object_mapper_should_map_to_and_from_entity(self):
+        group_properties = self.__object_mapper.map_from_dict(_from={
+            "id": "1234",
+            "price_limit": "1200.5",
+            "properties": [{"id": "5678", "url": "https://openrent.co.uk/1234567", "price": "950"}]
+        }, to=GroupProperties)
+
+        with self.subTest(msg="dict should be mapped to nested entities"):
+            self.assertEqual(group_properties, GroupProperties(id="1234", price_limit=Decimal("1200.5"), properties=[
+                Property(id="5678", url="https://openrent.co.uk/1234567", price=Decimal("950"))
+            ]))
+
+        with self.subTest(msg="entity should be mapped back to a dict"):
+            self.assertEqual(self.__object_mapper.map_to_dict(_from=group_properties.properties[0], to=Property,
+                                                              preserve_decimal=True),
+                             {"etag": None, "partition_key": None, "id": "5678",
+                              "url": "https://openrent.co.uk/1234567", "title": None, "price": "950", "added_by": None})
+
+    def test_hash_should_match_unslotted_entity(self):
+        group = Group(id="group:1234", partition_key="group:1234", participants=["user_1"],
+                      price_limit=Decimal("1200.5"), locations=["SW4"])
+        unslotted_group = UnslottedGroup(id="group:1234", partition_key="group:1234", participants=["user_1"],
+                                         price_limit=Decimal("1200.5"), locations=["SW4"])
+
+        with self.subTest(msg="etags stored before entities were slotted should stay valid"):
+            self.assertEqual(self.__object_hasher.hash(object=group), self.__object_hasher.hash(object=unslotted_group))
+
+    def test_dict_should_be_a_view_of_the_fields(self):
+        prop = Property(id="5678", title="2 bed flat")
+        fields = vars(prop)
+        prop.title = "3 bed flat"
+        fields["price"] = Decimal("950")
+
+        with self.subTest(msg="fields changed on the entity should be read through the view"):
+            self.assertEqual((fields["title"], dict(fields)["title"], {**fields}["title"]),
+                             ("3 bed flat", "3 bed flat", "3 bed flat"))
+
+        with self.subTest(msg="items set on the view should be set on the entity"):
+            self.assertEqual(prop.price, Decimal("950"))
+
+        with self.subTest(msg="view should be serialized with the values of the entity"):
+            self.assertEqual(self.__object_mapper.map_to_dict(_from=prop, to=Property)["title"], "3 bed flat")
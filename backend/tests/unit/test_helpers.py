@@ -16,7 +16,7 @@ class TestRedFlagMappingHelper(TestCase):
         # arrange
         user = "1234"
         red_flag = AutoFixture().create(dto=RedFlag)
-        red_flag.votes = [user, "12345", "123346"]
+        red_flag.votes = {user, "12345", "123346"}
 
         # act
         returned_red_flag = self.__sut.map_to_anonymous(current_user=user, red_flag=red_flag)
@@ -38,7 +38,7 @@ class TestRedFlagMappingHelper(TestCase):
         # arrange
         user = "1234"
         red_flag = AutoFixture().create(dto=RedFlag)
-        red_flag.votes = ["12345", "123346"]
+        red_flag.votes = {"12345", "123346"}
 
         # act
         returned_red_flag = self.__sut.map_to_anonymous(current_user=user, red_flag=red_flag)
@@ -55,3 +55,24 @@ class TestRedFlagMappingHelper(TestCase):
                 voted_by_me=False,
                 date=red_flag.date
             ))
+
+    def test_map_listed_to_anonymous(self):
+        # arrange
+        red_flag = AutoFixture().create(dto=RedFlag)
+        red_flag.vote_count = 3
+
+        # act
+        returned_red_flag = self.__sut.map_listed_to_anonymous(red_flag=red_flag, voted_by_me=True)
+
+        # arrange
+        with self.subTest(msg="response is set to red flag"):
+            self.assertEqual(returned_red_flag, AnonymousRedFlag(
+                etag=red_flag.etag,
+                partition_key=red_flag.partition_key,
+                id=red_flag.id,
+                body=red_flag.body,
+                property_url=red_flag.property_url,
+                votes=3,
+                voted_by_me=True,
+                date=red_flag.date
+            ))
@@ -0,0 +1,51 @@
+from unittest import TestCase
+
+from ddt import ddt, data
+
+from src.infra import canonicalize_property_url, CanonicalPropertyUrl
+
+
+@ddt
+class TestCanonicalizePropertyUrl(TestCase):
+
+    @data(
+        ["https://www.rightmove.co.uk/properties/123456789#/?channel=RES_LET",
+         CanonicalPropertyUrl(url="https://rightmove.co.uk/properties/123456789", listing_id="rightmove:123456789")],
+        ["https://www.rightmove.co.uk/property-to-rent/property-5555.html",
+         CanonicalPropertyUrl(url="https://rightmove.co.uk/properties/5555", listing_id="rightmove:5555")],
+        ["https://www.zoopla.co.uk/to-rent/details/66778899/?search_identifier=abc",
+         CanonicalPropertyUrl(url="https://zoopla.co.uk/to-rent/details/66778899", listing_id="zoopla:66778899")],
+        ["https://www.openrent.co.uk/property-to-rent/london/2-bed-flat-clapham/1234567",
+         CanonicalPropertyUrl(url="https://openrent.co.uk/1234567", listing_id="openrent:1234567")],
+        ["https://www.spareroom.co.uk/flatshare/flatshare_detail.pl?flatshare_id=998877&search_id=1",
+         CanonicalPropertyUrl(url="https://spareroom.co.uk/flatshare/flatshare_detail.pl?flatshare_id=998877",
+                              listing_id="spareroom:998877")],
+        ["https://www.spareroom.co.uk/flatshare/london/clapham/998877",
+         CanonicalPropertyUrl(url="https://spareroom.co.uk/flatshare/flatshare_detail.pl?flatshare_id=998877",
+                              listing_id="spareroom:998877")])
+    def test_canonicalize_property_url_of_portal_listing(self, data):
+        # arrange
+        [property_url, expected_canonical_url] = data
+
+        # act
+        canonical_url = canonicalize_property_url(property_url)
+
+        # assert
+        with self.subTest(msg="assert listing is reduced to its listing id"):
+            self.assertEqual(canonical_url, expected_canonical_url)
+
+    @data(
+        ["https://www.openrent.co.uk/properties-to-rent/london", "https://openrent.co.uk/properties-to-rent/london"],
+        ["http://Example.com:80/", "http://example.com"],
+        ["https://example.com:8443/flat/", "https://example.com:8443/flat"],
+        ["example.com/flat", "https://example.com/flat"])
+    def test_canonicalize_property_url_of_other_url(self, data):
+        # arrange
+        [property_url, expected_url] = data
+
+        # act
+        canonical_url = canonicalize_property_url(property_url)
+
+        # assert
+        with self.subTest(msg="assert url is normalized without a listing id"):
+            self.assertEqual(canonical_url, CanonicalPropertyUrl(url=expected_url))
@@ -0,0 +1,109 @@
+from unittest import TestCase
+from unittest.mock import Mock, MagicMock
+
+from formula_thoughts_web.abstractions import ApplicationContext, Logger
+
+from src.domain.errors import concurrent_update_error, code_required_error
+from src.domain.retry import ConflictRetryPolicy
+from src.exceptions import ConflictException
+
+
+class TestConflictRetryPolicy(TestCase):
+
+    def setUp(self):
+        self.__logger: Logger = Mock()
+        self.__sleep = MagicMock()
+        self.__sut = ConflictRetryPolicy(logger=self.__logger, max_attempts=3, base_delay_seconds=0.1,
+                                         sleep=self.__sleep)
+
+    def test_run_retries_from_fetch_after_conflict(self):
+        # arrange
+        fetch = Mock(spec=["run"])
+        fetch.run = MagicMock(side_effect=lambda context: context.set_var(name="entity", value="fresh"))
+        write = Mock(spec=["run"])
+        write.run = MagicMock(side_effect=[ConflictException(), None])
+        context = ApplicationContext(variables={"route_key": "PUT /groups/{group_id}", "group_id": "1234"})
+        command = self.__sut.retrying(name="update_group", sequence=[fetch, write])
+
+        # act
+        command.run(context=context)
+
+        # assert
+        with self.subTest(msg="assert entity is fetched again"):
+            self.assertEqual(fetch.run.call_count, 2)
+
+        # assert
+        with self.subTest(msg="assert variables of the failed attempt are dropped"):
+            self.assertEqual(context.variables, {"route_key": "PUT /groups/{group_id}", "group_id": "1234",
+                                                 "entity": "fresh"})
+
+        # assert
+        with self.subTest(msg="assert backoff is jittered below the base delay"):
+            self.assertLessEqual(self.__sleep.call_args.args[0], 0.1)
+
+        # assert
+        with self.subTest(msg="assert attempts are logged with the route and group"):
+            self.__logger.log_event.assert_called_once_with(message="optimistic concurrency attempts", properties={
+                "route_key": "PUT /groups/{group_id}",
+                "group_id": "1234",
+                "action": "update_group",
+                "attempts": 2,
+                "conflicts": 1,
+                "exhausted": False
+            })
+
+    def test_run_adds_error_when_attempts_run_out(self):
+        # arrange
+        write = Mock(spec=["run"])
+        write.run = MagicMock(side_effect=ConflictException())
+        context = ApplicationContext(variables={})
+        command = self.__sut.retrying(name="add_voter", sequence=[write])
+
+        # act
+        command.run(context=context)
+
+        # assert
+        with self.subTest(msg="assert every attempt is made"):
+            self.assertEqual(write.run.call_count, 3)
+
+        # assert
+        with self.subTest(msg="assert it only backs off between attempts"):
+            self.assertEqual(self.__sleep.call_count, 2)
+
+        # assert
+        with self.subTest(msg="assert concurrent update error is added"):
+            self.assertEqual(context.error_capsules, [concurrent_update_error])
+
+    def test_run_stops_on_error(self):
+        # arrange
+        validate = Mock(spec=["run"])
+        validate.run = MagicMock(side_effect=lambda context: context.error_capsules.append(code_required_error))
+        write = Mock(spec=["run"])
+        context = ApplicationContext(variables={})
+        command = self.__sut.retrying(name="add_user_to_group", sequence=[validate, write])
+
+        # act
+        command.run(context=context)
+
+        # assert
+        with self.subTest(msg="assert following commands are not run"):
+            write.run.assert_not_called()
+
+        # assert
+        with self.subTest(msg="assert error is kept"):
+            self.assertEqual(context.error_capsules, [code_required_error])
+
+    def test_retrying_flattens_sequence_builders(self):
+        # arrange
+        fetch = Mock(spec=["run"])
+        sequence_builder = Mock()
+        sequence_builder.generate_sequence = MagicMock(return_value=[fetch])
+        write = Mock(spec=["run"])
+        context = ApplicationContext(variables={})
+
+        # act
+        self.__sut.retrying(name="add_user_to_group", sequence=[sequence_builder, write]).run(context=context)
+
+        # assert
+        with self.subTest(msg="assert commands of the sequence builder are run"):
+            fetch.run.assert_called_once_with(context)
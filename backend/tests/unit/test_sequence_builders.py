@@ -3,7 +3,7 @@ from unittest.mock import Mock
 
 from src.core import IFetchUserGroupsCommand, IValidateIfUserBelongsToAtLeastOneGroupCommand, \
     IValidateIfGroupBelongsToUserCommand, \
-    IFetchGroupByIdCommand, IGetUserGroupByIdSequenceBuilder, ISetPropertyRequestCommand, ICreatePropertyCommand, \
+    IFetchGroupByIdCommand, ISetPropertyRequestCommand, ICreatePropertyCommand, \
     IValidatePropertyRequestCommand, IDeletePropertyCommand, IAddCurrentUserToGroupCommand, ISetGroupIdFromCodeCommand, \
     IGetCodeFromGroupIdCommand, IValidateUserIsNotParticipantCommand, \
     IFetchAuthUserClaimsIfUserDoesNotExistCommand, IFetchUserGroupIfExistsSequenceBuilder, ICreateUserGroupsCommand, \
@@ -11,14 +11,20 @@ from src.core import IFetchUserGroupsCommand, IValidateIfUserBelongsToAtLeastOne
     ISetCreatedAnonymousRedFlagCommand, IValidatePropertyUrlCommand, IGetRedFlagsCommand, \
     ISetAnonymousRedFlagsCommand, IGetRedFlagByIdCommand, ISetAnonymousRedFlagCommand, IValidateAlreadyVotedCommand, \
     IValidateNotVotedCommand, ICreateVoteCommand, IDeleteVoteCommand, IRemoveParticipantFromGroupCommand, \
-    IRemoveGroupFromUserGroupsCommand, IValidateUserIsAlreadyParticipantCommand
+    IRemoveGroupFromUserGroupsCommand, IValidateUserIsAlreadyParticipantCommand, IValidatePageRequestCommand, \
+    IFetchGroupPageByIdCommand, IFetchGroupMetadataByIdCommand, IGetUserGroupMetadataByIdSequenceBuilder, \
+    ISetPropertiesRequestCommand, ICreatePropertiesCommand, IValidatePropertiesRequestCommand, \
+    ISetRedFlagsLookupRequestCommand, IValidateRedFlagsLookupRequestCommand, IGetRedFlagsByUrlsCommand, \
+    ISetAnonymousRedFlagsByUrlCommand, IBeginUnitOfWorkCommand, ICommitUnitOfWorkCommand, \
+    IConflictRetryPolicy
 from src.domain.sequence_builders import FetchUserGroupsSequenceBuilder, \
     GetUserGroupByIdSequenceBuilder, \
     CreatePropertySequenceBuilder, DeletePropertySequenceBuilder, AddUserToGroupSequenceBuilder, \
     GetCodeForGroupSequenceBuilder, \
     CreateGroupSequenceBuilder, FetchUserGroupIfExistsSequenceBuilder, CreateRedFlagSequenceBuilder, \
     GetRedFlagsSequenceBuilder, CreateVoteForRedFlagSequenceBuilder, DeleteVoteForRedFlagSequenceBuilder, \
-    RemoveUserFromGroupSequenceBuilder
+    RemoveUserFromGroupSequenceBuilder, GetUserGroupPageByIdSequenceBuilder, GetUserGroupMetadataByIdSequenceBuilder, \
+    CreatePropertiesSequenceBuilder, LookupRedFlagsSequenceBuilder
 
 
 class TestFetchUserGroupsSequenceBuilder(TestCase):
@@ -58,10 +64,59 @@ class TestGetUserGroupByIdSequenceBuilder(TestCase):
         ])
 
 
+class TestGetUserGroupMetadataByIdSequenceBuilder(TestCase):
+
+    def setUp(self):
+        self.__validate_if_user_belongs_to_at_least_one_group_command: IValidateIfUserBelongsToAtLeastOneGroupCommand = Mock()
+        self.__validate_if_group_belongs_to_user: IValidateIfGroupBelongsToUserCommand = Mock()
+        self.__fetch_group_metadata_by_id_command: IFetchGroupMetadataByIdCommand = Mock()
+        self.__sut = GetUserGroupMetadataByIdSequenceBuilder(
+            validate_if_user_belongs_to_at_least_one_group_command=self.__validate_if_user_belongs_to_at_least_one_group_command,
+            validate_if_group_belongs_to_user=self.__validate_if_group_belongs_to_user,
+            fetch_group_metadata_by_id_command=self.__fetch_group_metadata_by_id_command)
+
+    def test_build_should_run_commands_in_order(self):
+        # act
+        self.__sut.build()
+
+        # assert
+        self.assertEqual(self.__sut.components, [
+            self.__validate_if_user_belongs_to_at_least_one_group_command,
+            self.__validate_if_group_belongs_to_user,
+            self.__fetch_group_metadata_by_id_command
+        ])
+
+
+class TestGetUserGroupPageByIdSequenceBuilder(TestCase):
+
+    def setUp(self):
+        self.__validate_page_request: IValidatePageRequestCommand = Mock()
+        self.__validate_if_user_belongs_to_at_least_one_group_command: IValidateIfUserBelongsToAtLeastOneGroupCommand = Mock()
+        self.__validate_if_group_belongs_to_user: IValidateIfGroupBelongsToUserCommand = Mock()
+        self.__fetch_group_page_by_id_command: IFetchGroupPageByIdCommand = Mock()
+        self.__sut = GetUserGroupPageByIdSequenceBuilder(
+            validate_page_request=self.__validate_page_request,
+            validate_if_user_belongs_to_at_least_one_group_command=self.__validate_if_user_belongs_to_at_least_one_group_command,
+            validate_if_group_belongs_to_user=self.__validate_if_group_belongs_to_user,
+            fetch_group_page_by_id_command=self.__fetch_group_page_by_id_command)
+
+    def test_build_should_run_commands_in_order(self):
+        # act
+        self.__sut.build()
+
+        # assert
+        self.assertEqual(self.__sut.components, [
+            self.__validate_page_request,
+            self.__validate_if_user_belongs_to_at_least_one_group_command,
+            self.__validate_if_group_belongs_to_user,
+            self.__fetch_group_page_by_id_command
+        ])
+
+
 class TestCreatePropertySequenceBuilder(TestCase):
 
     def setUp(self):
-        self.__get_user_group_by_id: IGetUserGroupByIdSequenceBuilder = Mock()
+        self.__get_user_group_by_id: IGetUserGroupMetadataByIdSequenceBuilder = Mock()
         self.__set_create_property_request: ISetPropertyRequestCommand = Mock()
         self.__create_property: ICreatePropertyCommand = Mock()
         self.__validate_property: IValidatePropertyRequestCommand = Mock()
@@ -83,10 +138,35 @@ class TestCreatePropertySequenceBuilder(TestCase):
         ])
 
 
+class TestCreatePropertiesSequenceBuilder(TestCase):
+
+    def setUp(self):
+        self.__get_user_group_by_id: IGetUserGroupMetadataByIdSequenceBuilder = Mock()
+        self.__set_create_properties_request: ISetPropertiesRequestCommand = Mock()
+        self.__create_properties: ICreatePropertiesCommand = Mock()
+        self.__validate_properties: IValidatePropertiesRequestCommand = Mock()
+        self.__sut = CreatePropertiesSequenceBuilder(get_user_group_by_id=self.__get_user_group_by_id,
+                                                     set_create_properties_request=self.__set_create_properties_request,
+                                                     create_properties=self.__create_properties,
+                                                     validate_properties=self.__validate_properties)
+
+    def test_build_should_run_commands_in_order(self):
+        # act
+        self.__sut.build()
+
+        # assert
+        self.assertEqual(self.__sut.components, [
+            self.__set_create_properties_request,
+            self.__get_user_group_by_id,
+            self.__validate_properties,
+            self.__create_properties
+        ])
+
+
 class TestDeletePropertySequenceBuilder(TestCase):
 
     def setUp(self):
-        self.__get_user_group_by_id: IGetUserGroupByIdSequenceBuilder = Mock()
+        self.__get_user_group_by_id: IGetUserGroupMetadataByIdSequenceBuilder = Mock()
         self.__delete_property: IDeletePropertyCommand = Mock()
         self.__sut = DeletePropertySequenceBuilder(get_user_group_by_id=self.__get_user_group_by_id,
                                                    delete_property=self.__delete_property)
@@ -106,38 +186,53 @@ class TestAddUserToGroupSequenceBuilder(TestCase):
 
     def setUp(self):
         self.__set_group_id_from_code: ISetGroupIdFromCodeCommand = Mock()
-        self.__get_group_by_id: IFetchGroupByIdCommand = Mock()
+        self.__get_group_by_id: IFetchGroupMetadataByIdCommand = Mock()
         self.__add_current_user_to_group_command: IAddCurrentUserToGroupCommand = Mock()
         self.__validate_user_is_not_participant: IValidateUserIsNotParticipantCommand = Mock()
         self.__create_user_groups: ICreateUserGroupsCommand = Mock()
         self.__fetch_user_group_if_exists: IFetchUserGroupIfExistsSequenceBuilder = Mock()
+        self.__begin_unit_of_work: IBeginUnitOfWorkCommand = Mock()
+        self.__commit_unit_of_work: ICommitUnitOfWorkCommand = Mock()
+        self.__retrying_command = Mock()
+        self.__conflict_retry_policy: IConflictRetryPolicy = Mock()
+        self.__conflict_retry_policy.retrying = Mock(return_value=self.__retrying_command)
         self.__sut = AddUserToGroupSequenceBuilder(get_group_by_id=self.__get_group_by_id,
                                                    add_current_user_to_group_command=self.__add_current_user_to_group_command,
                                                    set_group_id_from_code=self.__set_group_id_from_code,
                                                    validate_user_is_not_participant=self.__validate_user_is_not_participant,
                                                    create_user_groups=self.__create_user_groups,
-                                                   fetch_user_group_if_exists=self.__fetch_user_group_if_exists)
+                                                   fetch_user_group_if_exists=self.__fetch_user_group_if_exists,
+                                                   begin_unit_of_work=self.__begin_unit_of_work,
+                                                   commit_unit_of_work=self.__commit_unit_of_work,
+                                                   conflict_retry_policy=self.__conflict_retry_policy)
 
     def test_build_should_run_commands_in_order(self):
         # act
         self.__sut.build()
 
         # assert
-        self.assertEqual(self.__sut.components, [
-            self.__fetch_user_group_if_exists,
-            self.__set_group_id_from_code,
-            self.__get_group_by_id,
-            self.__validate_user_is_not_participant,
-            self.__add_current_user_to_group_command,
-            self.__create_user_groups
-        ])
+        with self.subTest(msg="assert the whole join is retried on conflict"):
+            self.__conflict_retry_policy.retrying.assert_called_once_with(name="add_user_to_group", sequence=[
+                self.__fetch_user_group_if_exists,
+                self.__set_group_id_from_code,
+                self.__get_group_by_id,
+                self.__validate_user_is_not_participant,
+                self.__begin_unit_of_work,
+                self.__add_current_user_to_group_command,
+                self.__create_user_groups,
+                self.__commit_unit_of_work
+            ])
+
+        # assert
+        with self.subTest(msg="assert retrying command is the only component"):
+            self.assertEqual(self.__sut.components, [self.__retrying_command])
 
 
 class TestGetCodeForGroupSequenceBuilder(TestCase):
 
     def setUp(self):
         self.__get_code_from_group_id: IGetCodeFromGroupIdCommand = Mock()
-        self.__get_group_by_id_sequence: IGetUserGroupByIdSequenceBuilder = Mock()
+        self.__get_group_by_id_sequence: IGetUserGroupMetadataByIdSequenceBuilder = Mock()
         self.__sut = GetCodeForGroupSequenceBuilder(get_code_from_group_id=self.__get_code_from_group_id,
                                                     get_group_by_id_sequence=self.__get_group_by_id_sequence)
 
@@ -224,9 +319,11 @@ class TestGetRedFlagsSequenceBuilder(TestCase):
 
     def setUp(self):
         self.__validate_get_red_flags_request: IValidatePropertyUrlCommand = Mock()
+        self.__validate_page_request: IValidatePageRequestCommand = Mock()
         self.__get_red_flags: IGetRedFlagsCommand = Mock()
         self.__set_red_flags_response: ISetAnonymousRedFlagsCommand = Mock()
         self.__sut = GetRedFlagsSequenceBuilder(validate_get_red_flags_request=self.__validate_get_red_flags_request,
+                                                validate_page_request=self.__validate_page_request,
                                                 get_red_flags=self.__get_red_flags,
                                                 set_red_flags_response=self.__set_red_flags_response)
 
@@ -237,6 +334,7 @@ class TestGetRedFlagsSequenceBuilder(TestCase):
         # assert
         self.assertEqual(self.__sut.components, [
             self.__validate_get_red_flags_request,
+            self.__validate_page_request,
             self.__get_red_flags,
             self.__set_red_flags_response
         ])
@@ -250,25 +348,36 @@ class TestCreateVoteForRedFlagSequenceBuilder(TestCase):
         self.__set_anonymous_red_flag_response: ISetAnonymousRedFlagCommand = Mock()
         self.__validate_not_voted: IValidateNotVotedCommand = Mock()
         self.__upvote: ICreateVoteCommand = Mock()
+        self.__retrying_command = Mock()
+        self.__conflict_retry_policy: IConflictRetryPolicy = Mock()
+        self.__conflict_retry_policy.retrying = Mock(return_value=self.__retrying_command)
         self.__sut = CreateVoteForRedFlagSequenceBuilder(
             validate_get_red_flags_request=self.__validate_get_red_flags_request,
             get_red_flag_by_id=self.__get_red_flag_by_id,
             set_anonymous_red_flag_response=self.__set_anonymous_red_flag_response,
             validate_not_voted=self.__validate_not_voted,
-            upvote=self.__upvote)
+            upvote=self.__upvote,
+            conflict_retry_policy=self.__conflict_retry_policy)
 
     def test_build_should_run_commands_in_order(self):
         # act
         self.__sut.build()
 
         # assert
-        self.assertEqual(self.__sut.components, [
-            self.__validate_get_red_flags_request,
-            self.__get_red_flag_by_id,
-            self.__validate_not_voted,
-            self.__upvote,
-            self.__set_anonymous_red_flag_response
-        ])
+        with self.subTest(msg="assert fetch and vote are retried on conflict"):
+            self.__conflict_retry_policy.retrying.assert_called_once_with(name="add_voter", sequence=[
+                self.__get_red_flag_by_id,
+                self.__validate_not_voted,
+                self.__upvote
+            ])
+
+        # assert
+        with self.subTest(msg="assert commands run in order"):
+            self.assertEqual(self.__sut.components, [
+                self.__validate_get_red_flags_request,
+                self.__retrying_command,
+                self.__set_anonymous_red_flag_response
+            ])
 
 
 class TestDeleteVoteForRedFlagSequenceBuilder(TestCase):
@@ -279,25 +388,36 @@ class TestDeleteVoteForRedFlagSequenceBuilder(TestCase):
         self.__set_anonymous_red_flag_response: ISetAnonymousRedFlagCommand = Mock()
         self.__validate_user_already_voted: IValidateAlreadyVotedCommand = Mock()
         self.__down_vote_command: IDeleteVoteCommand = Mock()
+        self.__retrying_command = Mock()
+        self.__conflict_retry_policy: IConflictRetryPolicy = Mock()
+        self.__conflict_retry_policy.retrying = Mock(return_value=self.__retrying_command)
         self.__sut = DeleteVoteForRedFlagSequenceBuilder(
             validate_get_red_flags_request=self.__validate_get_red_flags_request,
             get_red_flag_by_id=self.__get_red_flag_by_id,
             set_anonymous_red_flag_response=self.__set_anonymous_red_flag_response,
             validate_user_already_voted=self.__validate_user_already_voted,
-            down_vote_command=self.__down_vote_command)
+            down_vote_command=self.__down_vote_command,
+            conflict_retry_policy=self.__conflict_retry_policy)
 
     def test_build_should_run_commands_in_order(self):
         # act
         self.__sut.build()
 
         # assert
-        self.assertEqual(self.__sut.components, [
-            self.__validate_get_red_flags_request,
-            self.__get_red_flag_by_id,
-            self.__validate_user_already_voted,
-            self.__down_vote_command,
-            self.__set_anonymous_red_flag_response
-        ])
+        with self.subTest(msg="assert fetch and vote are retried on conflict"):
+            self.__conflict_retry_policy.retrying.assert_called_once_with(name="remove_voter", sequence=[
+                self.__get_red_flag_by_id,
+                self.__validate_user_already_voted,
+                self.__down_vote_command
+            ])
+
+        # assert
+        with self.subTest(msg="assert commands run in order"):
+            self.assertEqual(self.__sut.components, [
+                self.__validate_get_red_flags_request,
+                self.__retrying_command,
+                self.__set_anonymous_red_flag_response
+            ])
 
 
 class TestRemoveUserFromGroupSequenceBuilder(TestCase):
@@ -308,11 +428,15 @@ class TestRemoveUserFromGroupSequenceBuilder(TestCase):
         self.__validate_user_is_already_participant: IValidateUserIsAlreadyParticipantCommand = Mock()
         self.__get_group_by_id: IFetchGroupByIdCommand = Mock()
         self.__fetch_user_group_if_exists: IFetchUserGroupIfExistsSequenceBuilder = Mock()
+        self.__begin_unit_of_work: IBeginUnitOfWorkCommand = Mock()
+        self.__commit_unit_of_work: ICommitUnitOfWorkCommand = Mock()
         self.__sut = RemoveUserFromGroupSequenceBuilder(fetch_user_group_if_exists=self.__fetch_user_group_if_exists,
                                                         get_group_by_id=self.__get_group_by_id,
                                                         validate_user_is_already_participant=self.__validate_user_is_already_participant,
                                                         remove_group_from_user_groups_command=self.__remove_group_from_user_groups_command,
-                                                        remove_participant_from_group_command=self.__remove_participant_from_group_command)
+                                                        remove_participant_from_group_command=self.__remove_participant_from_group_command,
+                                                        begin_unit_of_work=self.__begin_unit_of_work,
+                                                        commit_unit_of_work=self.__commit_unit_of_work)
 
     def test_build_should_run_commands_in_order(self):
         # act
@@ -323,6 +447,34 @@ class TestRemoveUserFromGroupSequenceBuilder(TestCase):
             self.__fetch_user_group_if_exists,
             self.__get_group_by_id,
             self.__validate_user_is_already_participant,
+            self.__begin_unit_of_work,
             self.__remove_participant_from_group_command,
-            self.__remove_group_from_user_groups_command
-        ])
\ No newline at end of file
+            self.__remove_group_from_user_groups_command,
+            self.__commit_unit_of_work
+        ])
+
+
+class TestLookupRedFlagsSequenceBuilder(TestCase):
+
+    def setUp(self):
+        self.__set_red_flags_lookup_request: ISetRedFlagsLookupRequestCommand = Mock()
+        self.__validate_red_flags_lookup_request: IValidateRedFlagsLookupRequestCommand = Mock()
+        self.__get_red_flags_by_urls: IGetRedFlagsByUrlsCommand = Mock()
+        self.__set_red_flags_by_url_response: ISetAnonymousRedFlagsByUrlCommand = Mock()
+        self.__sut = LookupRedFlagsSequenceBuilder(
+            set_red_flags_lookup_request=self.__set_red_flags_lookup_request,
+            validate_red_flags_lookup_request=self.__validate_red_flags_lookup_request,
+            get_red_flags_by_urls=self.__get_red_flags_by_urls,
+            set_red_flags_by_url_response=self.__set_red_flags_by_url_response)
+
+    def test_build_should_run_commands_in_order(self):
+        # act
+        self.__sut.build()
+
+        # assert
+        self.assertEqual(self.__sut.components, [
+            self.__set_red_flags_lookup_request,
+            self.__validate_red_flags_lookup_request,
+            self.__get_red_flags_by_urls,
+            self.__set_red_flags_by_url_response
+        ])
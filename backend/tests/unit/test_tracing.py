@@ -0,0 +1,144 @@
+from unittest import TestCase
+from unittest.mock import Mock, MagicMock
+
+from formula_thoughts_web.abstractions import ApplicationContext, Logger
+from formula_thoughts_web.application import FluentSequenceBuilder
+
+from src.domain.errors import code_required_error
+from src.domain.tracing import TimedSequenceRunner
+
+
+class FetchCommand:
+
+    def __init__(self, call_stats: Mock):
+        self.__call_stats = call_stats
+
+    def run(self, context: ApplicationContext) -> None:
+        self.__call_stats.snapshot.return_value = (2, 512)
+
+
+class ValidateCommand:
+
+    def run(self, context: ApplicationContext) -> None:
+        context.error_capsules.append(code_required_error)
+
+
+class WriteCommand:
+
+    def run(self, context: ApplicationContext) -> None:
+        ...
+
+
+class FetchSequenceBuilder(FluentSequenceBuilder):
+
+    def __init__(self, fetch_command: FetchCommand):
+        super().__init__()
+        self.__fetch_command = fetch_command
+
+    def build(self):
+        self._add_command(command=self.__fetch_command)
+
+
+class WriteSequenceBuilder(FluentSequenceBuilder):
+
+    def __init__(self, fetch_sequence_builder: FetchSequenceBuilder,
+                 commands: list):
+        super().__init__()
+        self.__fetch_sequence_builder = fetch_sequence_builder
+        self.__commands = commands
+
+    def build(self):
+        self._add_sequence_builder(sequence_builder=self.__fetch_sequence_builder)
+        for command in self.__commands:
+            self._add_command(command=command)
+
+
+class TestTimedSequenceRunner(TestCase):
+
+    def setUp(self):
+        self.__error_handling_strategy_factory = Mock()
+        self.__logger: Logger = Mock()
+        self.__call_stats = Mock()
+        self.__call_stats.snapshot = MagicMock(return_value=(0, 0))
+        self.__clock = MagicMock(side_effect=[0.0, 0.002, 0.002, 0.003, 0.003, 0.004])
+        self.__sut = TimedSequenceRunner(error_handling_strategy_factory=self.__error_handling_strategy_factory,
+                                         logger=self.__logger,
+                                         call_stats=self.__call_stats,
+                                         clock=self.__clock)
+
+    def test_run_logs_span_tree(self):
+        # arrange
+        write_command = WriteCommand()
+        sequence = WriteSequenceBuilder(fetch_sequence_builder=FetchSequenceBuilder(FetchCommand(self.__call_stats)),
+                                        commands=[write_command])
+
+        # act
+        self.__sut.run(context=ApplicationContext(variables={"route_key": "POST /red-flags/{red_flag_id}/votes",
+                                                             "red_flag_id": "5678"}),
+                       top_level_sequence=sequence)
+
+        # assert
+        with self.subTest(msg="assert a span is logged per command run under the span of its sequence builder"):
+            self.__logger.log_event.assert_called_with(message="command timings", properties={
+                "route_key": "POST /red-flags/{red_flag_id}/votes",
+                "red_flag_id": "5678",
+                "spans": {
+                    "name": "WriteSequenceBuilder", "duration_ms": 3.0, "dynamo_calls": 2, "bytes_read": 512,
+                    "children": [
+                        {"name": "FetchSequenceBuilder", "duration_ms": 2.0, "dynamo_calls": 2, "bytes_read": 512,
+                         "children": [
+                             {"name": "FetchCommand", "duration_ms": 2.0, "dynamo_calls": 2, "bytes_read": 512,
+                              "children": []}
+                         ]},
+                        {"name": "WriteCommand", "duration_ms": 1.0, "dynamo_calls": 0, "bytes_read": 0, "children": []}
+                    ]}
+            })
+
+        # assert
+        with self.subTest(msg="assert command events are logged like the framework runner"):
+            self.__logger.log_event.assert_any_call(message="command event",
+                                                    properties={"action": f"{WriteCommand.__module__}.WriteCommand"})
+
+        # assert
+        with self.subTest(msg="assert request and response are traced like the framework runner"):
+            self.__logger.log_trace.assert_any_call("request None")
+
+    def test_run_stops_on_error(self):
+        # arrange
+        write_command = Mock(spec=["run"])
+        context = ApplicationContext(variables={})
+        sequence = WriteSequenceBuilder(fetch_sequence_builder=FetchSequenceBuilder(FetchCommand(self.__call_stats)),
+                                        commands=[ValidateCommand(), write_command])
+
+        # act
+        self.__sut.run(context=context, top_level_sequence=sequence)
+
+        # assert
+        with self.subTest(msg="assert following commands are not run"):
+            write_command.run.assert_not_called()
+
+        # assert
+        with self.subTest(msg="assert error is handled"):
+            (self.__error_handling_strategy_factory.get_error_handling_strategy.return_value.handle_error
+             .assert_called_once_with(context=context, error=code_required_error))
+
+        # assert
+        with self.subTest(msg="assert commands not run are left out of the spans"):
+            spans = self.__logger.log_event.call_args.kwargs["properties"]["spans"]
+            self.assertEqual([child["name"] for child in spans["children"]],
+                             ["FetchSequenceBuilder", "ValidateCommand"])
+
+    def test_run_logs_spans_when_command_raises(self):
+        # arrange
+        write_command = Mock(spec=["run"])
+        write_command.run = MagicMock(side_effect=Exception())
+        sequence = WriteSequenceBuilder(fetch_sequence_builder=FetchSequenceBuilder(FetchCommand(self.__call_stats)),
+                                        commands=[write_command])
+
+        # act
+        with self.assertRaises(Exception):
+            self.__sut.run(context=ApplicationContext(variables={}), top_level_sequence=sequence)
+
+        # assert
+        with self.subTest(msg="assert spans are logged"):
+            self.assertEqual(self.__logger.log_event.call_args.kwargs["message"], "command timings")